@@ -37,11 +37,16 @@ import inspect
 import warnings as _warnings
 from pathlib import Path
 
+from . import batch
 from . import debug_helper
 from . import editors_helpers
+from . import explanation_cache
 from . import formatters
 from . import path_info
+from . import source_cache
+from . import timing
 from .config import session
+from .snapshot import TracebackSnapshot
 from .my_gettext import current_lang
 
 # Ensure that warnings are not shown to the end user, as they could
@@ -76,7 +81,7 @@ def exclude_directory_from_traceback(dir_name):
     path_info.exclude_directory_from_traceback(dir_name)
 
 
-def explain_traceback(redirect=None):
+def explain_traceback(redirect=None, include=None, lang=None):
     """Replaces a standard traceback by a friendlier one, giving more
     information about a given exception than a standard traceback.
     Note that this excludes ``SystemExit`` and ``KeyboardInterrupt``
@@ -92,8 +97,92 @@ def explain_traceback(redirect=None):
 
     If the string ``"capture"`` is given as the value for ``redirect``, the
     output is saved and can be later retrieved by ``get_output()``.
+
+    Values for ``include`` and ``lang`` can also be given; like ``redirect``,
+    they are only used for this call. Since none of the global settings
+    are changed, different threads can use this function at the same time.
+    """
+    session.explain_traceback(redirect=redirect, include=include, lang=lang)
+
+
+def explain_many(exc_infos, include="explain", lang=None):
+    """Explains many exceptions at once, reusing information that would
+    otherwise be computed again for each exception.
+
+    ``exc_infos`` is an iterable whose elements are either exception
+    instances, tuples such as those returned by ``sys.exc_info()``,
+    or snapshots obtained using ``take_snapshot()``.
+    The values of ``include`` and ``lang`` are only used for this call.
+
+    Returns a list containing, in the same order, a dict for each
+    exception whose keys are the names of the items selected by
+    ``include`` (as well as ``"message"``), or ``None`` if an exception
+    could not be explained. The exceptions are not recorded in the
+    history of the session.
     """
-    session.explain_traceback(redirect=redirect)
+    return batch.explain_many(exc_infos, include=include, lang=lang)
+
+
+def take_snapshot(exception=None):
+    """Returns a ``TracebackSnapshot`` for the given exception instance
+    or, by default, for the exception currently being handled.
+
+    A snapshot contains all the information required to explain the
+    exception, without keeping references to frames. It can be pickled,
+    and explained later, possibly in a different process, using
+    ``explain_snapshot()`` or ``explain_many()``.
+    """
+    if exception is None:
+        etype, value, tb = sys.exc_info()
+    else:
+        etype, value, tb = type(exception), exception, exception.__traceback__
+    if etype is None:  # pragma: no cover
+        raise ValueError("No exception to record.")
+    return TracebackSnapshot(etype, value, tb)
+
+
+def explain_snapshot(snapshot, redirect=None, include=None, lang=None):
+    """Like ``explain_traceback()``, but for an exception recorded
+    using ``take_snapshot()``.
+    """
+    session.explain_snapshot(snapshot, redirect=redirect, include=include, lang=lang)
+
+
+def install_asyncio_handler(
+    loop=None, redirect=None, include=None, lang=None, executor=None, max_pending=100
+):
+    """Replaces the exception handler of an asyncio event loop (by default,
+    the current one) so that exceptions in tasks and callbacks are explained.
+
+    Only a snapshot of the exception is taken on the loop thread; the
+    analysis is done using ``executor`` which, by default, has a single
+    thread. If more than ``max_pending`` exceptions are waiting to be
+    explained, only their message is shown.
+
+    The values of ``redirect``, ``include`` and ``lang`` are used instead
+    of the session settings if they are specified.
+    """
+    from . import asyncio_support
+
+    return asyncio_support.install_handler(
+        loop=loop,
+        redirect=redirect,
+        include=include,
+        lang=lang,
+        executor=executor,
+        max_pending=max_pending,
+    )
+
+
+async def explain_async(exception, include=None, lang=None, executor=None):
+    """Returns the explanation of an exception, as a string, without
+    blocking the asyncio event loop: the analysis is done in an executor.
+    """
+    from . import asyncio_support
+
+    return await asyncio_support.explain(
+        exception, include=include, lang=lang, executor=executor
+    )
 
 
 def get_output(flush=True):
@@ -325,3 +414,137 @@ def set_stream(redirect=None):
 def get_stream():
     """Returns the value of the current stream used for output."""
     return session.write_err
+
+
+def set_history_size(size=10, spill_to_disk=False):
+    """Sets the number of recorded tracebacks for which all the information
+    is kept, including references to the frames where exceptions were
+    raised, which keeps all their local variables alive.
+
+    Older tracebacks are kept in a compact form which can still be used
+    by ``history()``, ``back()`` and ``explain()``. If ``spill_to_disk``
+    is ``True``, they are written to a temporary file instead of being
+    kept in memory.
+    """
+    session.set_history_size(size=size, spill_to_disk=spill_to_disk)
+
+
+def get_history_size():
+    """Returns the number of recorded tracebacks for which all the
+    information is kept. See ``set_history_size()`` for details.
+    """
+    return session.get_history_size()
+
+
+def set_time_budget(seconds=None):
+    """Sets the maximum time, in seconds, used to analyze each exception.
+    If the analysis takes longer, it is abandoned: the message, the
+    generic explanation and the location are shown, but the cause is
+    replaced by a note indicating that the analysis was stopped.
+
+    By default, or if ``seconds`` is None, there is no time limit.
+    """
+    session.set_time_budget(seconds)
+
+
+def get_time_budget():
+    """Returns the maximum time used to analyze each exception."""
+    return session.get_time_budget()
+
+
+def enable_timing(enabled=True):
+    """Enables or disables recording the time spent in each stage
+    of the analysis of exceptions. See ``get_timings()``.
+    """
+    timing.enable(enabled)
+
+
+def get_timings(aggregate=False):
+    """Returns a dict of the form ``{stage: {"count": n, "seconds": s}}``
+    giving the number of calls and total wall time of each stage of
+    the analysis for the last exception explained or, if ``aggregate``
+    is True, for all the exceptions explained since the timings were
+    reset. Times are inclusive of those of the stages called within.
+    """
+    if aggregate:
+        return timing.session_timings.as_dict()
+    if not session.friendly or session.friendly[-1] is None:
+        return {}
+    return session.friendly[-1].timings.as_dict()
+
+
+def reset_timings():
+    """Clears the timings recorded for all the exceptions explained."""
+    timing.session_timings.clear()
+
+
+def add_timing_sink(sink):
+    """Adds a function, called as ``sink(stage, seconds)`` each time the
+    duration of a stage is recorded, for example to send it to a
+    monitoring service.
+    """
+    timing.add_sink(sink)
+
+
+def set_explanation_cache_size(size=256):
+    """Enables reusing the explanations of exceptions identical to those
+    already explained, keeping at most ``size`` explanations;
+    a size of 0 disables this cache, which is the default.
+    Only the values of variables are always recomputed, which means
+    that, in rare cases, a suggestion based on other runtime values
+    might not be correct.
+    """
+    explanation_cache.explanation_cache.set_size(size)
+
+
+def get_explanation_cache_stats():
+    """Returns a dict giving the number of "hits" and "misses" of the
+    explanation cache, the number of explanations it contains ("size")
+    and the maximum number it can contain ("maxsize").
+    """
+    return explanation_cache.explanation_cache.get_stats()
+
+
+def set_source_cache_size(
+    max_entries=source_cache.MAX_ENTRIES, max_bytes=source_cache.MAX_BYTES
+):
+    """Sets the maximum number of sources, such as those of the entries of
+    a friendly console or of the code checked by ``check_syntax()``, kept
+    in the source cache, and the maximum memory, in bytes, that they use.
+    The least recently used sources are discarded first, except for those
+    needed by the tracebacks kept in the history; see ``set_history_size()``.
+    """
+    source_cache.cache.set_size(max_entries=max_entries, max_bytes=max_bytes)
+
+
+def get_source_cache_stats():
+    """Returns a dict giving the number of sources in the source cache
+    ("entries"), the approximate memory that they use ("bytes"), the number
+    of those that cannot be discarded ("pinned"), the number of sources
+    discarded so far ("evictions") and the limits set using
+    ``set_source_cache_size()``.
+    """
+    return source_cache.cache.get_stats()
+
+
+def set_aggregation(enabled=True, interval=60):
+    """Enables or disables aggregation, for programs which can raise the
+    same errors at a high rate. When enabled, only the first occurrence
+    of each error is explained; later occurrences are simply counted,
+    and a summary such as::
+
+        IndexError: list index out of range [3f2a9c0d1e7b4a65] seen 4,812 more times.
+
+    is written when an error occurs at least ``interval`` seconds after
+    the previous summary. The counts not yet written are also written when
+    aggregation is disabled, and when the program exits. Errors are
+    identified by their fingerprint, available as ``info["fingerprint"]``.
+    """
+    session.set_aggregation(enabled=enabled, interval=interval)
+
+
+def flush_aggregation(redirect=None):
+    """Writes the summary of the errors counted since the previous
+    summary, if any, without waiting for the next one to be due.
+    """
+    session.flush_aggregation(redirect=redirect)
@@ -0,0 +1,181 @@
+"""asyncio_support.py
+
+Exceptions raised in asyncio tasks and callbacks are reported through
+the exception handler of the event loop instead of sys.excepthook.
+This module provides a replacement for that handler, as well as a
+coroutine to explain exceptions caught in asynchronous code.
+
+To avoid blocking the event loop, only the exception and its traceback
+are recorded on the loop thread; taking a TracebackSnapshot and the
+analysis, which is much more time consuming, are done in an executor.
+With a ProcessPoolExecutor, the snapshot is taken on the loop thread,
+since it has to be pickled.
+"""
+import asyncio
+import functools
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from . import core
+from . import debug_helper
+from .config import session
+from .snapshot import TracebackSnapshot
+
+_executor = None
+
+
+def get_default_executor():
+    """Returns the executor used when none is specified. It has a single
+    thread so that, if many exceptions are raised at once, they do not
+    compete with other work submitted to the default executor of the loop.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="friendly")
+    return _executor
+
+
+def get_explanation(snapshot, include=None, lang=None):
+    """Returns the explanation of an exception recorded as a snapshot,
+    formatted using the current formatter.
+
+    This function is meant to be run in an executor; since snapshots
+    can be pickled, this can be a ProcessPoolExecutor.
+    """
+    output = []
+    session.explain_snapshot(
+        snapshot, redirect=output.append, include=include, lang=lang
+    )
+    return "".join(output)
+
+
+def explain_exception(etype, value, tb, include=None, lang=None):
+    """Takes a snapshot of an exception and returns its explanation.
+
+    This function is meant to be run in a thread of an executor; the
+    frames of the traceback are only read, while the event loop goes on.
+    """
+    snapshot = TracebackSnapshot(etype, value, tb)
+    return get_explanation(snapshot, include=include, lang=lang)
+
+
+def get_explain_function(exception, include, lang, executor):
+    """Returns the function to be run in an executor to explain an
+    exception; it only records the exception and its traceback, unless
+    a snapshot is needed to send the exception to another process."""
+    if isinstance(executor, ProcessPoolExecutor):
+        snapshot = TracebackSnapshot(
+            type(exception), exception, exception.__traceback__
+        )
+        return functools.partial(get_explanation, snapshot, include=include, lang=lang)
+    return functools.partial(
+        explain_exception,
+        type(exception),
+        exception,
+        exception.__traceback__,
+        include=include,
+        lang=lang,
+    )
+
+
+async def explain(exception, include=None, lang=None, executor=None):
+    """Returns the explanation of an exception, the analysis being done
+    in an executor so that the event loop is not blocked.
+    If executor is None, a single thread executor is used.
+    """
+    executor = executor or get_default_executor()
+    function = get_explain_function(exception, include, lang, executor)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, function)
+
+
+class ExceptionHandler:
+    """Exception handler for an asyncio event loop, to be installed using
+    ``loop.set_exception_handler()``.
+
+    If more than max_pending exceptions are waiting to be explained,
+    only the usual message is written for the following ones until
+    the executor has caught up.
+    """
+
+    def __init__(
+        self, redirect=None, include=None, lang=None, executor=None, max_pending=100
+    ):
+        self.redirect = redirect
+        self.include = include
+        self.lang = lang
+        self.executor = executor
+        self.max_pending = max_pending
+        self.pending = set()
+
+    def __call__(self, loop, context):
+        exception = context.get("exception")
+        if exception is None or exception.__traceback__ is None:
+            loop.default_exception_handler(context)
+            return
+
+        # The writer is obtained on the loop thread so that a value of
+        # "capture" refers to the output captured in this context.
+        write_err = session.get_writer(self.redirect)
+        header = context.get("message", "")
+        if len(self.pending) >= self.max_pending:
+            write_message(write_err, header, exception)
+            return
+
+        executor = self.executor or get_default_executor()
+        try:
+            function = get_explain_function(
+                exception, self.include, self.lang, executor
+            )
+        except Exception as e:  # pragma: no cover
+            debug_helper.log("Exception raised in ExceptionHandler.")
+            debug_helper.log_error(e)
+            loop.default_exception_handler(context)
+            return
+
+        future = loop.run_in_executor(executor, function)
+        self.pending.add(future)
+        future.add_done_callback(
+            functools.partial(self.write_explanation, write_err, header, exception)
+        )
+
+    def write_explanation(self, write_err, header, exception, future):
+        """Writes the explanation once it is available or, if it could
+        not be obtained, the usual message."""
+        self.pending.discard(future)
+        try:
+            explanation = future.result()
+        except Exception as e:  # pragma: no cover
+            debug_helper.log("Exception raised while explaining in executor.")
+            debug_helper.log_error(e)
+            write_message(write_err, header, exception)
+            return
+        if header:
+            write_err(header + "\n")
+        write_err(explanation)
+        if not explanation.endswith("\n"):
+            write_err("\n")
+
+
+def write_message(write_err, header, exception):
+    """Writes the usual message of an exception, without explanation."""
+    message = core.convert_value_to_message(exception)
+    write_err(f"{header}\n{type(exception).__name__}: {message}\n")
+
+
+def install_handler(
+    loop=None, redirect=None, include=None, lang=None, executor=None, max_pending=100
+):
+    """Replaces the exception handler of an event loop (by default, the
+    current one) by friendly's own, and returns it."""
+    if loop is None:
+        loop = asyncio.get_event_loop()
+    handler = ExceptionHandler(
+        redirect=redirect,
+        include=include,
+        lang=lang,
+        executor=executor,
+        max_pending=max_pending,
+    )
+    loop.set_exception_handler(handler)
+    return handler
@@ -0,0 +1,98 @@
+"""batch.py
+
+Used to explain many exceptions at once, for example when grading
+a large number of programs. Exceptions raised in the same file
+are explained one after the other, sharing the values that are costly
+to compute, such as tokens or similar names; see context.shared_caches().
+"""
+import os
+
+from . import core
+from . import debug_helper
+from . import formatters
+from .config import session
+from .context import clear_cache, shared_caches, time_budget
+from .my_gettext import current_lang
+from .snapshot import TracebackSnapshot
+
+# These values depend on the source; they are discarded each time
+# we start explaining exceptions raised in a different file.
+SOURCE_CACHES = ("tokenize",)
+
+
+def get_friendly_tb_factory(item):
+    """Returns a function creating a FriendlyTraceback, as well as the
+    file name and exception name used to group similar exceptions, given
+    either a tuple (etype, value, tb), an exception instance or
+    a TracebackSnapshot.
+    """
+    if isinstance(item, TracebackSnapshot):
+        key = item.filename, item.exception_type.qualname
+        return key, lambda: core.FriendlyTraceback.from_snapshot(item)
+    if isinstance(item, BaseException):
+        etype, value, tb = type(item), item, item.__traceback__
+    else:
+        etype, value, tb = item
+    key = get_filename(etype, value, tb), etype.__name__
+    return key, lambda: core.FriendlyTraceback(etype, value, tb)
+
+
+def get_filename(etype, value, tb):
+    """Returns the name of the file where the exception was raised."""
+    if issubclass(etype, SyntaxError) and value.filename:
+        return value.filename
+    if tb is None:
+        return ""
+    while tb.tb_next is not None:
+        tb = tb.tb_next
+    return os.path.abspath(tb.tb_frame.f_code.co_filename)
+
+
+def explain(friendly_tb, include):
+    """Returns a dict containing the message and the items selected
+    by include, for a single exception.
+    """
+    info = friendly_tb.info
+    info["lang"] = current_lang.lang
+    result = {"message": info["message"]}
+    with time_budget(session.time_budget):
+        for item in formatters.select_items(include):
+            if item != "header" and item in info:
+                result[item] = info[item]
+    # The exception is not kept in the history; its frames are not needed.
+    friendly_tb.detach()
+    return result
+
+
+def explain_many(exc_infos, include="explain", lang=None):
+    """Explains many exceptions, given as an iterable whose elements
+    are exception instances, tuples (etype, value, tb) or snapshots, and
+    returns a list containing, for each exception and in the same order,
+    a dict of the items selected by include. If an exception could
+    not be explained, the corresponding value is None.
+
+    The exceptions are not added to the history of the session.
+    The time budget of the session applies to each exception.
+    """
+    if include not in formatters.items_groups:  # pragma: no cover
+        raise ValueError(f"{include} is not a valid value.")
+    keys = {}
+    factories = []
+    for index, item in enumerate(exc_infos):
+        keys[index], factory = get_friendly_tb_factory(item)
+        factories.append(factory)
+    results = [None] * len(factories)
+    current_file = None
+    with current_lang.temporary(lang), shared_caches():
+        for index in sorted(keys, key=keys.get):
+            filename = keys[index][0]
+            if filename != current_file:
+                for kind in SOURCE_CACHES:
+                    clear_cache(kind)
+                current_file = filename
+            try:
+                results[index] = explain(factories[index](), include)
+            except Exception as e:  # pragma: no cover
+                debug_helper.log("Exception raised in explain_many().")
+                debug_helper.log_error(e)
+    return results
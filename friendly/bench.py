@@ -0,0 +1,371 @@
+"""bench.py
+
+Measures the time and memory taken to explain the exceptions of the
+test corpora: the SyntaxError cases of tests/syntax, described in
+tests/syntax_errors_descriptions.py, and the runtime cases found in
+tests/runtime/test_*.py. Only the explanations are timed. The time taken
+to find the cause is also given for each analyzer which found one.
+Results can be saved as a baseline, to which later results are compared
+so that regressions are flagged.
+
+Usage::
+
+    python -m friendly.bench [--corpus syntax] [--repeat 5]
+                             [--save results.json] [--baseline results.json]
+
+See ``python -m friendly.bench -h`` for all the options.
+The exit status is 1 if some regressions were found.
+"""
+import argparse
+import glob
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from . import __version__
+from . import explain_traceback, get_output, set_lang
+from . import fingerprint
+from . import timing
+from .config import session
+from .syntax_errors import syntax_utils
+
+THRESHOLD = 0.25  # relative slowdown flagged as a regression
+MIN_DELTA = 0.1e-3  # seconds; smaller differences are considered noise
+MIN_MEMORY_DELTA = 16 * 1024  # bytes
+PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+
+
+class Case:
+    """A single exception of a corpus. Calling run() raises the exception,
+    explains it, and returns the time taken by the explanation."""
+
+    def __init__(self, name, run):
+        self.name = name
+        self.run = run
+
+
+def find_tests_dir(tests_dir=None):
+    """Returns the directory containing the corpora; by default, that
+    of the source repository."""
+    if tests_dir is None:
+        tests_dir = os.path.join(os.path.dirname(__file__), "..", "tests")
+    tests_dir = os.path.abspath(tests_dir)
+    if not os.path.isdir(os.path.join(tests_dir, "syntax")):
+        sys.exit(f"Cannot find the test corpora in {tests_dir}.")
+    return tests_dir
+
+
+def syntax_cases(tests_dir):
+    """Returns the cases of tests/syntax, in the order of their descriptions."""
+    sys.path.insert(0, os.path.join(tests_dir, "syntax"))
+    sys.path.insert(0, tests_dir)
+    from syntax_errors_descriptions import descriptions
+
+    def make_run(module_name):
+        def run():
+            try:
+                importlib.import_module(module_name)
+            except Exception:  # noqa
+                start = time.perf_counter()
+                explain_traceback(redirect="capture")
+                get_output()
+                return time.perf_counter() - start
+            finally:
+                sys.modules.pop(module_name, None)
+            raise RuntimeError(f"No exception raised by {module_name}.")
+
+        return run
+
+    return [Case("syntax/" + name, make_run(name)) for name in descriptions]
+
+
+def runtime_cases(tests_dir):
+    """Returns the cases of tests/runtime; each is a test function
+    which raises an exception and explains it, of which only the
+    explanation is timed."""
+    sys.path.insert(0, os.path.join(tests_dir, "runtime"))
+    cases = []
+    pattern = os.path.join(tests_dir, "runtime", "test_*.py")
+    for path in sorted(glob.glob(pattern)):
+        module_name = os.path.splitext(os.path.basename(path))[0]
+        module = importlib.import_module(module_name)
+        for name in dir(module):
+            function = getattr(module, name)
+            if name.startswith("test") and callable(function):
+                cases.append(
+                    Case(f"runtime/{module_name}.{name}", make_timed(function))
+                )
+    return cases
+
+
+def make_timed(function):
+    def run():
+        elapsed = []
+        explain = session.explain_traceback
+
+        def timed_explain(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return explain(*args, **kwargs)
+            finally:
+                elapsed.append(time.perf_counter() - start)
+
+        session.explain_traceback = timed_explain
+        try:
+            function()
+        finally:
+            del session.explain_traceback
+        if not elapsed:
+            raise RuntimeError(f"No exception explained by {function.__name__}.")
+        return sum(elapsed)
+
+    return run
+
+
+CORPORA = {"syntax": syntax_cases, "runtime": runtime_cases}
+
+
+def percentiles(values):
+    """Returns a dict with the usual percentiles, as well as the maximum,
+    of a non-empty list of values."""
+    values = sorted(values)
+    result = {}
+    for name, fraction in PERCENTILES:
+        result[name] = values[round(fraction * (len(values) - 1))]
+    result["max"] = values[-1]
+    return result
+
+
+def measure(case, repeat, memory=True):
+    """Runs a case repeat times and returns the times taken, the time
+    taken by each stage of the analysis, the time taken to find the
+    cause for each analyzer which found it, and the peak memory used
+    by a single run."""
+    samples = []
+    stages = {}
+    causes = {}
+    for _ in range(repeat):
+        samples.append(case.run())
+        friendly_tb = session.friendly[-1] if session.friendly else None
+        if friendly_tb is not None:
+            for name, seconds in friendly_tb.timings.seconds.items():
+                stages.setdefault(name, []).append(seconds)
+            analyzer = dict.get(friendly_tb.info, fingerprint.ANALYZER_KEY)
+            seconds = friendly_tb.timings.seconds.get("assign_cause")
+            if analyzer and seconds is not None:
+                causes.setdefault(analyzer, []).append(seconds)
+        session.remove_last()
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            case.run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            session.remove_last()
+    return samples, stages, causes, peak
+
+
+def run(
+    corpora=("syntax", "runtime"), repeat=5, select=None, tests_dir=None, memory=True
+):
+    """Runs the benchmark and returns the results as a dict which can
+    be saved as JSON. If select is given, only the cases whose name
+    contains it are run."""
+    tests_dir = find_tests_dir(tests_dir)
+    results = {
+        "python": platform.python_version(),
+        "friendly": __version__,
+        "repeat": repeat,
+        "cases": {},
+        "stages": {},
+        "causes": {},
+        "failed": [],
+    }
+    all_stages = {}
+    all_causes = {}
+    syntax_utils.analyzer_calls.clear()
+    was_enabled = timing.enabled
+    timing.enable()
+    try:
+        for corpus in corpora:
+            for case in CORPORA[corpus](tests_dir):
+                if select is not None and select not in case.name:
+                    continue
+                try:
+                    case.run()  # warm up, and ensures that the case is valid
+                    session.remove_last()
+                    samples, stages, causes, peak = measure(case, repeat, memory)
+                except Exception:  # noqa
+                    results["failed"].append(case.name)
+                    continue
+                results["cases"][case.name] = percentiles(samples)
+                results["cases"][case.name]["peak_memory"] = peak
+                for name, values in stages.items():
+                    all_stages.setdefault(name, []).extend(values)
+                for name, values in causes.items():
+                    all_causes.setdefault(name, []).extend(values)
+    finally:
+        timing.enable(was_enabled)
+    for kind, values_by_name in (("stages", all_stages), ("causes", all_causes)):
+        for name, values in values_by_name.items():
+            results[kind][name] = percentiles(values)
+            results[kind][name]["count"] = len(values)
+    results["analyzers"] = syntax_utils.analyzer_calls.as_dict()
+    return results
+
+
+def is_regression(new, old, threshold, min_delta):
+    return new - old > min_delta and new > old * (1 + threshold)
+
+
+def compare(results, baseline, threshold=THRESHOLD, min_delta=MIN_DELTA):
+    """Returns a list of strings describing the cases and stages whose
+    median time, or peak memory, is worse than that of the baseline.
+    Stages are only compared if the same cases were run."""
+    regressions = []
+    kinds = ["cases"]
+    if set(results["cases"]) == set(baseline["cases"]):
+        kinds.extend(["stages", "causes"])
+    for kind in kinds:
+        for name, values in results[kind].items():
+            old = baseline.get(kind, {}).get(name)
+            if old is None:
+                continue
+            if is_regression(values["p50"], old["p50"], threshold, min_delta):
+                regressions.append(
+                    "{}: median {:.3f} ms, was {:.3f} ms".format(
+                        name, values["p50"] * 1000, old["p50"] * 1000
+                    )
+                )
+            new_peak, old_peak = values.get("peak_memory"), old.get("peak_memory")
+            if new_peak is not None and old_peak is not None:
+                if is_regression(new_peak, old_peak, threshold, MIN_MEMORY_DELTA):
+                    regressions.append(
+                        "{}: peak memory {:.1f} KiB, was {:.1f} KiB".format(
+                            name, new_peak / 1024, old_peak / 1024
+                        )
+                    )
+    return regressions
+
+
+def show_row(name, values, width):
+    times = "".join(
+        "{:>10.3f}".format(values[key] * 1000)
+        for key in ("p50", "p90", "p99", "max")
+    )
+    print(f"{name:<{width}}{times}", end="")
+
+
+def show_results(results, top=20):
+    """Prints the per-stage and per-case timings; only the top
+    slowest cases are shown, or all of them if top is 0."""
+    header = "".join(f"{key:>10}" for key in ("p50", "p90", "p99", "max"))
+    print(f"Python {results['python']}, friendly {results['friendly']}")
+    print(f"{len(results['cases'])} cases, repeated {results['repeat']} times.")
+    print(f"Times are in milliseconds.\n\n{'Stage':<30}{header}{'count':>10}")
+    for name, values in sorted(
+        results["stages"].items(), key=lambda item: -item[1]["p50"]
+    ):
+        show_row(name, values, 30)
+        print("{:>10}".format(values["count"]))
+
+    causes = sorted(results["causes"].items(), key=lambda item: -item[1]["p50"])
+    if top:
+        causes = causes[:top]
+    if causes:
+        width = max(len(name) for name, _ in causes) + 2
+        print(f"\n{'Cause found by':<{width}}{header}{'count':>10}")
+        for name, values in causes:
+            show_row(name, values, width)
+            print("{:>10}".format(values["count"]))
+
+    cases = sorted(results["cases"].items(), key=lambda item: -item[1]["p50"])
+    if top:
+        cases = cases[:top]
+    width = max([len(name) for name, _ in cases] + [4]) + 2
+    print(f"\n{'Case':<{width}}{header}{'peak KiB':>10}")
+    for name, values in cases:
+        show_row(name, values, width)
+        peak = values["peak_memory"]
+        print("{:>10}".format("-" if peak is None else round(peak / 1024)))
+    analyzers = results.get("analyzers")
+    if analyzers:
+        print(f"\n{'Statement analyzers':<50}{'called':>10}{'skipped':>10}")
+        for name, values in sorted(analyzers.items()):
+            print(f"{name:<50}{values['called']:>10}{values['skipped']:>10}")
+    if results["failed"]:
+        print("\nCases that could not be run:")
+        for name in results["failed"]:
+            print("    ", name)
+
+
+parser = argparse.ArgumentParser(
+    prog="python -m friendly.bench",
+    description="Measures the time taken to explain the test corpora.",
+)
+parser.add_argument(
+    "--corpus",
+    choices=sorted(CORPORA),
+    action="append",
+    help="Corpus to run; can be repeated. By default, all of them are run.",
+)
+parser.add_argument(
+    "--repeat", type=int, default=5, help="Number of timed runs of each case."
+)
+parser.add_argument("--select", help="Only run the cases whose name contains this.")
+parser.add_argument("--tests-dir", help="Directory containing the corpora.")
+parser.add_argument("--lang", default="en", help="Language of the explanations.")
+parser.add_argument(
+    "--no-memory", action="store_true", help="Do not measure the peak memory."
+)
+parser.add_argument(
+    "--top",
+    type=int,
+    default=20,
+    help="Number of the slowest cases shown; 0 shows all of them.",
+)
+parser.add_argument("--save", help="File where the results are saved as JSON.")
+parser.add_argument("--baseline", help="JSON file of results to compare with.")
+parser.add_argument(
+    "--threshold",
+    type=float,
+    default=THRESHOLD,
+    help="Relative slowdown considered to be a regression.",
+)
+
+
+def main(argv=None):
+    args = parser.parse_args(argv)
+    set_lang(args.lang)
+    results = run(
+        corpora=args.corpus or sorted(CORPORA),
+        repeat=args.repeat,
+        select=args.select,
+        tests_dir=args.tests_dir,
+        memory=not args.no_memory,
+    )
+    show_results(results, top=args.top)
+    if args.save:
+        with open(args.save, "w", encoding="utf8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline, encoding="utf8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, threshold=args.threshold)
+        if regressions:
+            print("\nRegressions compared with", args.baseline)
+            for regression in regressions:
+                print("    ", regression)
+            return 1
+        print("\nNo regressions compared with", args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
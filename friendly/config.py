@@ -2,12 +2,23 @@
 
 Keeps tabs of all settings.
 """
+import atexit
+import json
+import os
 import sys
+import tempfile
+import threading
+
+from collections.abc import Mapping
 
 from . import core
 from . import debug_helper
+from . import fingerprint
 from . import formatters
+from . import timing
+from .context import AnalysisTimeout, ContextVar, check_deadline, time_budget
 from .my_gettext import current_lang
+from .source_cache import cache
 
 try:  # Making Rich optional; see issue #236
     from . import theme
@@ -27,10 +38,10 @@ def _write_err(text):  # pragma: no cover
         md = theme.friendly_rich.Markdown(
             text, inline_code_lexer="python", code_theme=theme.CURRENT_THEME
         )
-        if formatters.RICH_HEADER:
+        if formatters.RICH_HEADER.get():
             title = "Traceback"
             md = theme.friendly_rich.Panel(md, title=title)
-            formatters.RICH_HEADER = False
+            formatters.RICH_HEADER.set(False)
         session.console.print(md)
     else:
         if not text.endswith("\n"):
@@ -38,13 +49,82 @@ def _write_err(text):  # pragma: no cover
         sys.stderr.write(text)
 
 
+def compact_info(info):
+    """Returns a copy of a traceback info dict containing only
+    the (string) items that can be shown to the user.
+
+    Nothing is computed: only the items already computed are included.
+    """
+    # dict.copy() does not compute any item and, unlike iterating,
+    # is safe even if another thread adds items at the same time.
+    items = dict.copy(info)
+    return {key: value for key, value in items.items() if not key.startswith("_")}
+
+
+def source_filenames(friendly_tb):
+    """Returns the names of the files whose source is used to explain
+    an exception; these sources are pinned in the source cache while
+    the FriendlyTraceback is kept in the history."""
+    tb_data = friendly_tb.tb_data
+    return {tb_data.filename, *(record.filename for record in tb_data.records)}
+
+
+class SpilledInfo(Mapping):
+    """Compact traceback info written in a temporary file.
+
+    Only the message is kept in memory, so that history() does not
+    need to read the file. As the file is shared by all the threads,
+    it is only used while holding a lock.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, spill_file, info):
+        data = json.dumps(info).encode("utf8")
+        with self._lock:
+            spill_file.seek(0, os.SEEK_END)
+            self.offset = spill_file.tell()
+            spill_file.write(data)
+        self.spill_file = spill_file
+        self.size = len(data)
+        self.message = info.get("message", "")
+
+    def load(self):
+        """Reads the full info dict from the file."""
+        with self._lock:
+            self.spill_file.seek(self.offset)
+            data = self.spill_file.read(self.size)
+        return json.loads(data.decode("utf8"))
+
+    def discard(self):
+        """Frees the space used in the file, if this is the last entry written."""
+        with self._lock:
+            self.spill_file.seek(0, os.SEEK_END)
+            if self.spill_file.tell() == self.offset + self.size:
+                self.spill_file.truncate(self.offset)
+
+    def __getitem__(self, key):
+        if key == "message":
+            return self.message
+        return self.load()[key]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+
 class _State:
     """Keeping track of various parameters in a single object meant
     to be instantiated only once.
     """
 
     def __init__(self):
-        self._captured = []
+        # Each thread has its own list of captured output.
+        self._captured = ContextVar("friendly_captured", default=None)
+        self._captured.set([])
+        self._lock = threading.RLock()  # used when changing the history
         self.context = 3
         self.write_err = _write_err
         self.installed = False
@@ -55,6 +135,25 @@ class _State:
         self.use_rich = False
         self.rich_add_vspace = True
         self.friendly = []
+        # Only the most recent entries of friendly and saved_info
+        # keep a reference to the frames; see trim_history().
+        self.history_size = 10
+        self.spill_file = None
+        self._first_kept = 0  # older entries have all been replaced
+        self._formatting = set()  # FriendlyTraceback being explained
+        # If True, references to frames are released as soon as an exception
+        # has been explained; items not computed by then which require them,
+        # such as the cause, are omitted if requested later. They are kept
+        # by default, so that where(), why(), etc. can compute these items
+        # later, possibly in a different language; snapshots, explained by
+        # servers and by the asyncio handler, are always detached.
+        self.detach_frames = False
+        # Maximum time, in seconds, used to analyze an exception; see
+        # set_time_budget().
+        self.time_budget = None
+        # Counts occurrences of errors already explained; see set_aggregation().
+        self.aggregator = fingerprint.Aggregator()
+        self._flush_at_exit = False
         self.include = "explain"
         self.lang = "en"
         self.install_gettext(self.lang)
@@ -78,13 +177,18 @@ class _State:
 
     def capture(self, txt):
         """Captures the output instead of writing to stderr."""
-        self._captured.append(txt)
+        captured = self._captured.get()
+        if captured is None:
+            captured = []
+            self._captured.set(captured)
+        captured.append(txt)
 
     def get_captured(self, flush=True):
         """Returns the result of captured output as a string"""
-        result = "".join(self._captured)
+        captured = self._captured.get() or []
+        result = "".join(captured)
         if flush:
-            self._captured.clear()
+            captured.clear()
         return result
 
     def set_lang(self, lang):
@@ -101,8 +205,135 @@ class _State:
                 debug_helper.log(
                     "Problem: saved_info includes content but friendly doesn't."
                 )
-            self.friendly[-1].recompile_info()
-            self.friendly[-1].info["lang"] = lang
+            if self.friendly[-1] is not None:
+                self.friendly[-1].recompile_info()
+                self.friendly[-1].info["lang"] = lang
+
+    def set_history_size(self, size=10, spill_to_disk=False):
+        """Sets the number of recorded tracebacks for which all the
+        information, including references to the frames, is kept.
+        Older ones are kept in a compact form, either in memory or,
+        if spill_to_disk is True, in a temporary file.
+        """
+        if size < 1:  # pragma: no cover
+            raise ValueError("The history size must be at least 1.")
+        self.history_size = size
+        if spill_to_disk and self.spill_file is None:
+            self.spill_file = tempfile.TemporaryFile()
+        elif not spill_to_disk and self.spill_file is not None:
+            for index, info in enumerate(self.saved_info):
+                if isinstance(info, SpilledInfo):
+                    self.saved_info[index] = info.load()
+            self.spill_file.close()
+            self.spill_file = None
+        self.trim_history()
+
+    def get_history_size(self):
+        return self.history_size
+
+    def trim_history(self):
+        """Replaces all but the most recent history_size entries by
+        their compact version, which only includes the items already
+        computed. The corresponding entries in self.friendly are set to None.
+
+        Entries which are still being explained, possibly by another thread,
+        are replaced by a later call. The compact versions are created
+        without holding the lock and, if the time budget is exceeded,
+        the remaining entries are also replaced by a later call; at least
+        one entry is replaced so that the history does not keep growing.
+        """
+        nb_trimmed = 0
+        while True:
+            if nb_trimmed:
+                try:
+                    check_deadline()
+                except AnalysisTimeout:
+                    return
+            with self._lock:
+                entry = self._next_trimmed_entry()
+            if entry is None:
+                return
+            index, friendly_tb, info = entry
+            friendly_tb.detach()
+            compact = compact_info(info)
+            if self.spill_file is not None:
+                compact = SpilledInfo(self.spill_file, compact)
+            with self._lock:
+                if index < len(self.saved_info) and self.saved_info[index] is info:
+                    self.saved_info[index] = compact
+            nb_trimmed += 1
+
+    def _next_trimmed_entry(self):
+        """Returns the oldest entry to be replaced by trim_history() as
+        a tuple (index, friendly_tb, info), or None. Its FriendlyTraceback
+        is removed from the history so that no other thread replaces it.
+        This must be called while holding the lock."""
+        end = len(self.friendly) - self.history_size
+        self._first_kept = min(self._first_kept, max(end, 0))
+        first_kept = None
+        for index in range(self._first_kept, end):
+            friendly_tb = self.friendly[index]
+            if friendly_tb is None:
+                continue
+            if friendly_tb in self._formatting:
+                if first_kept is None:
+                    first_kept = index
+                continue
+            self.friendly[index] = None
+            cache.unpin(source_filenames(friendly_tb))
+            self._first_kept = index + 1 if first_kept is None else first_kept
+            return index, friendly_tb, self.saved_info[index]
+        self._first_kept = max(end, 0) if first_kept is None else first_kept
+        return None
+
+    def remove_last(self):
+        """Removes the last recorded traceback."""
+        with self._lock:
+            info = self.saved_info.pop()
+            friendly_tb = self.friendly.pop()
+            if friendly_tb is not None:
+                cache.unpin(source_filenames(friendly_tb))
+        if isinstance(info, SpilledInfo):
+            info.discard()
+
+    def set_time_budget(self, seconds=None):
+        """Sets the maximum time used to analyze an exception; if seconds
+        is None, there is no limit. When the limit is reached, the analysis
+        is abandoned: the cause is replaced by a note to that effect,
+        and some other items, such as the values of variables, are omitted.
+        """
+        if seconds is not None and seconds < 0:  # pragma: no cover
+            raise ValueError("The time budget cannot be negative.")
+        self.time_budget = seconds
+
+    def get_time_budget(self):
+        return self.time_budget
+
+    def set_aggregation(self, enabled=True, interval=60):
+        """Enables or disables aggregation: when enabled, only the first
+        occurrence of each error is explained by exception_hook();
+        later occurrences are counted, and a summary of these counts is
+        written when an error occurs at least interval seconds after the
+        previous summary. Counts not yet written are written first, as well
+        as when the program exits.
+        """
+        self.flush_aggregation()
+        self.aggregator.enable(enabled, interval)
+        if enabled and not self._flush_at_exit:
+            atexit.register(self.flush_aggregation)
+            self._flush_at_exit = True
+
+    def flush_aggregation(self, redirect=None):
+        """Writes the number of occurrences of each error counted since
+        the last summary, if any."""
+        _ = current_lang.translate
+        write_err = self.get_writer(redirect)
+        for key, message, count in self.aggregator.flush():
+            write_err(
+                _("{message} [{fingerprint}] seen {count:,} more times.\n").format(
+                    message=message.strip(), fingerprint=key, count=count
+                )
+            )
 
     def install_gettext(self, lang):
         """Sets the current language for gettext."""
@@ -173,14 +404,23 @@ class _State:
 
     def set_redirect(self, redirect=None):
         """Sets where the output is redirected."""
-        if redirect == "capture":
-            self.write_err = self.capture
-        elif redirect is not None:
-            self.write_err = redirect
-        else:
+        if redirect is None:
             self.write_err = _write_err
+        else:
+            self.write_err = self.get_writer(redirect)
 
-    def explain_traceback(self, redirect=None):
+    def get_writer(self, redirect=None):
+        """Returns the function used to write the output, given a value
+        for redirect as used by set_redirect(). If redirect is None, the
+        current session value is used.
+        """
+        if redirect == "capture":
+            return self.capture
+        if redirect is not None:
+            return redirect
+        return self.write_err
+
+    def explain_traceback(self, redirect=None, include=None, lang=None):
         """Replaces a standard traceback by a friendlier one, giving more
         information about a given exception than a standard traceback.
         Note that this excludes SystemExit and KeyboardInterrupt which
@@ -190,16 +430,18 @@ class _State:
         set to be the default by another API call.  However, if
            redirect = some_stream
         is specified, the output goes to that stream, but without changing
-        the global settings.
+        the global settings. The same is true for include and lang.
         """
         _ = current_lang.translate
         etype, value, tb = sys.exc_info()
         if etype is None:
             print(_("Nothing to show: no exception recorded."))
             return
-        self.exception_hook(etype, value, tb, redirect=redirect)
+        self.exception_hook(
+            etype, value, tb, redirect=redirect, include=include, lang=lang
+        )
 
-    def exception_hook(self, etype, value, tb, redirect=None):
+    def exception_hook(self, etype, value, tb, redirect=None, include=None, lang=None):
         """Replaces a standard traceback by a friendlier one,
         except for SystemExit and KeyboardInterrupt which
         are re-raised.
@@ -211,8 +453,14 @@ class _State:
         By default, the output goes to sys.stderr or to some other stream
         set to be the default by another API call.  However, if
            redirect = some_stream
-        is specified, the output goes to that stream for this call,
-        but the session settings is restored afterwards.
+        is specified, the output goes to that stream for this call only.
+        Similarly, values for include and lang can be specified for
+        this call only. These values are not changed for the session,
+        which means that different threads can explain exceptions
+        at the same time using different values.
+
+        If aggregation is enabled, errors which have already been explained
+        are only counted; see set_aggregation().
         """
 
         if etype.__name__ == "SystemExit":  # pragma: no cover
@@ -220,35 +468,101 @@ class _State:
         if etype.__name__ == "KeyboardInterrupt":  # pragma: no cover
             raise KeyboardInterrupt(str(value))
 
-        saved_current_redirect = None
-        if redirect is not None:
-            saved_current_redirect = self.write_err
-            self.set_redirect(redirect=redirect)
-
-        try:
-            self.friendly.append(core.FriendlyTraceback(etype, value, tb))
-            self.friendly[-1].compile_info()
-            info = self.friendly[-1].info
-            info["lang"] = self.lang
-            self.saved_info.append(info)
-            explanation = self.formatter(info, include=self.include)
-        except Exception as e:  # pragma: no cover
-            debug_helper.log("Exception raised in exception_hook().")
+        signature = None
+        if self.aggregator.enabled and not isinstance(tb, str):
             try:
-                debug_helper.log(self.friendly[-1].tb_data.filename)
-            except Exception:  # noqa
-                pass
-            debug_helper.log_error(e)
-            return
-
-        self.write_err(explanation)
+                signature = fingerprint.get_tb_signature(etype, value, tb)
+            except Exception as e:  # pragma: no cover
+                debug_helper.log("Exception raised in get_tb_signature().")
+                debug_helper.log_error(e)
+        if signature is None or not self.aggregator.count(signature):
+            self._explain(
+                lambda: core.FriendlyTraceback(etype, value, tb),
+                redirect=redirect,
+                include=include,
+                lang=lang,
+                signature=signature,
+            )
+        if signature is not None and self.aggregator.is_due():
+            self.flush_aggregation(redirect=redirect)
+
+    def explain_snapshot(self, snapshot, redirect=None, include=None, lang=None):
+        """Like exception_hook(), but for an exception recorded
+        as a TracebackSnapshot, possibly in a different process."""
+        self._explain(
+            lambda: core.FriendlyTraceback.from_snapshot(snapshot),
+            redirect=redirect,
+            include=include,
+            lang=lang,
+            detach=True,
+        )
 
-        # Ensures that we start on a new line; essential for the console
-        if hasattr(explanation, "endswith") and not explanation.endswith("\n"):
-            self.write_err("\n")
+    def _explain(
+        self,
+        create_friendly_tb,
+        redirect=None,
+        include=None,
+        lang=None,
+        signature=None,
+        detach=None,
+    ):
+        """Records and writes the information about an exception,
+        given a function which creates a FriendlyTraceback. If a signature
+        is given, the error is added to those counted by the aggregator.
+        Frames are released once it is explained if detach, which defaults
+        to self.detach_frames, is True."""
+        if detach is None:
+            detach = self.detach_frames
+        write_err = self.get_writer(redirect)
+        if include is None:
+            include = self.include
+        if lang is None:
+            lang = self.lang
+
+        friendly_tb = None
+        with current_lang.temporary(lang):
+            try:
+                friendly_tb = create_friendly_tb()
+                # Items of info are computed on demand by the formatter.
+                info = friendly_tb.info
+                info["lang"] = lang
+                with self._lock:
+                    cache.pin(source_filenames(friendly_tb))
+                    self.friendly.append(friendly_tb)
+                    self.saved_info.append(info)
+                    self._formatting.add(friendly_tb)
+                # Items are computed by the formatter, within the time budget,
+                # which also includes replacing older entries of the history.
+                with time_budget(self.time_budget):
+                    try:
+                        with timing.collect(friendly_tb.timings), timing.stage(
+                            "formatter"
+                        ):
+                            explanation = self.formatter(info, include=include)
+                            if signature is not None:
+                                self.aggregator.add(
+                                    signature, info.get("fingerprint"), info["message"]
+                                )
+                    finally:
+                        with self._lock:
+                            self._formatting.discard(friendly_tb)
+                    if detach:
+                        friendly_tb.detach()
+                    self.trim_history()
+            except Exception as e:  # pragma: no cover
+                debug_helper.log("Exception raised in exception_hook().")
+                try:
+                    debug_helper.log(friendly_tb.tb_data.filename)
+                except Exception:  # noqa
+                    pass
+                debug_helper.log_error(e)
+                return
 
-        if saved_current_redirect is not None:
-            self.set_redirect(redirect=saved_current_redirect)
+        with timing.collect(friendly_tb.timings), timing.stage("output"):
+            write_err(explanation)
+            # Ensures that we start on a new line; essential for the console
+            if hasattr(explanation, "endswith") and not explanation.endswith("\n"):
+                write_err("\n")
 
 
 session = _State()
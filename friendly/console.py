@@ -338,6 +338,7 @@ def start_console(
         friendly.install(include=include, lang=lang)
 
     source_cache.idle_get_lines = None
+    session.detach_frames = False
 
     if local_vars is not None:
         # Make sure we don't overwrite with our own functions
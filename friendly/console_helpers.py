@@ -30,9 +30,9 @@ def back():
         return
     if not session.friendly:  # pragma: no cover
         debug_helper.log("Problem: saved info is not empty but friendly is")
-    session.saved_info.pop()
-    session.friendly.pop()
-    if session.saved_info:
+    session.remove_last()
+    if session.saved_info and session.friendly[-1] is not None:
+        # Older entries, kept in a compact form, cannot be recompiled.
         info = session.saved_info[-1]
         if info["lang"] != friendly.get_lang():
             info["lang"] = friendly.get_lang()
@@ -211,7 +211,7 @@ def _get_exception():  # pragma: no cover
         print("Nothing to show: no exception recorded.")
         return
     info = session.saved_info[-1]
-    return info["_exc_instance"]
+    return info.get("_exc_instance")
 
 
 def _get_frame():  # pragma: no cover
@@ -223,7 +223,7 @@ def _get_frame():  # pragma: no cover
         print("Nothing to show: no exception recorded.")
         return
     info = session.saved_info[-1]
-    return info["_frame"]
+    return info.get("_frame")
 
 
 def _get_statement():  # pragma: no cover
@@ -236,7 +236,7 @@ def _get_statement():  # pragma: no cover
     if not session.saved_info:
         print("Nothing to show: no exception recorded.")
         return
-    if isinstance(session.saved_info[-1]["_exc_instance"], SyntaxError):
+    if isinstance(session.saved_info[-1].get("_exc_instance"), SyntaxError):
         return session.friendly[-1].tb_data.statement
     print("No statement: not a SyntaxError.")
     return
@@ -252,7 +252,7 @@ def _get_tb_data():  # pragma: no cover
         print("Nothing to show: no exception recorded.")
         return
     info = session.saved_info[-1]
-    return info["_tb_data"]
+    return info.get("_tb_data")
 
 
 def _set_debug(flag=True):  # pragma: no cover
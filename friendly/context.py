@@ -0,0 +1,131 @@
+"""context.py
+
+Some values, such as the language used or the items to include, can
+be set for a single explanation. So that many threads or asyncio tasks
+can explain exceptions at the same time, each with its own values,
+these are stored in context variables instead of global variables.
+
+Python 3.6 does not have the contextvars module; in that case, we use
+a replacement based on threading.local, which is sufficient for threads
+but does not distinguish between asyncio tasks.
+"""
+import time
+
+from contextlib import contextmanager
+
+try:
+    from contextvars import ContextVar  # noqa
+except ImportError:  # pragma: no cover
+    import threading
+
+    _MISSING = object()
+
+    class ContextVar:
+        """Minimal replacement for contextvars.ContextVar."""
+
+        def __init__(self, name, *, default=_MISSING):
+            self.name = name
+            self._default = default
+            self._local = threading.local()
+
+        def get(self, *default):
+            value = getattr(self._local, "value", _MISSING)
+            if value is not _MISSING:
+                return value
+            if default:
+                return default[0]
+            if self._default is not _MISSING:
+                return self._default
+            raise LookupError(self)
+
+        def set(self, value):
+            token = getattr(self._local, "value", _MISSING)
+            self._local.value = value
+            return token
+
+        def reset(self, token):
+            if token is _MISSING:
+                del self._local.value
+            else:
+                self._local.value = token
+
+
+@contextmanager
+def temporary_value(var, value):
+    """Sets the value of a context variable for the duration of
+    a ``with`` block, restoring its previous value afterwards.
+    """
+    token = var.set(value)
+    try:
+        yield
+    finally:
+        var.reset(token)
+
+
+# When explaining many exceptions at once, some values that are
+# costly to compute can be reused; they are kept in the following
+# dicts, one per kind of value. Outside of a shared_caches() block,
+# nothing is cached.
+_SHARED_CACHES = ContextVar("friendly_shared_caches", default=None)
+
+
+@contextmanager
+def shared_caches():
+    """Within a ``with`` block, values stored using get_cache() are kept
+    and can be reused by the current thread or asyncio task.
+    """
+    token = _SHARED_CACHES.set({})
+    try:
+        yield
+    finally:
+        _SHARED_CACHES.reset(token)
+
+
+def get_cache(kind):
+    """Returns the dict used to cache values of a given kind,
+    or None if values are not to be cached.
+    """
+    caches = _SHARED_CACHES.get()
+    if caches is None:
+        return None
+    if kind not in caches:
+        caches[kind] = {}
+    return caches[kind]
+
+
+def clear_cache(kind):
+    """Removes all the cached values of a given kind."""
+    caches = _SHARED_CACHES.get()
+    if caches is not None:
+        caches.pop(kind, None)
+
+
+class AnalysisTimeout(BaseException):
+    """Raised when the time allowed to analyze an exception has elapsed.
+    It derives from BaseException so that it is not caught by the
+    ``except Exception`` clauses used by the analyzers.
+    """
+
+
+_DEADLINE = ContextVar("friendly_deadline", default=None)
+
+
+@contextmanager
+def time_budget(seconds=None):
+    """Within a ``with`` block, check_deadline() raises AnalysisTimeout
+    once the given number of seconds has elapsed. If seconds is None,
+    there is no time limit.
+    """
+    if seconds is None:
+        yield
+        return
+    with temporary_value(_DEADLINE, time.perf_counter() + seconds):
+        yield
+
+
+def check_deadline():
+    """Called by analyzers before doing some work which might take
+    a long time; raises AnalysisTimeout if the time budget is exceeded."""
+    deadline = _DEADLINE.get()
+    if deadline is not None and time.perf_counter() > deadline:
+        raise AnalysisTimeout
@@ -7,37 +7,165 @@ they are considered to be internal functions, subject to change at any
 time. If functions defined in friendly.__init__.py do not meet your needs,
 please file an issue.
 """
-import inspect
+import copy
 import os
 import re
 import traceback
+import weakref
 
+from collections import namedtuple
 from itertools import dropwhile
 
 from . import info_generic
 from . import info_specific
 from . import info_variables
 from . import debug_helper
+from . import explanation_cache
+from . import fingerprint
+from . import positions
 from . import source_cache
+from . import timing
 
-from .my_gettext import current_lang
+from .context import AnalysisTimeout
+from .my_gettext import analysis_truncated, current_lang
 
-from .path_info import is_excluded_file, EXCLUDED_FILE_PATH, path_utils
+from .path_info import is_excluded_file, path_utils
 from .runtime_errors import name_error
+from .site_cache import site_cache
 from .source_cache import cache, highlight_source
 from .syntax_errors import analyze_syntax
 from .syntax_errors import indentation_error
 from .syntax_errors import source_info
 from . import token_utils
 
-try:
-    import executing  # noqa
-except ImportError:  # pragma: no cover
-    pass  # ignore errors when processed by Sphinx
-
 
 STR_FAILED = "<exception str() failed>"  # Same as Python
 
+# Same fields as inspect.FrameInfo. The frame is None once it has
+# been released by detach().
+Record = namedtuple("Record", "frame filename lineno function code_context index")
+
+
+# Used to shorten the traceback of a RecursionError.
+MAX_CYCLE_LENGTH = 10
+MIN_REPEATS = 3
+
+
+def get_record(tb):
+    """Returns a Record for a traceback entry, without the lines of
+    source around it, which are only obtained when needed by add_context().
+    """
+    frame = tb.tb_frame
+    code = frame.f_code
+    lineno = tb.tb_lineno
+    if lineno is None:  # pragma: no cover
+        lineno = frame.f_lineno
+    return Record(frame, code.co_filename, lineno, code.co_name, None, None)
+
+
+def get_site_key(tb, bad_line):
+    """Returns a key identifying the instruction being executed in
+    a traceback entry, as well as the source around it, so that values
+    describing the location of an error can be cached; see site_cache.py.
+    """
+    frame = tb.tb_frame
+    code = frame.f_code
+    lineno = tb.tb_lineno or frame.f_lineno
+    begin = max(0, lineno - 1 - cache.context)
+    source = tuple(
+        cache.get_lines(
+            code.co_filename, begin, lineno + cache.context, frame.f_globals
+        )
+    )
+    # A weak reference to the code object, rather than its id, is included
+    # so that a different object reusing its id cannot match the key, while
+    # neither the code object nor the values it refers to are kept alive.
+    return "node", code.co_filename, weakref.ref(code), tb.tb_lasti, source, bad_line
+
+
+def compress_cycles(keys, max_length=MAX_CYCLE_LENGTH, min_repeats=MIN_REPEATS):
+    """Given a list of keys identifying frames, returns a list of tuples
+    (start, length, repeats) covering the entire list in order, such
+    that the keys from start to start + length are repeated ``repeats``
+    times in a row. Keys which are not part of a cycle repeated at least
+    min_repeats times are given with length and repeats equal to 1.
+    """
+    groups = []
+    start = 0
+    while start < len(keys):
+        best_length, best_repeats = 1, 1
+        for length in range(1, max_length + 1):
+            if start + length * min_repeats > len(keys):
+                break
+            cycle = keys[start : start + length]
+            repeats = 1
+            end = start + length
+            while keys[end : end + length] == cycle:
+                repeats += 1
+                end += length
+            if repeats >= min_repeats and repeats * length > best_repeats * best_length:
+                best_length, best_repeats = length, repeats
+        groups.append((start, best_length, best_repeats))
+        start += best_length * best_repeats
+    return groups
+
+
+def format_recursion_tb(etype, value, tb):
+    """Formats a traceback like traceback.format_exception() would, except
+    that cycles of repeated frames are only shown once. The very long
+    traceback of a RecursionError can thus be formatted without having
+    to format each of its frames.
+    """
+    _ = current_lang.translate
+    keys = []
+    while tb is not None:
+        keys.append(get_record(tb)[1:4])
+        tb = tb.tb_next
+    lines = ["Traceback (most recent call last):\n"]
+    for start, length, repeats in compress_cycles(keys):
+        if repeats > 1 and length == 1:
+            lines.append(
+                "  "
+                + _("[The following frame is repeated {repeats} times]").format(
+                    repeats=repeats
+                )
+                + "\n"
+            )
+        elif repeats > 1:
+            lines.append(
+                "  "
+                + _(
+                    "[The following {length} frames are repeated {repeats} times]"
+                ).format(length=length, repeats=repeats)
+                + "\n"
+            )
+        lines.extend(
+            traceback.format_list(
+                [traceback.FrameSummary(*key) for key in keys[start : start + length]]
+            )
+        )
+    lines.extend(traceback.format_exception_only(etype, value))
+    return lines
+
+
+def add_context(record):
+    """Returns a copy of a record including the lines of source around
+    the line where the exception occurred, using the same window
+    as inspect.getinnerframes().
+    """
+    if record.code_context is not None:
+        return record
+    module_globals = None if record.frame is None else record.frame.f_globals
+    lines = cache.get_index(record.filename, module_globals)
+    if not len(lines):
+        return record
+    start = record.lineno - 1 - cache.context // 2
+    start = max(0, min(start, len(lines) - cache.context))
+    return record._replace(
+        code_context=lines[start : start + cache.context],
+        index=record.lineno - 1 - start,
+    )
+
 
 def convert_value_to_message(value):
     """This converts the 'value' of an exception into a string, while
@@ -52,6 +180,26 @@ def convert_value_to_message(value):
     return message
 
 
+def copy_exception(value):
+    """Returns a copy of an exception instance which does not
+    include its traceback; this copy can be used in place of the original
+    once the information about the frames is no longer needed.
+    """
+    try:
+        new_value = copy.copy(value)
+    except Exception:  # noqa
+        debug_helper.log("Could not copy exception value.")
+        return value
+    if isinstance(value, SyntaxError):
+        # Some of these might have been set after the exception was created,
+        # including in get_source_info(), and would not be part of value.args.
+        for attr in ("msg", "filename", "lineno", "offset", "text"):
+            setattr(new_value, attr, getattr(value, attr))
+        for attr in ("end_lineno", "end_offset"):
+            setattr(new_value, attr, getattr(value, attr, None))
+    return new_value
+
+
 class TracebackData:
     """Raw traceback info obtained from Python.
 
@@ -66,16 +214,18 @@ class TracebackData:
 
             etype, value, tb = sys.exc_info()
         """
-        cache.remove("<fstring>")
         self.exception_type = etype
         self.exception_name = etype.__name__
         self.value = value
         self.message = convert_value_to_message(value)
+        self._tb = tb
+        self._formatted_tb = None
+        self._chain_info = None
+        self.detached = False
         if isinstance(tb, str):  # for SyntaxErrors from IDLE hack
-            self.formatted_tb = tb
+            self._formatted_tb = tb
             self.records = []
         else:
-            self.formatted_tb = traceback.format_exception(etype, value, tb)
             self.records = self.get_records(tb)
 
         # The following three attributes get their correct values in get_source_info()
@@ -93,8 +243,23 @@ class TracebackData:
         self.original_bad_line = self.bad_line
         self.program_stopped_node_range = None
 
-        if issubclass(etype, SyntaxError):
-            self.statement = source_info.Statement(self.value, self.bad_line)
+        self._statement = None
+        # For a SyntaxError, name under which its source can be found
+        # in the cache, when it is not self.filename; see snapshot.py.
+        self.source_filename = None
+        if not issubclass(etype, SyntaxError):
+            self.locate_error(tb)
+
+    @property
+    def statement(self):
+        """For SyntaxError and subclasses, the statement where the error
+        occurred; None otherwise. It is only created when first needed,
+        as this requires tokenizing the source.
+        """
+        if self._statement is None and issubclass(self.exception_type, SyntaxError):
+            self._statement = source_info.Statement(
+                self.value, self.bad_line, self.source_filename
+            )
             # Removing extra ending spaces for potentially shorter displays later on
 
             def remove_space(text):
@@ -104,33 +269,89 @@ class TracebackData:
                     return text.rstrip()
                 return text
 
-            self.statement.statement = remove_space(self.statement.statement)
-            self.statement.bad_line = remove_space(self.statement.bad_line)
-        else:
-            self.statement = None
-            self.locate_error(tb)
+            self._statement.statement = remove_space(self._statement.statement)
+            self._statement.bad_line = remove_space(self._statement.bad_line)
+        return self._statement
+
+    @property
+    def formatted_tb(self):
+        """The traceback as formatted by Python. It is only computed
+        when first needed, as it is not required to show most items.
+        """
+        if self._formatted_tb is None:
+            if issubclass(self.exception_type, RecursionError):
+                self._formatted_tb = format_recursion_tb(
+                    self.exception_type, self.value, self._tb
+                )
+            else:
+                self._formatted_tb = traceback.format_exception(
+                    self.exception_type, self.value, self._tb
+                )
+        return self._formatted_tb
+
+    @property
+    def chain_info(self):
+        """Information about exceptions raised while treating other
+        exceptions, formatted like a Python traceback, or an empty string.
+        """
+        if self._chain_info is None:
+            value = self.value
+            if value.__cause__ or value.__context__:
+                self._chain_info = FriendlyTraceback.process_exception_chain(
+                    self.exception_type, value
+                )
+            else:
+                self._chain_info = ""
+        return self._chain_info
 
+    def detach(self):
+        """Removes all references to frames, either directly or through
+        the traceback, keeping only what is needed to format the
+        traceback information again.
+        """
+        if self.detached:
+            return
+        # These need the traceback; we make sure they are computed now.
+        _formatted_tb, _chain_info = self.formatted_tb, self.chain_info
+        self._tb = None
+        self.exception_frame = None
+        self.program_stopped_frame = None
+        self.records = [Record(None, *record[1:]) for record in self.records]
+        self.value = copy_exception(self.value)
+        self.detached = True
+
+    @timing.timed("get_records")
     def get_records(self, tb):
         """Get the traceback frame history, excluding those originating
         from our own code that are included either at the beginning or
         at the end of the traceback.
+
+        Excluded frames are removed before any source is read. Only the
+        first and last records, whose source is shown, include the lines
+        around the line where the exception occurred; see add_context().
         """
-        records = inspect.getinnerframes(tb, cache.context)
+        all_records = []
+        while tb is not None:
+            all_records.append(get_record(tb))
+            tb = tb.tb_next
         records = list(
-            dropwhile(lambda record: is_excluded_file(record.filename), records)
+            dropwhile(lambda record: is_excluded_file(record.filename), all_records)
         )
         records.reverse()
         records = list(
             dropwhile(lambda record: is_excluded_file(record.filename), records)
         )
         records.reverse()
-        if records or issubclass(self.exception_type, SyntaxError):
-            return records
-        # If all the records are removed, it means that all the error
-        # is in our own code - or that of the user who chose to exclude
-        # some files. If so, we make sure to have something to analyze
-        # and help identify the problem.
-        return inspect.getinnerframes(tb, cache.context)  # pragma: no cover
+        if not records and not issubclass(self.exception_type, SyntaxError):
+            # If all the records are removed, it means that all the error
+            # is in our own code - or that of the user who chose to exclude
+            # some files. If so, we make sure to have something to analyze
+            # and help identify the problem.
+            records = all_records  # pragma: no cover
+        if records:
+            records[0] = add_context(records[0])
+            records[-1] = add_context(records[-1])
+        return records
 
     def get_source_info(self):
         """Retrieves the file name and the line of code where the exception
@@ -153,11 +374,10 @@ class TracebackData:
 
             # this can happen with editors_helpers.check_syntax()
             try:
-                self.bad_line = cache.get_source_lines(self.filename)[
-                    self.value.lineno - 1
-                ]
+                self.bad_line = cache.get_line(self.filename, self.value.lineno)
             except Exception:  # noqa
-                self.bad_line = "\n"
+                self.bad_line = ""
+            self.bad_line = self.bad_line or "\n"
             return
 
         if self.records:
@@ -238,18 +458,23 @@ class TracebackData:
             debug_helper.log("Could not locate unknown name.")
 
     @staticmethod
+    @timing.timed("find_node")
     def find_node(tb, bad_line):
         """Finds the 'node', that is the exact part of a line of code
         that is related to the cause of the problem.
+
+        The result is cached, as the same line often raises the same
+        exception many times. Only the position and text of the node are
+        kept, so that the cache does not hold on to the syntax trees of the
+        sources; when they are reused, the node is obtained from its text.
         """
-        try:
-            ex = executing.Source.executing(tb)
-            node = ex.node
-            node_text = ex.text()
-        except Exception as e:  # pragma: no cover
-            debug_helper.log("Exception raised in TracebackData.use_executing.")
-            debug_helper.log(str(e))
-            return
+        key = get_site_key(tb, bad_line)
+        result = site_cache.get(key)
+        if result is not None:
+            has_node, node_range, node_text = result
+            node = positions.parse_node(node_text) if has_node else None
+            return node, node_range, node_text
+        node, node_text = positions.find_node(tb)
         # If we can find the precise location (node) on a line of code
         # causing the exception, we note this location
         # so that we can indicate it later with ^^^^^, something like:
@@ -289,6 +514,7 @@ class TracebackData:
             begin = bad_line.find(node_text)
             end = begin + len(node_text)
             node_range = begin, end
+        site_cache.set(key, (node is not None, node_range, node_text))
         return node, node_range, node_text
 
 
@@ -337,6 +563,185 @@ class TracebackData:
 # b: 2
 
 
+# Items shown to the user, grouped by the FriendlyTraceback method
+# which computes them. A group is only computed when one of its items
+# is requested, typically by a formatter.
+LAZY_ITEMS = {
+    "assign_tracebacks": (
+        "original_python_traceback",
+        "simulated_python_traceback",
+        "shortened_traceback",
+    ),
+    "assign_generic": ("generic",),
+    "assign_location": (
+        "parsing_error",
+        "parsing_error_source",
+        "last_call_header",
+        "last_call_source",
+        "last_call_variables",
+        "exception_raised_header",
+        "exception_raised_source",
+        "exception_raised_variables",
+    ),
+    "assign_cause": ("cause", "suggest", fingerprint.ANALYZER_KEY),
+    "assign_fingerprint": ("fingerprint",),
+}
+
+# Some analyzers used to find the cause look at the simulated traceback.
+LAZY_DEPENDENCIES = {
+    "assign_cause": ("assign_tracebacks",),
+    "assign_fingerprint": ("assign_cause",),
+}
+
+# Items which are kept when frames are released, as they cannot be computed again.
+DETACHED_ITEMS = (
+    "cause",
+    "suggest",
+    fingerprint.ANALYZER_KEY,
+    "exception_raised_variables",
+    "last_call_variables",
+)
+# Detached items which are only used in the language they were computed in.
+TRANSLATED_ITEMS = ("cause", "suggest")
+
+
+class TracebackInfo(dict):
+    """The ``info`` dict of a FriendlyTraceback.
+
+    Items listed in LAZY_ITEMS are computed the first time they are
+    looked up and the result is kept. As is the case for a fully
+    compiled info dict, items whose value would be empty are not included.
+
+    Iterating over this dict, or calling ``keys()``, only includes
+    the items already computed; use ``compile_all()`` first if all
+    items are needed.
+
+    If the explanation cache is enabled, items computed for an identical
+    exception are reused; see explanation_cache.py.
+    """
+
+    def __init__(self, friendly_tb, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.friendly_tb = friendly_tb
+        self.pending = {}
+        self.computed = set()
+        self.reset()
+
+    def reset(self):
+        """Discards all computed items so that they can be computed
+        again, for example using a different language.
+        """
+        self.computed.clear()
+        self.cache_key = None
+        self.cache_checked = False
+        for group, items in LAZY_ITEMS.items():
+            for item in items:
+                super().pop(item, None)
+                self.pending[item] = group
+
+    def compute(self, group):
+        """Computes all the items of a given group, unless this has
+        already been done.
+        """
+        if group in self.computed:
+            return
+        if not self.cache_checked and explanation_cache.explanation_cache.enabled:
+            try:
+                self.use_cached_items()
+            except Exception as e:  # pragma: no cover
+                debug_helper.log("Exception raised in use_cached_items().")
+                debug_helper.log_error(e)
+            if group in self.computed:
+                return
+        self.computed.add(group)
+        for required in LAZY_DEPENDENCIES.get(group, ()):
+            self.compute(required)
+        # Use the language for which the other items have been computed,
+        # which may not be the current language of this thread.
+        lang = super().get("lang")
+        try:
+            with current_lang.temporary(lang), timing.collect(
+                self.friendly_tb.timings
+            ), timing.stage(group):
+                getattr(self.friendly_tb, group)()
+        except AnalysisTimeout:
+            # Items already computed are kept; the others are omitted.
+            debug_helper.log(f"Time budget exceeded in FriendlyTraceback.{group}().")
+            if group == "assign_cause" and not super().get("cause"):
+                with current_lang.temporary(lang):
+                    self["cause"] = analysis_truncated()
+            complete = False
+        except Exception as e:  # pragma: no cover
+            debug_helper.log(f"Exception raised in FriendlyTraceback.{group}().")
+            debug_helper.log_error(e)
+            complete = False
+        else:
+            complete = True
+        for item in LAZY_ITEMS[group]:
+            self.pending.pop(item, None)
+            if super().__contains__(item) and not super().__getitem__(item):
+                del self[item]
+        if complete and self.cache_key is not None:
+            if group in explanation_cache.CACHED_GROUPS:
+                explanation_cache.explanation_cache.add(
+                    self.cache_key,
+                    group,
+                    {item: dict.get(self, item) for item in LAZY_ITEMS[group]},
+                )
+
+    def use_cached_items(self):
+        """Uses the items cached for an identical exception, if any,
+        or records the key under which computed items are cached."""
+        self.cache_checked = True
+        key = explanation_cache.get_key(self.friendly_tb)
+        if key is None:
+            return
+        cached = explanation_cache.explanation_cache.get(key)
+        self.cache_key = key
+        if cached is None:
+            return
+        for group, items in cached.items():
+            if group in self.computed:  # pragma: no cover
+                continue
+            self.computed.add(group)
+            for item, value in items.items():
+                self.pending.pop(item, None)
+                if value:
+                    super().__setitem__(item, value)
+        if "assign_tracebacks" in cached:
+            # Used by some analyzers when the cause is not cached.
+            tb_data = self.friendly_tb.tb_data
+            tb_data.simulated_python_traceback = cached["assign_tracebacks"].get(
+                "simulated_python_traceback", ""
+            )
+
+    def compile_all(self):
+        """Computes all the items that have not been computed yet."""
+        for group in LAZY_ITEMS:
+            self.compute(group)
+
+    def _resolve(self, key):
+        group = self.pending.get(key)
+        if group is not None:
+            self.compute(group)
+
+    def __contains__(self, key):
+        self._resolve(key)
+        return super().__contains__(key)
+
+    def __getitem__(self, key):
+        self._resolve(key)
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        self.pending.pop(key, None)
+        super().__setitem__(key, value)
+
+    def get(self, key, default=None):
+        self._resolve(key)
+        return super().get(key, default)
+
+
 class FriendlyTraceback:
     """Main class for creating a friendly traceback.
 
@@ -344,11 +749,12 @@ class FriendlyTraceback:
     dict called "info". The various keys of that dict are documented
     in the docstrings of the relevant methods.
 
-    To get all possible attributes set up, one needs to call
-    compile_info() after initializing this class. This is done so
-    as to allow third-party users to selectively call only one of
+    The items of "info" are computed on demand: see TracebackInfo.
+    Calling compile_info() computes all of them at once. One can also
+    selectively call only one of
 
     * assign_cause()
+    * assign_fingerprint()
     * assign_generic()
     * assign_location()
 
@@ -371,24 +777,48 @@ class FriendlyTraceback:
             etype, value, tb = sys.exc_info()
 
         The "header" key for the info dict is assigned here."""
-        _ = current_lang.translate
+        self.timings = timing.Timings()
         try:
-            self.tb_data = TracebackData(etype, value, tb)
+            with timing.collect(self.timings), timing.stage("traceback_data"):
+                tb_data = TracebackData(etype, value, tb)
         except Exception as e:  # pragma: no cover
             debug_helper.log("Uncaught exception in TracebackData.")
             debug_helper.log_error(e)
             print("Internal problem in Friendly.")
             print("Please report this issue.")
             raise SystemExit
+        self.set_tb_data(tb_data)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Creates a FriendlyTraceback from a TracebackSnapshot,
+        possibly in a different process than the one where the exception
+        was raised.
+        """
+        friendly_tb = cls.__new__(cls)
+        friendly_tb.timings = timing.Timings()
+        with timing.collect(friendly_tb.timings), timing.stage("traceback_data"):
+            tb_data = snapshot.restore()
+        friendly_tb.set_tb_data(tb_data)
+        return friendly_tb
+
+    def set_tb_data(self, tb_data):
+        """Sets the TracebackData instance from which all the information
+        is obtained and the basic content of the info dict."""
+        _ = current_lang.translate
+        self.tb_data = tb_data
         self.suppressed = ["       ... " + _("More lines not shown.") + " ..."]
-        self.info = {"header": _("Python exception:")}
+        self.info = TracebackInfo(self, header=_("Python exception:"))
+        self.detached_items = {}
+        self.detached_lang = None
+        self.variables_timed_out = False
         self.message = self.assign_message()  # language independent
-        self.assign_tracebacks()
 
         # include some values for debugging purpose in an interactive session
-        self.info["_exc_instance"] = value
+        self.info["_exc_instance"] = self.tb_data.value
         self.info["_frame"] = self.tb_data.exception_frame
         self.info["_tb_data"] = self.tb_data
+        self.info["_timings"] = self.timings
 
     def assign_message(self):
         """Assigns the error message, as the attribute ``message``
@@ -407,14 +837,35 @@ class FriendlyTraceback:
         return self.info["message"]
 
     def compile_info(self):
-        """Compile all info that was not set in __init__."""
-        self.assign_generic()
-        self.assign_location()
-        self.assign_cause()
-        # removing null values
-        to_remove = [key for key in self.info if not self.info[key]]
-        for key in to_remove:
-            del self.info[key]
+        """Compile all info that was not set in __init__.
+
+        This is not required prior to using a formatter, since
+        the items of ``info`` are computed when they are needed.
+        """
+        self.info.compile_all()
+
+    def detach(self):
+        """Releases all the references to frames and to the traceback,
+        so that the memory they use, including that of all local variables,
+        can be reclaimed without waiting for the garbage collector.
+
+        Nothing is computed beforehand: items requiring the frames, such
+        as the cause of exceptions other than SyntaxError and the values
+        of variables, are kept only if they have already been computed.
+        Afterwards, info can still be recompiled in a different language,
+        in which case the cause kept is omitted.
+        """
+        if self.tb_data.detached:
+            return
+        self.detached_items = {
+            item: dict.get(self.info, item)
+            for item in DETACHED_ITEMS
+            if dict.get(self.info, item)
+        }
+        self.detached_lang = dict.get(self.info, "lang")
+        self.tb_data.detach()
+        self.info["_frame"] = None
+        self.info["_exc_instance"] = self.tb_data.value
 
     def recompile_info(self):
         """This is useful if we need to redisplay some information in a
@@ -422,8 +873,8 @@ class FriendlyTraceback:
         """
         _ = current_lang.translate
         self.info["header"] = _("Python exception:")
-        self.assign_tracebacks()
-        self.compile_info()
+        self.suppressed = ["       ... " + _("More lines not shown.") + " ..."]
+        self.info.reset()
 
     def assign_cause(self):
         """Determine the cause of an exception, which is what is returned
@@ -462,6 +913,16 @@ class FriendlyTraceback:
         _ = current_lang.translate
         etype = self.tb_data.exception_type
         value = self.tb_data.value
+        if self.tb_data.detached:
+            # The frames required for the analysis are no longer available.
+            same_lang = self.detached_lang == dict.get(self.info, "lang")
+            for item in ("cause", "suggest", fingerprint.ANALYZER_KEY):
+                if item in TRANSLATED_ITEMS and not same_lang:
+                    continue
+                if item in self.detached_items:
+                    self.info[item] = self.detached_items[item]
+            return
+
         if self.tb_data.filename == "<stdin>":  # pragma: no cover
             self.info["cause"] = cannot_analyze_stdin()
             return
@@ -511,6 +972,18 @@ class FriendlyTraceback:
         cause = analyze_syntax.set_cause_syntax(value, self.tb_data)
         self.info.update(**cause)
 
+    def assign_fingerprint(self):
+        """Assigns a short string identifying the kind of error, which
+        can be used to group identical errors; see fingerprint.py."""
+        tb_data = self.tb_data
+        frames = [record[1:4] for record in tb_data.records]
+        signature = fingerprint.get_signature(
+            tb_data.exception_type, tb_data.value, frames
+        )
+        self.info["fingerprint"] = fingerprint.get_fingerprint(
+            signature, self.info.get(fingerprint.ANALYZER_KEY)
+        )
+
     def assign_generic(self):
         """Assigns the generic information about a given error. This is
         the answer to ``what()`` as in "What is a NameError?"
@@ -544,9 +1017,14 @@ class FriendlyTraceback:
             debug_helper.log("No record in assign_location().")
             return
 
+        # If the time budget is exceeded, the values of variables are
+        # omitted, but the location is still given in full.
+        self.variables_timed_out = False
         self.locate_exception_raised(records[-1])
         if len(records) > 1:
             self.locate_last_call(records[0])
+        if self.variables_timed_out:
+            raise AnalysisTimeout
 
     def locate_exception_raised(self, record):
         """Sets the values of the following attributes which are
@@ -594,9 +1072,7 @@ class FriendlyTraceback:
         else:
             line = partial_source["line"]
 
-        var_info = info_variables.get_var_info(line, frame)
-        if var_info:
-            self.info["exception_raised_variables"] = var_info
+        self.set_variables("exception_raised_variables", line, frame)
 
     def locate_last_call(self, record):
         """Sets the values of the following attributes:
@@ -625,9 +1101,21 @@ class FriendlyTraceback:
         ).format(linenumber=linenumber, filename=filename)
         self.info["last_call_source"] = partial_source["source"]
 
-        var_info = info_variables.get_var_info(partial_source["line"], frame)
+        self.set_variables("last_call_variables", partial_source["line"], frame)
+
+    def set_variables(self, item, line, frame):
+        """Sets an item giving the values of the variables found on a line,
+        unless the time budget is exceeded while evaluating them."""
+        if frame is None:  # released by detach()
+            var_info = self.detached_items.get(item)
+        else:
+            try:
+                var_info = info_variables.get_var_info(line, frame)
+            except AnalysisTimeout:
+                self.variables_timed_out = True
+                return
         if var_info:
-            self.info["last_call_variables"] = var_info
+            self.info[item] = var_info
 
     def locate_parsing_error(self):
         """Sets the values of the attributes:
@@ -671,8 +1159,8 @@ class FriendlyTraceback:
         1. The standard Python traceback, given by Python
         2. A "simulated" Python traceback, which is essentially the same as
            the one given by Python, except that it excludes modules from this
-           project.  In addition, for RecursionError, this traceback is often
-           further shortened, compared with a normal Python traceback.
+           project.  In addition, for RecursionError, repeated cycles of
+           frames are only shown once in both tracebacks.
         3. A potentially shortened traceback, which does not include too much
            output so as not to overwhelm beginners. It also include information
            about the code on any line mentioned.
@@ -710,24 +1198,9 @@ class FriendlyTraceback:
             tb.insert(0, header)
             shortened_tb.insert(0, header)
 
-        if "RecursionError" in python_tb[-1]:
-            tb = []
-            exclude = False
-            for line in python_tb:  # excluding our own code
-                if exclude and line.strip() == "exec(code, self.locals)":
-                    continue
-                exclude = any(filename in line for filename in EXCLUDED_FILE_PATH)
-                if exclude:
-                    continue
-                tb.append(line)
-            if len(tb) > 12:
-                tb = tb[0:4] + self.suppressed + tb[-5:]
-
-        exc = self.tb_data.value
-        chain_info = ""
+        chain_info = self.tb_data.chain_info
         short_chain_info = ""
-        if exc.__cause__ or exc.__context__:
-            chain_info = self.process_exception_chain(self.tb_data.exception_type, exc)
+        if chain_info:
             parts = chain_info.split("\n\n")
             # suppress line
             temp = []
@@ -808,34 +1281,58 @@ class FriendlyTraceback:
         creates a list from which a standard-looking traceback can
         be created.
         """
+        _ = current_lang.translate
+        records = self.tb_data.records
+        if issubclass(self.tb_data.exception_type, RecursionError):
+            groups = compress_cycles([record[1:4] for record in records])
+        else:
+            groups = [(index, 1, 1) for index in range(len(records))]
         result = []
-        for record in self.tb_data.records:
-            frame, filename, linenumber, _func, lines, index = record
-            partial_source = get_partial_source(filename, linenumber, lines, index)
-            result.append(
-                '  File "{}", line {}, in {}'.format(filename, linenumber, _func)
-            )
-            bad_line = partial_source["line"]
-            if bad_line is not None:
-                result.append("    {}".format(bad_line.strip()))
+        for start, length, repeats in groups:
+            if repeats > 1 and length == 1:
+                result.append(
+                    "       ... "
+                    + _("The following frame is repeated {repeats} times.").format(
+                        repeats=repeats
+                    )
+                    + " ..."
+                )
+            elif repeats > 1:
+                result.append(
+                    "       ... "
+                    + _(
+                        "The following {length} frames are repeated {repeats} times."
+                    ).format(length=length, repeats=repeats)
+                    + " ..."
+                )
+            for record in records[start : start + length]:
+                frame, filename, linenumber, _func, lines, index = add_context(record)
+                partial_source = get_partial_source(filename, linenumber, lines, index)
+                result.append(
+                    '  File "{}", line {}, in {}'.format(filename, linenumber, _func)
+                )
+                bad_line = partial_source["line"]
+                if bad_line is not None:
+                    result.append("    {}".format(bad_line.strip()))
 
         if issubclass(self.tb_data.exception_type, SyntaxError):
             value = self.tb_data.value
             offset = value.offset
             filename = value.filename
-            lines = cache.get_source_lines(filename)
             result.append('  File "{}", line {}'.format(filename, value.lineno))
             _line = value.text
             if _line is None:
                 try:
-                    _line = lines[value.lineno - 1]
+                    _line = cache.get_lines(filename, value.lineno - 1, value.lineno)[0]
                 except Exception:  # noqa
                     pass
             if _line is not None:
-                if filename == "<fstring>" and lines == ["\n"]:
+                if filename == "<fstring>":
                     # Before Python 3.9, the traceback included a fake
                     # file for f-strings which only included parts of
-                    # the f-string content.
+                    # the f-string content. We replace any previous content
+                    # instead of removing it first, so that other
+                    # threads never find an empty entry.
                     cache.add(filename, _line)
                 _line = _line.rstrip()
                 bad_line = _line.strip()
@@ -876,6 +1373,8 @@ def get_partial_source(filename, linenumber, lines, index, text_range=None):
             filename, linenumber, text_range=text_range
         )
     elif filename and os.path.abspath(filename):
+        if lines is None:  # inspect could not find the source
+            lines, index = [], 0
         source, line = highlight_source(linenumber, index, lines, text_range=text_range)
         if not source:  # pragma: no cover
             line = ""
@@ -11,10 +11,7 @@ None of these are part of the public API.
 If you make use of any other function here, please file an issue so
 it can be determined if it should be added to the public API.
 """
-import sys
-
 from .source_cache import cache
-from .my_gettext import current_lang
 from .config import session
 
 
@@ -41,22 +38,13 @@ def check_syntax(
     over the ``source`` argument.
 
     Two additional named arguments, ``include`` and ``lang``, can be
-    provided to temporarily set the values to be used during this function
-    call. The original values are restored at the end.
-
-    If friendly exception hook has not been set up prior
-    to calling check_syntax, it will only be used for the duration
-    of this function call.
+    provided to specify the values to be used during this function
+    call. The session settings are not changed.
 
     Returns a tuple containing a code object and a filename if no exception
     has been raised, False otherwise.
 
     """
-    _ = current_lang.translate
-
-    saved_except_hook, saved_include = _save_settings()
-    saved_lang = _temp_set_lang(lang)
-
     if path is not None:
         try:
             with open(path, encoding="utf8") as f:
@@ -65,27 +53,16 @@ def check_syntax(
         except Exception:  # noqa
             # Do not show the Python traceback which would include
             #  the call to open() in the traceback
-            if include is None:
-                session.set_include("no_tb")
-            else:
-                session.set_include(include)
-            session.explain_traceback()
-            _reset(saved_except_hook, saved_lang, saved_include)
+            session.explain_traceback(include=include or "no_tb", lang=lang)
             return False
 
     cache.add(filename, source)
     try:
         code = compile(source, filename, "exec")
     except Exception:  # noqa
-        if include is None:
-            session.set_include("explain")  # our default
-        else:
-            session.set_include(include)
-        session.explain_traceback()
-        _reset(saved_except_hook, saved_lang, saved_include)
+        session.explain_traceback(include=include or "explain", lang=lang)
         return ""
 
-    _reset(saved_except_hook, saved_lang, saved_include)
     return code
 
 
@@ -103,65 +80,17 @@ def exec_code(*, source=None, path=None, include=None, lang=None):
     over the ``source`` argument.
 
     Two additional named arguments, ``include`` and ``lang``, can be
-    provided to temporarily set the values to be used during this function
-    call. The original values are restored at the end.
-
-    If friendly exception hook has not been set up prior
-    to calling check_syntax, it will only be used for the duration
-    of this function call.
+    provided to specify the values to be used during this function
+    call. The session settings are not changed.
     """
     code = check_syntax(source=source, path=path, include=include, lang=lang)
     if not code:
         return {}
 
-    saved_except_hook, saved_include = _save_settings()
-    saved_lang = _temp_set_lang(lang)
-
     module_globals = {"__name__": "__main__"}
     try:
         exec(code, module_globals)
     except Exception:  # noqa
-        if include is None:
-            session.set_include("explain")  # our default
-        else:
-            session.set_include(include)
-        session.explain_traceback()
-        _reset(saved_except_hook, saved_lang, saved_include)
-        return module_globals
-
-    _reset(saved_except_hook, saved_lang, saved_include)
-    return module_globals
-
-
-def _temp_set_lang(lang):
-    """If lang is not none, temporarily set session.lang to the provided
-    value. Keep track of the original lang setting and return it.
+        session.explain_traceback(include=include or "explain", lang=lang)
 
-    A value of None for saved_lang indicates that no resetting will
-    be required.
-    """
-    saved_lang = None
-    if lang is not None:
-        saved_lang = session.lang
-        if saved_lang != lang:
-            session.install_gettext(lang)
-        else:
-            saved_lang = None
-    return saved_lang
-
-
-def _save_settings():
-    current_except_hook = sys.excepthook
-    current_include = session.include
-
-    return current_except_hook, current_include
-
-
-def _reset(saved_except_hook, saved_lang, saved_include):
-    """Resets both include and lang to their original values"""
-    if saved_lang is not None:
-        session.install_gettext(saved_lang)
-    session.set_include(saved_include)
-    # set_include(0) restores sys.excepthook to sys.__excepthook__
-    # which might not be what is wanted. So, we reset sys.excepthook last
-    sys.excepthook = saved_except_hook
+    return module_globals
@@ -0,0 +1,120 @@
+"""explanation_cache.py
+
+When the same exception, with the same message, is raised many times
+at the same location, as is often the case in batch jobs, its explanation
+is usually the same every time. If enabled, using
+``friendly.set_explanation_cache_size()``, the items of the info dict
+whose computation is the most time consuming, namely the tracebacks,
+the generic explanation and the cause, are reused for such exceptions.
+
+The items giving the location of the exception, including the values
+of the variables, are always computed; they are not part of the key used
+to find cached items, so that nothing needs to be computed to find them.
+As a result, the cause is reused even if some runtime values on which it
+depends, such as the length of a sequence or the names defined when
+a NameError is raised, are different; this is why this cache is not
+enabled by default.
+"""
+import threading
+
+from .site_cache import LRUCache
+from .source_cache import cache
+
+# Groups of items, as defined in core.LAZY_ITEMS, which are cached.
+CACHED_GROUPS = ("assign_tracebacks", "assign_generic", "assign_cause")
+
+
+class ExplanationCache:
+    """Cache of the items of info dicts, with hit and miss statistics."""
+
+    def __init__(self, maxsize=0):
+        self.values = LRUCache(maxsize=maxsize)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.values.maxsize > 0
+
+    def set_size(self, size):
+        """Sets the maximum number of explanations kept; 0 disables
+        the cache. Cached explanations and statistics are cleared."""
+        self.values = LRUCache(maxsize=size)
+        self.clear()
+
+    def clear(self):
+        self.values.clear()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def get_stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.values),
+            "maxsize": self.values.maxsize,
+        }
+
+    def get(self, key):
+        """Returns a dict {group: {item: value}} of the cached items, or
+        None, updating the statistics."""
+        groups = self.values.get(key)
+        with self._lock:
+            if groups is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return groups
+
+    def add(self, key, group, items):
+        """Adds the items of a group which has just been computed.
+
+        Cached dicts are never modified, since they can be used by
+        other threads: a new dict replaces them.
+        """
+        with self._lock:
+            groups = dict(self.values.get(key) or {})
+            groups[group] = items
+            self.values.set(key, groups)
+
+
+explanation_cache = ExplanationCache()
+
+
+def get_key(friendly_tb):
+    """Returns a key identifying an exception, the location where it was
+    raised, the content of the sources involved, and the language used;
+    returns None if the explanation should not be cached.
+
+    No item of the info dict is computed.
+    """
+    tb_data = friendly_tb.tb_data
+    value = tb_data.value
+    if (
+        tb_data.detached
+        or isinstance(tb_data._formatted_tb, str)
+        or value.__cause__ is not None
+        or value.__context__ is not None
+    ):
+        return None
+    info = friendly_tb.info
+    frames = tuple(record[1:4] for record in tb_data.records)
+    # The analysis can make use of the entire source of these files.
+    filenames = {tb_data.filename, *(record.filename for record in tb_data.records)}
+    if tb_data.source_filename is not None:
+        filenames.add(tb_data.source_filename)
+    sources = tuple(
+        (filename, cache.get_content_key(filename)) for filename in sorted(filenames)
+    )
+    etype = tb_data.exception_type
+    return (
+        "explanation",
+        tb_data.filename,
+        etype.__module__,
+        etype.__qualname__,
+        dict.get(info, "message"),
+        dict.get(info, "lang"),
+        frames,
+        sources,
+    )
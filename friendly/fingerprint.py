@@ -0,0 +1,158 @@
+"""fingerprint.py
+
+A fingerprint is a short string identifying a kind of error, so that
+identical errors can be grouped, for example by a service collecting
+the exceptions raised by many programs. It is available as
+``info["fingerprint"]`` and is computed from:
+
+* the type of the exception;
+* its message, in which numbers and addresses are replaced by
+  placeholders, so that "index 3" and "index 5" give the same result;
+* the file names and function names of the frames of the traceback,
+  excluding friendly's own; line numbers are not included so that
+  fingerprints do not change when unrelated lines are edited;
+* the line of code where the exception was raised;
+* the name of the function which found the cause.
+
+When a program raises the same errors at a high rate, explaining each
+of them would be too costly. If aggregation is enabled, using
+``friendly.set_aggregation()``, only the first occurrence of an error
+is explained; later occurrences are only counted, which does not require
+any analysis, and summaries giving the number of occurrences of each
+error are written periodically.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+
+from .path_info import is_excluded_file
+from .source_cache import cache
+
+# Item of the cause dict, and of info, giving the name of the analyzer
+# which found the cause.
+ANALYZER_KEY = "_analyzer"
+ADDRESS_PATTERN = re.compile(r"0x[0-9a-fA-F]+")
+NUMBER_PATTERN = re.compile(r"\d+")
+
+
+def record_analyzer(cause, func):
+    """Records in a non-empty cause dict the name of the function which
+    found it, unless it has been recorded by a function called by func."""
+    if cause and ANALYZER_KEY not in cause:
+        cause[ANALYZER_KEY] = f"{func.__module__}.{func.__name__}"
+    return cause
+
+
+def normalize_message(message):
+    message = ADDRESS_PATTERN.sub("0x?", message)
+    return NUMBER_PATTERN.sub("N", message)
+
+
+def get_signature(etype, value, frames):
+    """Returns a tuple identifying an error, given its type, the exception
+    and a list of (filename, lineno, function name) for each frame of
+    its traceback, starting with the outermost one.
+
+    Frames from excluded files are removed as in TracebackData.get_records()
+    so that the same result is obtained from a traceback or from records.
+    """
+    kept = frames
+    while kept and is_excluded_file(kept[0][0]):
+        kept = kept[1:]
+    while kept and is_excluded_file(kept[-1][0]):
+        kept = kept[:-1]
+    if not kept and not issubclass(etype, SyntaxError):
+        kept = frames
+    if isinstance(value, SyntaxError):
+        message = str(value.msg)
+        line = f"{os.path.basename(str(value.filename))}:{value.text or ''}"
+    else:
+        try:
+            message = str(value)
+        except Exception:  # noqa
+            message = ""
+        line = ""
+        if kept:
+            filename, lineno = kept[-1][0], kept[-1][1]
+            if lineno is not None:
+                line = cache.get_line(filename, lineno)
+    return (
+        f"{etype.__module__}.{etype.__qualname__}",
+        normalize_message(message),
+        tuple((os.path.basename(filename), name) for filename, _, name in kept),
+        line.strip(),
+    )
+
+
+def get_tb_signature(etype, value, tb):
+    """Returns the signature of an exception given its traceback;
+    this is much faster than creating a FriendlyTraceback."""
+    frames = []
+    while tb is not None:
+        code = tb.tb_frame.f_code
+        frames.append((code.co_filename, tb.tb_lineno, code.co_name))
+        tb = tb.tb_next
+    return get_signature(etype, value, frames)
+
+
+def get_fingerprint(signature, analyzer=""):
+    """Returns the fingerprint, as 16 hexadecimal digits, of an error
+    given its signature and the name of the analyzer which found its cause."""
+    data = repr(signature + (analyzer or "",)).encode("utf8")
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+class Aggregator:
+    """Keeps track of the errors already explained, identified by
+    their signature, and counts their later occurrences."""
+
+    def __init__(self):
+        self.enabled = False
+        self.interval = 60
+        self.fingerprints = {}  # {signature: (fingerprint, message)}
+        self.counts = {}  # {signature: occurrences not yet summarized}
+        self.last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True, interval=60):
+        """Enables or disables aggregation; summaries are due every
+        interval seconds. Known errors and counts are cleared."""
+        if interval <= 0:
+            raise ValueError("The interval must be positive.")
+        with self._lock:
+            self.enabled = enabled
+            self.interval = interval
+            self.fingerprints.clear()
+            self.counts.clear()
+            self.last_flush = time.monotonic()
+
+    def count(self, signature):
+        """Returns True, counting an occurrence, if an error with that
+        signature has already been explained."""
+        with self._lock:
+            if signature not in self.fingerprints:
+                return False
+            self.counts[signature] = self.counts.get(signature, 0) + 1
+            return True
+
+    def add(self, signature, fingerprint, message):
+        """Records an error which has been fully explained."""
+        with self._lock:
+            self.fingerprints[signature] = (fingerprint, message)
+
+    def is_due(self):
+        return time.monotonic() - self.last_flush >= self.interval
+
+    def flush(self):
+        """Returns a list of (fingerprint, message, count) for the errors
+        which occurred since the last flush, and resets these counts."""
+        with self._lock:
+            summaries = [
+                self.fingerprints[signature] + (count,)
+                for signature, count in self.counts.items()
+            ]
+            self.counts.clear()
+            self.last_flush = time.monotonic()
+        return summaries
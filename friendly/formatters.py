@@ -43,6 +43,7 @@ This module currently contains 6 formatters:
     with some modification, with the end result intended to be printed
     in colour in a console using Rich (https://github.com/willmcgugan/rich).
 """
+from .context import ContextVar
 from .my_gettext import current_lang
 from . import debug_helper
 
@@ -62,7 +63,8 @@ try:  # pragma: no cover
 except ImportError:
     pass
 
-RICH_HEADER = False
+# Set by rich_markdown() when a header is to be added by config._write_err().
+RICH_HEADER = ContextVar("RICH_HEADER", default=False)
 
 # The following is the order in which the various items, if they exist
 # and have been selected to be printed, would be printed.
@@ -290,8 +292,7 @@ def rich_markdown(info, include="friendly_tb"):  # pragma: no cover
 
 def _markdown(info, include, rich=False, documentation=False):  # pragma: no cover
     """Traceback formatted with with markdown syntax."""
-    global RICH_HEADER
-    RICH_HEADER = False
+    RICH_HEADER.set(False)
 
     markdown_items = {
         "header": ("# ", ""),
@@ -318,7 +319,7 @@ def _markdown(info, include, rich=False, documentation=False):  # pragma: no cov
     result = [""]
     for item in items_to_show:
         if rich and item == "header":  # Skip it here; handled by session.py
-            RICH_HEADER = True
+            RICH_HEADER.set(True)
             continue
         if item in info and info[item].strip():
             # With normal markdown formatting, it does not make sense to have a
@@ -362,6 +363,11 @@ def no_result(info, include):
 
         return _("I have no suggestion to offer.")
 
+    if "message" in info:
+        # Older entries of the history only include the items computed
+        # before they were replaced by their compact version.
+        return info["message"]
+
     debug_helper.log(
         f"Internal error: include = {include} in formatters.no_result()"
     )  # pragma: no cover
@@ -128,6 +128,8 @@ def install_in_idle_shell(lang="en"):
     source_cache.idle_get_lines = get_lines
 
     friendly.install(include="friendly_tb", redirect=idle_writer, lang=lang)
+    # Frames are kept so that where(), why(), etc. can be used later.
+    session.detach_frames = False
     linecache.idle_showsyntaxerror = sys.excepthook
     # Current limitation
     idle_writer("                                WARNING\n", "ERROR")  # noqa
@@ -8,12 +8,15 @@ import re
 
 
 from . import debug_helper
+from . import fingerprint
+from . import timing
 from .my_gettext import current_lang, internal_error
 
 
 get_cause = {}
 
 
+@timing.timed("get_likely_cause")
 def get_likely_cause(etype, value, frame, tb_data):
     """Gets the likely cause of a given exception based on some information
     specific to a given exception.
@@ -21,7 +24,9 @@ def get_likely_cause(etype, value, frame, tb_data):
     _ = current_lang.translate
     try:
         if etype.__name__ in get_cause:
-            return get_cause[etype.__name__](value, frame, tb_data)
+            function = get_cause[etype.__name__]
+            cause = function(value, frame, tb_data)
+            return fingerprint.record_analyzer(cause, function)
     except Exception as e:  # noqa  # pragma: no cover
         debug_helper.log("Exception caught in get_likely_cause().")
         debug_helper.log_error(e)
@@ -30,7 +35,9 @@ def get_likely_cause(etype, value, frame, tb_data):
     try:
         # see if it could be the result of using socket, or urllib, urllib3, etc.
         if issubclass(etype, OSError):
-            return get_cause["OSError"](value, frame, tb_data)
+            function = get_cause["OSError"]
+            cause = function(value, frame, tb_data)
+            return fingerprint.record_analyzer(cause, function)
     except Exception:  # noqa  # pragma: no cover
         pass
 
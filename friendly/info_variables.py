@@ -8,8 +8,11 @@ import builtins
 import sys
 
 from . import utils
+from . import timing
 from . import token_utils
 
+from .context import check_deadline, get_cache
+from .site_cache import memoize
 from .path_info import path_utils
 from .my_gettext import current_lang
 
@@ -44,6 +47,30 @@ def convert_type(short_form):
     return forms.get(short_form, short_form)
 
 
+def builtin_names():
+    """Returns dir(builtins); when explaining many exceptions, the
+    result is reused.
+    """
+    cache = get_cache("builtins")
+    if cache is None:
+        return dir(builtins)
+    if "names" not in cache:
+        cache["names"] = dir(builtins)
+    return cache["names"]
+
+
+@memoize("line_tokens")
+def get_line_tokens(line):
+    """Returns an ASTTokens object for a line of code, or None if it
+    cannot be parsed. ASTTokens objects are reused for identical lines;
+    they are not modified afterwards.
+    """
+    try:
+        return ASTTokens(line, parse=True)
+    except SyntaxError:  # this should not happen
+        return None
+
+
 def get_all_objects(line, frame):
     """Given a (partial) line of code and a frame,
     obtains a dict containing all the relevant information about objects
@@ -77,6 +104,7 @@ def get_all_objects(line, frame):
 
     tokens = token_utils.get_significant_tokens(line)
     for tok in tokens:
+        check_deadline()
         if tok.is_identifier():
             name = tok.string
             if name in names:
@@ -89,22 +117,19 @@ def get_all_objects(line, frame):
                     objects["name, obj"].append((name, obj))
                     break
             else:
-                if name in dir(builtins):
+                if name in builtin_names():
                     names.add(name)
                     obj = getattr(builtins, name)
                     objects["builtins"].append((name, repr(obj), obj))
                     objects["name, obj"].append((name, obj))
 
-    try:
-        atok = ASTTokens(line, parse=True)
-    except SyntaxError:  # this should not happen
-        return objects
-
+    atok = get_line_tokens(line)
     if atok is not None:
         evaluator = Evaluator.from_frame(frame)
         for nodes, obj in group_expressions(
             pair for pair in evaluator.find_expressions(atok.tree)
         ):
+            check_deadline()
             name = atok.get_text(nodes[0])
             if name in names:
                 continue
@@ -150,7 +175,7 @@ def get_object_from_name(name, frame):
     if name in frame.f_globals:
         return frame.f_globals[name]
 
-    if name in dir(builtins):  # Do this last
+    if name in builtin_names():  # Do this last
         return getattr(builtins, name)
     return None
 
@@ -190,6 +215,7 @@ def get_definition_scope(variable_name, frame):
     return scopes
 
 
+@timing.timed("get_var_info")
 def get_var_info(line, frame):
     """Given a frame object, it obtains the value (repr) of the names
     found in the logical line (which may span many lines in the file)
@@ -330,7 +356,7 @@ def get_similar_names(name, frame):
     # so as to treat them on an equal footing.
     locals_ = list(frame.f_locals.keys())
     globals_ = list(frame.f_globals.keys())
-    builtins_ = dir(builtins)
+    builtins_ = builtin_names()
     all_similar = utils.get_similar_words(name, locals_ + globals_ + builtins_)
     similar["locals"] = []
     similar["globals"] = []
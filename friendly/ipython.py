@@ -49,6 +49,7 @@ shell.InteractiveShell.showsyntaxerror = (
 
 exclude_file_from_traceback(shell.__file__)
 exclude_file_from_traceback(compilerop.__file__)
+session.detach_frames = False
 install(include="friendly_tb")
 
 set_formatter("dark")  # noqa
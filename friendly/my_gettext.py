@@ -23,18 +23,38 @@ gettext.translation() is the class-based API for gettext.
 import gettext
 import os
 
+from contextlib import contextmanager
+
 from . import debug_helper
+from .context import ContextVar, temporary_value
+
+
+def _no_translation(text):
+    return text
 
 
 class LangState:
-    def __init__(self):
-        self._translate = lambda text: text
-        self.lang = "en"
+    """Keeps track of the language used for translations.
 
-    def install(self, lang=None):
-        """Sets the language to be used for translations"""
+    The language set using install() is used everywhere, unless
+    a different one has been chosen for the current thread or asyncio
+    task by using ``temporary()``.
+    """
+
+    def __init__(self):
+        self._default = ("en", _no_translation)
+        self._translations = {}
+        self._override = ContextVar("friendly_lang", default=None)
+
+    def get_translation(self, lang=None):
+        """Returns a tuple (lang, gettext function) for the language
+        requested or, if it is not available, the closest match.
+        """
         if lang is None:
             lang = "en"
+        if lang in self._translations:
+            return self._translations[lang]
+        requested = lang
         try:
             # We first look for the exact language requested.
             _lang = gettext.translation(
@@ -60,15 +80,36 @@ class LangState:
                 # the source file will be used if the requested language
                 # is not available.
             )
-        self.lang = lang
-        self._translate = _lang.gettext
+        self._translations[requested] = lang, _lang.gettext
+        return self._translations[requested]
+
+    def install(self, lang=None):
+        """Sets the language to be used for translations"""
+        self._default = self.get_translation(lang)
+
+    @contextmanager
+    def temporary(self, lang=None):
+        """Sets the language to be used for translations in the current
+        thread or asyncio task for the duration of a ``with`` block.
+        If lang is None, the current language is used.
+        """
+        if lang is None:
+            yield
+            return
+        with temporary_value(self._override, self.get_translation(lang)):
+            yield
+
+    @property
+    def lang(self):
+        return (self._override.get() or self._default)[0]
 
     def translate(self, text):
-        translation = self._translate(text)
-        if self.lang == "en":
+        lang, _translate = self._override.get() or self._default
+        translation = _translate(text)
+        if lang == "en":
             return translation
         if translation == text:  # pragma: no cover
-            debug_helper.log(f"Potentially untranslated text for {self.lang}:")
+            debug_helper.log(f"Potentially untranslated text for {lang}:")
             debug_helper.log(text)
         return translation
 
@@ -103,6 +144,14 @@ def no_information():
     )
 
 
+def analysis_truncated():
+    _ = current_lang.translate
+    return _(
+        "The analysis of this exception was stopped\n"
+        "since it was taking too much time.\n"
+    )
+
+
 def internal_error(e):
     _ = current_lang.translate
     debug_helper.log("--> Internal error: " + repr(e))
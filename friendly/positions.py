@@ -0,0 +1,129 @@
+"""positions.py
+
+Finds the part of the source that was being executed when an exception
+was raised, that is the 'node' that is highlighted with ^^^^.
+
+Since Python 3.11, code objects include the exact position of each
+instruction, which can be obtained at almost no cost. Otherwise, we use
+executing which, on its first use for a given file, needs to parse
+the entire file and to match the bytecode of its functions with their AST.
+
+The position of an instruction does not always correspond to the node
+that executing would find; for example, for an unpacking assignment,
+only the targets are included. Therefore, native positions are only used
+for the instructions listed in NODE_TYPES, and if the source at that
+position is an expression of the expected type; the node is then
+obtained by parsing this source only.
+"""
+import ast
+import dis
+import itertools
+
+from . import debug_helper
+from .source_cache import cache
+
+try:
+    import executing  # noqa
+except ImportError:  # pragma: no cover
+    pass  # ignore errors when processed by Sphinx
+
+# Can be set to False to always use executing, for example to compare
+# the time required by each method; see tests/bench_positions.py
+use_native = True
+
+# Expected node types for the instructions whose position is used.
+NODE_TYPES = {
+    "BINARY_OP": (ast.BinOp, ast.Subscript),
+    "BINARY_SUBSCR": ast.Subscript,
+    "CALL": ast.Call,
+    "CALL_FUNCTION_EX": ast.Call,
+    "COMPARE_OP": ast.Compare,
+    "CONTAINS_OP": ast.Compare,
+    "LOAD_ATTR": ast.Attribute,
+    "LOAD_METHOD": ast.Attribute,
+    "UNARY_INVERT": ast.UnaryOp,
+    "UNARY_NEGATIVE": ast.UnaryOp,
+    "UNARY_NOT": ast.UnaryOp,
+    "UNARY_POSITIVE": ast.UnaryOp,
+}
+
+
+def get_native_node_text(tb):
+    """Returns the source of the instruction being executed in a traceback
+    entry, using the position information available in Python 3.11+,
+    as well as the name of that instruction. Returns None if this
+    information is not available.
+    """
+    code = tb.tb_frame.f_code
+    if not use_native or not hasattr(code, "co_positions") or tb.tb_lasti < 0:
+        return None
+    positions = next(
+        itertools.islice(code.co_positions(), tb.tb_lasti // 2, None), None
+    )
+    if positions is None or None in positions:
+        return None
+    lineno, end_lineno, col_offset, end_col_offset = positions
+    if lineno < 1:
+        return None
+    lines = cache.get_lines(
+        code.co_filename, lineno - 1, end_lineno, tb.tb_frame.f_globals
+    )
+    if len(lines) != end_lineno - lineno + 1:
+        return None
+    # Column offsets are given in bytes of the UTF-8 encoded source.
+    lines = [line.encode("utf8") for line in lines]
+    lines[-1] = lines[-1][:end_col_offset]
+    lines[0] = lines[0][col_offset:]
+    text = b"".join(lines).decode("utf8", errors="replace")
+    return text, dis.opname[code.co_code[tb.tb_lasti]]
+
+
+def get_native_node(tb):
+    """Returns the node being executed in a traceback entry, as well as its
+    source, if it can be found using native positions; otherwise,
+    returns None.
+    """
+    result = get_native_node_text(tb)
+    if result is None:
+        return None
+    text, opname = result
+    if opname not in NODE_TYPES:
+        return None
+    try:
+        # The source might span many lines, within brackets.
+        node = ast.parse("(" + text + ")", mode="eval").body
+    except SyntaxError:
+        return None
+    if not isinstance(node, NODE_TYPES[opname]):
+        return None
+    return node, text
+
+
+def parse_node(text):
+    """Returns a node for the expression found in text, or None. Such a node
+    can be used when only its content, and not its exact position in the
+    file, is required by the analysis."""
+    try:
+        return ast.parse(text.strip(), mode="eval").body
+    except SyntaxError:
+        return None
+
+
+def get_executing_node(tb):
+    """Returns the node being executed in a traceback entry, as well
+    as its source, as found by executing. The node might be None.
+    """
+    try:
+        ex = executing.Source.executing(tb)
+        return ex.node, ex.text()
+    except Exception as e:  # pragma: no cover
+        debug_helper.log("Exception raised in positions.get_executing_node.")
+        debug_helper.log(str(e))
+        return None, ""
+
+
+def find_node(tb):
+    """Returns the node being executed in a traceback entry, and its source,
+    using native positions if possible, and executing otherwise.
+    """
+    return get_native_node(tb) or get_executing_node(tb)
@@ -1,5 +1,6 @@
 import ast
 
+from ..context import check_deadline
 from ..my_gettext import current_lang, please_report
 from .. import info_variables
 from .. import utils
@@ -166,10 +167,19 @@ def analyze_missing_key(key, frame, bad_line):
     return {"cause": begin_cause}
 
 
+def any_key_as_string(key, obj):
+    """Returns True if the string representation of a key of obj is key."""
+    for index, k in enumerate(obj.keys()):
+        if index % 1000 == 0:
+            check_deadline()
+        if str(k) == key:
+            return True
+    return False
+
+
 def key_is_a_string(key, dict_name, obj):
     _ = current_lang.translate
-    keys = [str(k) for k in obj.keys()]
-    if key in keys:
+    if any_key_as_string(key, obj):
         additional = _(
             "`{key}` is a string.\n"
             "There is a key of `{name}` whose string representation\n"
@@ -278,11 +278,9 @@ def bad_operand_type_for_unary(message, _frame, tb_data):
     # The user might have written something like "=+" instead of
     # "+="
     operator = match.group(1)
-    index = token_utils.find_substring_index(
-        tb_data.original_bad_line, tb_data.bad_line
-    )
+    tokens = token_utils.get_significant_tokens(tb_data.original_bad_line)
+    index = token_utils.find_substring_index(tokens, tb_data.bad_line)
     if index > 0:
-        tokens = token_utils.get_significant_tokens(tb_data.original_bad_line)
         if (
             tokens[index - 1] == "="
             and tokens[index - 1].end_col == tokens[index].start_col
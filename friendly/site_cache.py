@@ -0,0 +1,87 @@
+"""site_cache.py
+
+When grading programs or processing data in a loop, the same line of
+code often raises the same exception many times. Some values describing
+the location of the error, such as the part of the line highlighted
+with ^^^^, the formatted source around that line, or the tokens of that
+line, are then the same every time. These values are kept in a cache
+holding the most recently used ones, shared by all threads.
+
+Keys always include the source from which a value is computed, so that
+a value is never reused if the source has changed. In addition, all
+values for a file are removed when its source is replaced using
+source_cache.cache.add(), for example by the friendly console.
+"""
+import functools
+import threading
+
+from collections import OrderedDict
+
+MAXSIZE = 1000
+_MISSING = object()
+
+
+class LRUCache:
+    """Cache keeping at most maxsize values, discarding the least
+    recently used ones first. Keys are tuples whose first item is
+    the kind of value and, for values computed from a file, whose
+    second item is the file name.
+    """
+
+    def __init__(self, maxsize=MAXSIZE):
+        self.maxsize = maxsize
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._values.move_to_end(key)
+            except KeyError:
+                return default
+            return self._values[key]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            while len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+
+    def invalidate(self, filename):
+        """Removes all the values computed from the source of a file."""
+        with self._lock:
+            for key in [key for key in self._values if key[1:2] == (filename,)]:
+                del self._values[key]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+site_cache = LRUCache()
+
+
+def memoize(kind):
+    """Decorator caching the values returned by a function whose result
+    only depends on its arguments, which must be hashable; these values
+    must not be modified by the callers."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = (kind, args)
+            value = site_cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = func(*args)
+                site_cache.set(key, value)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,403 @@
+"""snapshot.py
+
+A TracebackSnapshot contains all the information about an exception
+needed to explain it, without any reference to frames or to the
+traceback. It can be pickled, so that the explanation can be obtained
+at a later time, or in a different process, using
+FriendlyTraceback.from_snapshot().
+
+Instead of frames, a snapshot includes the local and global variables
+of the frames used in the analysis. Values that can be safely copied,
+such as numbers, strings and small containers of such values, are kept
+as they are. Modules, as well as functions and classes defined at the
+top level of a module, are replaced by references which are imported
+again when the snapshot is restored. All other objects are replaced by
+stand-ins having the same type name and representation and, for objects
+which are shown, giving the same names of attributes with dir().
+
+As is the case for any pickled data, and since modules are imported
+when a snapshot is restored, snapshots should only be obtained
+from trusted sources.
+"""
+import builtins
+import hashlib
+import importlib
+import re
+import types
+
+from . import core
+from . import positions
+from .source_cache import cache
+
+MAX_LENGTH = 1000  # for strings and bytes kept as they are
+MAX_ITEMS = 20  # for containers kept as they are
+MAX_REPR = 200
+MAX_NAMES = 200  # for the names of attributes recorded for stand-ins
+
+SIMPLE_TYPES = (
+    type(None),
+    bool,
+    int,
+    float,
+    complex,
+    str,
+    bytes,
+    range,
+    type(Ellipsis),
+)
+CONTAINER_TYPES = (list, tuple, set, frozenset, dict)
+REFERENCE_TYPES = (
+    type,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+)
+
+# Attributes of exceptions which are not always included in their args.
+EXCEPTION_ATTRIBUTES = (
+    "name",
+    "obj",
+    "path",
+    "msg",
+    "filename",
+    "lineno",
+    "offset",
+    "text",
+    "end_lineno",
+    "end_offset",
+)
+
+# Attributes of TracebackData giving the location of the error.
+LOCATION_ATTRIBUTES = (
+    "filename",
+    "bad_line",
+    "original_bad_line",
+    "program_stopped_bad_line",
+    "node_text",
+    "node_range",
+    "program_stopped_node_range",
+)
+
+
+def bounded_repr(obj):
+    """Returns repr(obj), truncated if needed."""
+    try:
+        text = repr(obj)
+    except Exception:  # noqa
+        text = "<{} object>".format(type(obj).__name__)
+    if len(text) > MAX_REPR:
+        text = text[: MAX_REPR - 3] + "..."
+    return text
+
+
+def attribute_names(obj):
+    """Returns the names given by dir(obj), at most MAX_NAMES of them;
+    names of special attributes are the first ones left out."""
+    try:
+        names = [name for name in dir(obj) if isinstance(name, str)]
+    except Exception:  # noqa
+        return []
+    if len(names) > MAX_NAMES:
+        names = sorted(names, key=lambda name: name.startswith("__"))[:MAX_NAMES]
+    return names
+
+
+class ObjectRepr:
+    """Records the type and representation of an object which is
+    not included in a snapshot, as well as the names of its attributes."""
+
+    def __init__(self, obj, with_repr=True):
+        self.type_name = type(obj).__name__
+        if with_repr:
+            self.repr = bounded_repr(obj)
+            self.names = attribute_names(obj)
+        else:
+            self.repr = f"<{self.type_name} object>"
+            self.names = []
+
+    def load(self):
+        """Returns a stand-in for the original object."""
+        return get_stand_in_class(self.type_name)(self.repr, self.names)
+
+
+class StandIn:
+    """Base class for the stand-ins of objects not included in a snapshot.
+
+    dir() gives the names of attributes of the original object, but
+    none of these attributes, nor those used by the stand-in itself,
+    can be obtained.
+    """
+
+    def __init__(self, text, names=()):
+        object.__setattr__(self, "_stand_in", (text, list(names)))
+
+    def __getattribute__(self, name):
+        if name == "_stand_in":
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        return object.__getattribute__(self, name)
+
+    def __repr__(self):
+        return object.__getattribute__(self, "_stand_in")[0]
+
+    def __dir__(self):
+        return list(object.__getattribute__(self, "_stand_in")[1])
+
+
+_stand_in_classes = {}
+
+
+def get_stand_in_class(type_name):
+    """Returns a StandIn subclass whose name is type_name."""
+    if type_name not in _stand_in_classes:
+        _stand_in_classes[type_name] = type(type_name, (StandIn,), {})
+    return _stand_in_classes[type_name]
+
+
+class Reference:
+    """Records the name of a module or of an object defined at the top
+    level of a module, so that it can be imported again."""
+
+    def __init__(self, obj):
+        self.type_name = type(obj).__name__
+        if isinstance(obj, types.ModuleType):
+            self.module, self.qualname = obj.__name__, None
+        else:
+            self.module, self.qualname = obj.__module__, obj.__qualname__
+
+    @staticmethod
+    def can_refer_to(obj):
+        """Returns True if obj can be imported again by name."""
+        if isinstance(obj, types.ModuleType):
+            return isinstance(getattr(obj, "__name__", None), str)
+        module = getattr(obj, "__module__", None)
+        qualname = getattr(obj, "__qualname__", None)
+        return (
+            isinstance(module, str)
+            and isinstance(qualname, str)
+            and module != "__main__"
+            and "<" not in qualname
+        )
+
+    def load(self):
+        """Returns the object referred to or, if it cannot be imported,
+        a stand-in."""
+        try:
+            obj = importlib.import_module(self.module)
+            if self.qualname is not None:
+                for name in self.qualname.split("."):
+                    obj = getattr(obj, name)
+            return obj
+        except Exception:  # noqa
+            if self.qualname is None:
+                text = f"<module '{self.module}'>"
+            else:
+                text = f"<{self.type_name} {self.module}.{self.qualname}>"
+            return get_stand_in_class(self.type_name)(text)
+
+
+def to_portable(obj, depth=0, with_repr=True):
+    """Returns a value that can be included in a snapshot in place of obj.
+    Since calling repr() can be time consuming, with_repr should be False
+    for objects whose representation is not going to be shown.
+    """
+    obj_type = type(obj)
+    if obj_type in SIMPLE_TYPES:
+        if obj_type in (str, bytes) and len(obj) > MAX_LENGTH:
+            return ObjectRepr(obj, with_repr)
+        return obj
+    if obj_type in CONTAINER_TYPES and depth < 2 and len(obj) <= MAX_ITEMS:
+        if obj_type is dict:
+            return {
+                to_portable(key, depth + 1, with_repr): to_portable(
+                    value, depth + 1, with_repr
+                )
+                for key, value in obj.items()
+            }
+        return obj_type(to_portable(item, depth + 1, with_repr) for item in obj)
+    if isinstance(obj, (types.ModuleType, *REFERENCE_TYPES)):
+        if Reference.can_refer_to(obj):
+            return Reference(obj)
+    return ObjectRepr(obj, with_repr)
+
+
+def from_portable(obj):
+    """Does the reverse of to_portable()."""
+    if isinstance(obj, (ObjectRepr, Reference)):
+        return obj.load()
+    obj_type = type(obj)
+    if obj_type is dict:
+        return {
+            from_portable(key): from_portable(value) for key, value in obj.items()
+        }
+    if obj_type in CONTAINER_TYPES:
+        return obj_type(from_portable(item) for item in obj)
+    return obj
+
+
+def portable_namespace(namespace, shown_names):
+    """Returns a copy of the locals or globals of a frame, omitting
+    most special names. The representation of objects is only
+    included for names in shown_names."""
+    return {
+        name: to_portable(value, with_repr=name in shown_names)
+        for name, value in namespace.items()
+        if not name.startswith("__") or name in ("__name__", "__file__")
+    }
+
+
+class FrameSnapshot:
+    """Used in place of a frame; it has the attributes of frames needed
+    in the analysis of exceptions. Since only a single frame is included,
+    f_back is always None."""
+
+    f_back = None
+
+    def __init__(self, f_locals, f_globals):
+        self.f_locals = f_locals
+        self.f_globals = f_globals
+
+    @property
+    def f_builtins(self):
+        return builtins.__dict__
+
+
+def restore_exception_type(etype_ref, base_names):
+    """Returns the exception class or, if it cannot be imported, a
+    subclass of its closest builtin base class, with the same name."""
+    etype = etype_ref.load()
+    if isinstance(etype, type) and issubclass(etype, BaseException):
+        return etype
+    for name in base_names:
+        base = getattr(builtins, name, None)
+        if isinstance(base, type) and issubclass(base, BaseException):
+            break
+    else:  # pragma: no cover
+        base = Exception
+    return type(etype_ref.qualname.split(".")[-1], (base,), {})
+
+
+class TracebackSnapshot:
+    """Information about an exception, without references to frames,
+    which can be pickled."""
+
+    def __init__(self, etype, value, tb):
+        """Arguments are those obtained via::
+
+        etype, value, tb = sys.exc_info()
+        """
+        tb_data = core.TracebackData(etype, value, tb)
+        self.exception_type = Reference(etype)
+        self.exception_bases = [
+            cls.__name__ for cls in etype.__mro__ if cls.__module__ == "builtins"
+        ]
+        self.args = to_portable(tuple(value.args))
+        self.attributes = {}
+        for attr in EXCEPTION_ATTRIBUTES:
+            if hasattr(value, attr):
+                self.attributes[attr] = to_portable(getattr(value, attr))
+        self.message = tb_data.message
+        self.formatted_tb = tb_data.formatted_tb
+        self.chain_info = tb_data.chain_info
+
+        for name in LOCATION_ATTRIBUTES:
+            setattr(self, name, getattr(tb_data, name))
+        self.has_node = tb_data.node is not None
+
+        # Frames are replaced by their role; the same dict of globals
+        # is usually shared by many frames, and is only converted once.
+        # Only the objects whose names appear on the lines where the error
+        # occurred are shown; the others are only used by their names or
+        # types, for example to find similar names.
+        shown_names = set()
+        for line in (
+            tb_data.bad_line,
+            tb_data.original_bad_line,
+            tb_data.program_stopped_bad_line,
+        ):
+            shown_names.update(re.findall(r"\w+", line))
+        namespaces = {}
+
+        def convert(namespace):
+            if id(namespace) not in namespaces:
+                namespaces[id(namespace)] = portable_namespace(namespace, shown_names)
+            return namespaces[id(namespace)]
+
+        self.frames = {}
+        for role in ("exception_frame", "program_stopped_frame"):
+            frame = getattr(tb_data, role)
+            if frame is not None:
+                self.frames[role] = convert(frame.f_locals), convert(frame.f_globals)
+        self.records = []
+        for record in tb_data.records:
+            # The source might not be available when the snapshot is restored.
+            record = core.add_context(record)
+            if record.frame is tb_data.exception_frame:
+                role = "exception_frame"
+            elif record.frame is tb_data.program_stopped_frame:
+                role = "program_stopped_frame"
+            else:
+                role = None
+            self.records.append((role, *record[1:]))
+
+        # The analysis of a SyntaxError requires the entire source; for
+        # other exceptions, the context included in the records is enough.
+        self.source = None
+        if issubclass(etype, SyntaxError):
+            self.source = "".join(cache.get_source_lines(self.filename)[:-1])
+
+    def restore(self):
+        """Returns a TracebackData instance from which a FriendlyTraceback
+        can be created."""
+        # If the file has changed, the source is added to the cache under
+        # a name of its own, so that the file is still shown as it is.
+        source_filename = None
+        if self.source is not None:
+            lines = cache.get_source_lines(self.filename)[:-1]
+            if "".join(lines) != self.source:
+                digest = hashlib.sha1(self.source.encode("utf8", "replace"))
+                source_filename = "<snapshot-{}: {}>".format(
+                    digest.hexdigest()[:16], self.filename
+                )
+                cache.add(source_filename, self.source)
+
+        etype = restore_exception_type(self.exception_type, self.exception_bases)
+        args = from_portable(self.args)
+        try:
+            value = etype.__new__(etype, *args)
+            value.args = args
+        except Exception:  # noqa
+            value = etype.__new__(etype)
+            value.args = (self.message,)
+        for attr, attr_value in self.attributes.items():
+            try:
+                setattr(value, attr, from_portable(attr_value))
+            except Exception:  # noqa
+                pass
+
+        frames = {
+            role: FrameSnapshot(from_portable(f_locals), from_portable(f_globals))
+            for role, (f_locals, f_globals) in self.frames.items()
+        }
+        tb_data = core.TracebackData.__new__(core.TracebackData)
+        tb_data.exception_type = etype
+        tb_data.exception_name = etype.__name__
+        tb_data.value = value
+        tb_data.message = self.message
+        tb_data._tb = None
+        tb_data._formatted_tb = self.formatted_tb
+        tb_data._chain_info = self.chain_info
+        tb_data._statement = None
+        tb_data.source_filename = source_filename
+        tb_data.detached = False
+        tb_data.records = [
+            core.Record(frames.get(role), *rest) for role, *rest in self.records
+        ]
+        tb_data.exception_frame = frames.get("exception_frame")
+        tb_data.program_stopped_frame = frames.get("program_stopped_frame")
+        for name in LOCATION_ATTRIBUTES:
+            setattr(tb_data, name, getattr(self, name))
+        tb_data.node = None
+        if self.has_node and self.node_text.strip():
+            tb_data.node = positions.parse_node(self.node_text)
+        return tb_data
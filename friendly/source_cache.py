@@ -3,24 +3,242 @@
 Used to cache and retrieve source code.
 This is especially useful when a custom REPL is used.
 
-Note that we monkeypatch Python's linecache.getlines.
+Sources for fake filenames, like <friendly-console:42>, are also made
+available to Python's linecache by adding them to linecache.cache
+without a modification time. Linecache never attempts to validate such
+entries against a file on disk, so that they can be retrieved by
+linecache.getlines(), as used by the traceback and inspect modules,
+without linecache itself having to be modified. Sources added for
+true files are given the size and modification time of the file,
+so that they are discarded when the file is modified.
+
+Since a new source can be added for every REPL entry, or every call
+to check_syntax() by an editor, the number of sources kept, and the
+memory they use, are limited; the least recently used sources are
+discarded first. Sources of files referenced by the tracebacks kept
+in the session history are "pinned" and never discarded.
 """
 
+import bisect
 import linecache
-import time
+import mmap
+import os
+import re
+import sys
+import threading
+import tokenize
 
+from array import array
+from collections import OrderedDict
 
-old_getlines = linecache.getlines
+from .site_cache import memoize, site_cache
 
 idle_get_lines = None
 
+MAX_ENTRIES = 1000
+MAX_BYTES = 64 * 1024 * 1024
+# Files at least that large are not read entirely, but only indexed
+# using mmap; their lines are read when needed. See FileLines.
+MMAP_THRESHOLD = 256 * 1024
+BLOCK_SIZE = 16 * 1024
+MAX_INDEXES = 100
+
+
+def get_file_info(filename):
+    """Returns the size and modification time of a file, as recorded
+    by linecache, or (None, None) if there is no such file."""
+    if filename.startswith("<"):
+        return None, None
+    try:
+        stat = os.stat(filename)
+    except (OSError, ValueError):
+        return None, None
+    return stat.st_size, stat.st_mtime
+
+
+def get_memory_size(lines):
+    """Returns the approximate number of bytes used by a list of lines."""
+    return sys.getsizeof(lines) + sum(sys.getsizeof(line) for line in lines)
+
+
+class FileLines:
+    """Sequence of the lines of a large file, which are read only when
+    needed. The file is not decoded nor split into lines: using mmap,
+    only the number of lines in each block of BLOCK_SIZE bytes is
+    counted, so that the offset of a given line can be found quickly."""
+
+    def __init__(self, filename, size, mtime, encoding, line_counts, is_empty):
+        self.filename = filename
+        self.size = size
+        self.mtime = mtime
+        self.encoding = encoding
+        # Number of lines ending before the beginning of each block;
+        # the last item is the total number of lines.
+        self.line_counts = line_counts
+        self.nb_lines = line_counts[-1]
+        self.is_empty = is_empty
+
+    @classmethod
+    def from_file(cls, filename, size, mtime):
+        """Returns an instance for a file, or None if the file cannot
+        be read as such."""
+        try:
+            with open(filename, "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as data:
+                # With universal newlines, as used by linecache, a single
+                # "\r" also ends a line; these rare files are read entirely.
+                if data.find(b"\r") != -1 and re.search(rb"\r(?!\n)", data):
+                    return None
+                encoding = tokenize.detect_encoding(data.readline)[0]
+                if not "\n".encode(encoding).endswith(b"\n"):
+                    return None  # not compatible with ASCII, like UTF-16
+                line_counts = array("q", [0])
+                nb_lines = 0
+                for start in range(0, len(data), BLOCK_SIZE):
+                    nb_lines += data[start : start + BLOCK_SIZE].count(b"\n")
+                    line_counts.append(nb_lines)
+                if len(data) and data[-1:] != b"\n":
+                    line_counts[-1] += 1  # last line without a newline
+                is_empty = re.search(rb"\S", data) is None
+        except (OSError, SyntaxError, ValueError):
+            return None
+        return cls(filename, size, mtime, encoding, line_counts, is_empty)
+
+    def is_valid(self):
+        return get_file_info(self.filename) == (self.size, self.mtime)
+
+    def find_line(self, data, lineno):
+        """Returns the offset of the beginning of a line, starting at 0."""
+        if lineno >= self.nb_lines:
+            return len(data)
+        block = bisect.bisect_left(self.line_counts, lineno) - 1
+        if block < 0:
+            return 0
+        position = block * BLOCK_SIZE
+        for _ in range(lineno - self.line_counts[block]):
+            position = data.find(b"\n", position) + 1
+        return position
+
+    def read(self, start, stop):
+        """Returns the lines from start to stop, as found by linecache."""
+        if start >= stop:
+            return []
+        with open(self.filename, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            begin = self.find_line(data, start)
+            text = data[begin : self.find_line(data, stop)]
+        text = text.decode(self.encoding, errors="replace").replace("\r\n", "\n")
+        lines = text.split("\n")
+        if not lines[-1]:
+            lines.pop()
+        return [line + "\n" for line in lines]
+
+    def __len__(self):
+        return self.nb_lines
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:  # pragma: no cover
+                return self.read(0, len(self))[item]
+            return self.read(start, stop)
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("line index out of range")
+        return self.read(item, item + 1)[0]
+
+    def __iter__(self):
+        return iter(self.read(0, len(self)))
+
+
+class LineIndex:
+    """Read-only sequence of the lines of a source, each ending with a
+    newline character, which is either a list, as stored by linecache,
+    or a FileLines instance for large files.
+
+    Whether the source only contains whitespace, and a key identifying
+    its content, are computed once.
+    """
+
+    def __init__(self, lines):
+        self.lines = lines
+        self._is_empty = None
+        self._content_key = None
+
+    def is_valid(self, filename):
+        """Returns True if the lines are those of the current source."""
+        entry = linecache.cache.get(filename)
+        if isinstance(self.lines, FileLines):
+            return entry is None and self.lines.is_valid()
+        return entry is not None and entry[2] is self.lines
+
+    @property
+    def is_empty(self):
+        if self._is_empty is None:
+            if isinstance(self.lines, FileLines):
+                self._is_empty = self.lines.is_empty
+            else:
+                self._is_empty = not any(line.strip() for line in self.lines)
+        return self._is_empty
+
+    @property
+    def content_key(self):
+        """A value which differs for sources with a different content."""
+        if self._content_key is None:
+            if isinstance(self.lines, FileLines):
+                self._content_key = self.lines.size, self.lines.mtime
+            else:
+                self._content_key = len(self.lines), hash("".join(self.lines))
+        return self._content_key
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __getitem__(self, item):
+        return self.lines[item]
+
+    def __iter__(self):
+        return iter(self.lines)
+
 
 class Cache:
     """Class used to store source of files and similar objects"""
 
-    def __init__(self):
-        self.cache = {}
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.cache = OrderedDict()  # {filename: lines}, least recently used first
+        self.sizes = {}  # {filename: bytes used}
+        self.mtimes = {}  # {filename: modification time or None}
+        self.pinned = {}  # {filename: number of tracebacks using the source}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions = 0
         self.context = 4
+        self.indexes = OrderedDict()  # {filename: LineIndex}
+        self._lock = threading.RLock()
+
+    def set_size(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        """Sets the maximum number of sources kept, and the maximum memory
+        they use, discarding the least recently used ones if needed."""
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+            self.evict()
+
+    def get_stats(self):
+        """Returns a dict describing the content of the cache."""
+        with self._lock:
+            return {
+                "entries": len(self.cache),
+                "bytes": self.total_bytes,
+                "pinned": sum(1 for filename in self.cache if filename in self.pinned),
+                "evictions": self.evictions,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
 
     def add(self, filename, source):
         """Adds a source (received as a string) corresponding to a filename
@@ -35,46 +253,186 @@ class Cache:
         # which does not have a startswith() method used below
         filename = str(filename)
         lines = [line + "\n" for line in source.splitlines()]
-        entry = (len(source), time.time(), lines, filename)
-        if not filename.startswith("<"):
-            # Linecache never allows retrieving of such values,
-            # so it is pointless to attempt to store them there.
-            linecache.cache[filename] = entry
-        self.cache[filename] = lines
+        size, mtime = get_file_info(filename)
+        with self._lock:
+            self._discard(filename)
+            self.cache[filename] = lines
+            self.sizes[filename] = get_memory_size(lines)
+            self.mtimes[filename] = mtime
+            self.total_bytes += self.sizes[filename]
+            self.add_to_linecache(filename, lines, size, mtime)
+            self.evict(keep=filename)
+        site_cache.invalidate(filename)
+
+    @staticmethod
+    def add_to_linecache(filename, lines, size=None, mtime=None):
+        """Makes the content of a file available to linecache.
+
+        An entry with a modification time of None is never invalidated
+        by linecache.checkcache(); this is what we want for fake filenames.
+        Otherwise, the size and modification time must be those of the
+        file, so that the entry is discarded when the file is modified.
+        """
+        if mtime is None:
+            size = sum(len(line) for line in lines)
+        linecache.cache[filename] = (size, mtime, lines, filename)
+
+    def _discard(self, filename):
+        """Removes an entry from the cache, as well as from linecache if
+        it is the one that we added."""
+        self.indexes.pop(filename, None)
+        lines = self.cache.pop(filename, None)
+        if lines is None:
+            return
+        self.total_bytes -= self.sizes.pop(filename)
+        del self.mtimes[filename]
+        entry = linecache.cache.get(filename)
+        if entry is not None and entry[2] is lines:
+            del linecache.cache[filename]
+
+    def evict(self, keep=None):
+        """Discards the least recently used sources which are not pinned
+        until the limits are respected, if possible."""
+        with self._lock:
+            if (
+                len(self.cache) <= self.max_entries
+                and self.total_bytes <= self.max_bytes
+            ):
+                return
+            for filename in list(self.cache):
+                if filename == keep or filename in self.pinned:
+                    continue
+                self._discard(filename)
+                self.evictions += 1
+                site_cache.invalidate(filename)
+                if (
+                    len(self.cache) <= self.max_entries
+                    and self.total_bytes <= self.max_bytes
+                ):
+                    return
+
+    def pin(self, filenames):
+        """Prevents the sources of some files from being discarded,
+        until unpin() is called for these files."""
+        with self._lock:
+            for filename in filenames:
+                self.pinned[filename] = self.pinned.get(filename, 0) + 1
+
+    def unpin(self, filenames):
+        with self._lock:
+            for filename in filenames:
+                count = self.pinned.get(filename, 0) - 1
+                if count > 0:
+                    self.pinned[filename] = count
+                else:
+                    self.pinned.pop(filename, None)
+            self.evict()
 
     def remove(self, filename):
         """Removes an entry from the cache if it can be found."""
-        if filename in self.cache:
-            del self.cache[filename]
-        if filename in linecache.cache:
-            del linecache.cache[filename]
+        with self._lock:
+            self._discard(filename)
+        linecache.cache.pop(filename, None)
+        site_cache.invalidate(filename)
 
-    def get_source_lines(self, filename, module_globals=None):
-        """Given a filename, returns the corresponding source, either
-        from the cache or from actually opening the file.
+    def get_index(self, filename, module_globals=None):
+        """Returns a LineIndex giving access to the lines of a source,
+        either from the cache, from linecache or from the file itself.
 
         If the filename corresponds to a true file, and the last time
         it was modified differs from the recorded value, a fresh copy
         is retrieved.
-
-        The contents is stored as a string and returned as a list of lines,
-        each line ending with a newline character.
         """
         if idle_get_lines is not None:  # pragma: no cover
-            lines = idle_get_lines(filename, None)  # noqa
+            return LineIndex(idle_get_lines(filename, None))  # noqa
+        if filename in self.cache:
+            self._check_entry(filename)
+        with self._lock:
+            index = self.indexes.get(filename)
+            if index is not None and index.is_valid(filename):
+                self.indexes.move_to_end(filename)
+                return index
+        entry = linecache.cache.get(filename)
+        if entry is not None:
+            lines = entry[2]
+        elif filename in self.cache:
+            with self._lock:
+                lines = self.cache.get(filename, [])
+                if lines:
+                    # linecache.clearcache() might have been called.
+                    self.add_to_linecache(filename, lines, *get_file_info(filename))
         else:
-            lines = old_getlines(filename, module_globals=module_globals)
-            if not lines and filename in self.cache:
-                lines = self.cache[filename]
-        lines.append("\n")  # required when dealing with EOF errors
+            lines = None
+            size, mtime = get_file_info(filename)
+            if size is not None and size >= MMAP_THRESHOLD:
+                lines = FileLines.from_file(filename, size, mtime)
+            if lines is None:
+                lines = linecache.getlines(filename, module_globals=module_globals)
+        index = LineIndex(lines)
+        with self._lock:
+            self.indexes[filename] = index
+            while len(self.indexes) > MAX_INDEXES:
+                self.indexes.popitem(last=False)
+        return index
+
+    def get_source_lines(self, filename, module_globals=None):
+        """Given a filename, returns the corresponding source as a list
+        of lines, each line ending with a newline character, followed by
+        an extra empty line.
+
+        The list returned is a new one; the lists stored by linecache,
+        which may be shared with other programs, are never modified.
+        Use get_lines() when only a few lines are needed.
+        """
+        index = self.get_index(filename, module_globals)
+        return [*index, "\n"]  # required when dealing with EOF errors
+
+    def get_lines(self, filename, start, stop, module_globals=None):
+        """Returns get_source_lines(filename)[start:stop], for
+        0 <= start <= stop, reading only the lines needed."""
+        index = self.get_index(filename, module_globals)
+        lines = index[start:stop]
+        if start <= len(index) < stop:
+            lines.append("\n")
         return lines
 
+    def get_line(self, filename, lineno, module_globals=None):
+        """Returns the line of a source with a given number, starting
+        at 1, or an empty string if there is no such line."""
+        index = self.get_index(filename, module_globals)
+        if 0 < lineno <= len(index):
+            return index[lineno - 1]
+        return ""
+
+    def get_content_key(self, filename):
+        """Returns a value identifying the content of a source, which is
+        only computed again when the source changes."""
+        return self.get_index(filename).content_key
+
+    def is_empty(self, filename):
+        """Returns True if a source is not available or only includes
+        whitespace."""
+        return self.get_index(filename).is_empty
+
+    def _check_entry(self, filename):
+        """Marks an entry as recently used, removing it if it was added
+        for a true file which has been modified since."""
+        with self._lock:
+            if filename not in self.cache:
+                return
+            self.cache.move_to_end(filename)
+            mtime = self.mtimes[filename]
+            if mtime is None or get_file_info(filename)[1] == mtime:
+                return
+            self._discard(filename)
+        linecache.cache.pop(filename, None)
+        site_cache.invalidate(filename)
+
     def get_formatted_partial_source(self, filename, linenumber, text_range=None):
         """Formats a few lines around a 'bad line', and returns
         the formatted source as well as the content of the 'bad line'.
         """
-        lines = self.get_source_lines(filename)
-        if not lines or not "".join(lines).strip():
+        if self.is_empty(filename):
             return "", ""
 
         begin = max(0, linenumber - self.context)
@@ -83,7 +441,7 @@ class Cache:
             linenumber - begin - 1,
             # it is useful to show at least one more line when a statement
             # continues beyond the current line.
-            lines[begin : linenumber + 1],
+            self.get_lines(filename, begin, linenumber + 1),
             text_range=text_range,
         )
         return partial_source, bad_line
@@ -91,15 +449,15 @@ class Cache:
 
 cache = Cache()
 
-# Monkeypatch linecache to make our own cached content available to Python.
-linecache.getlines = cache.get_source_lines
-
 
 def highlight_source(linenumber, index, lines, text_range=None):
     """Extracts a few relevant lines from a file content given as a list
     of lines, adding line number information and identifying
     a particular line.
 
+    Since the same source is often shown for many exceptions, the
+    results are cached; see site_cache.py.
+
     When dealing with a ``SyntaxError`` or its subclasses, offset is an
     integer normally used by Python to indicate the position of
     the error with a ``^``, like::
@@ -110,7 +468,13 @@ def highlight_source(linenumber, index, lines, text_range=None):
     which, in this case, points to a missing colon. We use the same
     representation in this case.
     """
+    if text_range is not None:
+        text_range = tuple(text_range)
+    return _highlight_source(linenumber, index, tuple(lines), text_range)
+
 
+@memoize("highlight_source")
+def _highlight_source(linenumber, index, lines, text_range):
     # The weird index arithmetic below is based on the information returned
     # by Python's inspect.getinnerframes()
     new_lines = []
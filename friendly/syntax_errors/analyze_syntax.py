@@ -20,6 +20,7 @@ from friendly.my_gettext import current_lang, internal_error
 from . import statement_analyzer
 from . import message_analyzer
 from .. import debug_helper
+from .. import timing
 
 
 def unknown_cause():
@@ -50,6 +51,7 @@ def set_cause_syntax(value, tb_data):
         return {"cause": internal_error(e)}
 
 
+@timing.timed("find_syntax_error_cause")
 def find_syntax_error_cause(value, tb_data):
     """Attempts to find the cause of a SyntaxError"""
     # value = tb_data.value
@@ -5,13 +5,16 @@ import platform
 import sys
 
 from . import fixers
+from . import syntax_utils
 from ..my_gettext import current_lang, internal_error
 from .. import debug_helper
 from .. import utils
+from ..context import ContextVar
 
 STATEMENT_ANALYZERS = []
 
-ASYNC = 0
+# 1 if the statement analyzed in the current thread starts with "async"
+ASYNC = ContextVar("ASYNC", default=0)
 
 
 def more_errors():
@@ -24,7 +27,7 @@ def more_errors():
 
 def def_correct_syntax():
     _ = current_lang.translate
-    async_ = "" if ASYNC == 0 else "async "
+    async_ = "" if ASYNC.get() == 0 else "async "
     # fmt: off
     return _(
         "The correct syntax is:\n\n"
@@ -33,10 +36,16 @@ def def_correct_syntax():
     # fmt: on
 
 
-def add_statement_analyzer(func):
+def add_statement_analyzer(func=None, *, requires=()):
     """A simple decorator that adds a function to the list
-    of all functions that analyze a single statement."""
-    STATEMENT_ANALYZERS.append(func)
+    of all functions that analyze a single statement.
+
+    The function is skipped by analyze_def_statement() if the statement has
+    none of the features it requires; see syntax_utils.set_requirements().
+    """
+    if func is None:
+        return lambda func: add_statement_analyzer(func, requires=requires)
+    STATEMENT_ANALYZERS.append(syntax_utils.set_requirements(func, requires))
 
 
 # ========================================================
@@ -47,35 +56,29 @@ def add_statement_analyzer(func):
 def analyze_def_statement(statement):
     """Analyzes the statement as identified by Python as that
     on which the error occurred."""
-    global ASYNC
     if not statement.tokens:  # pragma: no cover
         debug_helper.log("Statement with no tokens in error_in_def.py")
         return {"cause": internal_error("No tokens")}
 
-    ASYNC = 0
-    if statement.tokens[0] == "async":
-        ASYNC = 1
+    async_ = 1 if statement.tokens[0] == "async" else 0
+    ASYNC.set(async_)
 
-    if len(statement.tokens) > 1 + ASYNC and str(statement.tokens[1 + ASYNC]) in (
+    if len(statement.tokens) > 1 + async_ and str(statement.tokens[1 + async_]) in (
         "=",
         ":=",
     ):
         # Let the generic method handle the wrong assignment case
         return {}
 
-    for analyzer in STATEMENT_ANALYZERS:
-        cause = analyzer(statement)
-        if cause:
-            return cause
-    return {}
+    return syntax_utils.run_analyzers(STATEMENT_ANALYZERS, statement, __name__)
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == ':'",))
 def def_begin_code_block(statement):  #
     # Thinking of trying to use def to begin a code block, i.e.
     # def : ...
     _ = current_lang.translate
-    if statement.nb_tokens > 2 + ASYNC or statement.bad_token != ":":
+    if statement.nb_tokens > 2 + ASYNC.get() or statement.bad_token != ":":
         return {}
 
     if statement.first_token.start_col == 0:
@@ -100,8 +103,8 @@ def missing_parens(statement):
 
     if (
         statement.bad_token != ":"
-        and statement.nb_tokens >= 3 + ASYNC
-        and statement.bad_token != statement.tokens[2 + ASYNC]
+        and statement.nb_tokens >= 3 + ASYNC.get()
+        and statement.bad_token != statement.tokens[2 + ASYNC.get()]
     ):
         return {}
 
@@ -126,7 +129,10 @@ def missing_parens_2(statement):
     # def test a, b:
     _ = current_lang.translate
 
-    if statement.bad_token_index != 2 + ASYNC and statement.last_token != ":":
+    if (
+        statement.bad_token_index != 2 + ASYNC.get()
+        and statement.last_token != ":"
+    ):
         return {}
 
     new_statement = fixers.replace_two_tokens(
@@ -148,7 +154,7 @@ def missing_parens_2(statement):
     return {}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == last_token",))
 def missing_colon(statement):
     """look for missing colon at the end of statement; includes the case where
     something else has been written as a typo."""
@@ -192,12 +198,12 @@ def missing_colon(statement):
     return {}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token.is_keyword()",))
 def keyword_as_function_name(statement):
     # Something like
     # def pass(): ...
     _ = current_lang.translate
-    def_token = statement.tokens[ASYNC]
+    def_token = statement.tokens[ASYNC.get()]
     if not (statement.bad_token.is_keyword() and statement.prev_token == def_token):
         return {}
 
@@ -218,7 +224,7 @@ def keyword_as_function_name(statement):
 @add_statement_analyzer
 def other_invalid_function_names(statement):
     _ = current_lang.translate
-    def_token = statement.tokens[ASYNC]
+    def_token = statement.tokens[ASYNC.get()]
     if statement.bad_token.is_identifier() or not (statement.prev_token == def_token):
         return {}
 
@@ -240,10 +246,10 @@ def other_invalid_function_names(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == '('",))
 def function_definition_missing_name(statement):
     _ = current_lang.translate
-    def_token = statement.tokens[ASYNC]
+    def_token = statement.tokens[ASYNC.get()]
     if not (
         def_token == "def"
         and statement.bad_token == "("
@@ -263,7 +269,7 @@ def function_definition_missing_name(statement):
     return {"cause": cause + def_correct_syntax()}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=(("bad_token.is_keyword()", "begin_brackets"),))
 def keyword_not_allowed_as_function_argument(statement):
     _ = current_lang.translate
     if not (statement.bad_token.is_keyword() and statement.begin_brackets):
@@ -284,13 +290,13 @@ def keyword_not_allowed_as_function_argument(statement):
     return {"cause": cause}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=(("bad_token == '.'", "prev_token.is_identifier()"),))
 def dotted_name_not_allowed(statement):
     _ = current_lang.translate
     if not (statement.bad_token == "." and statement.prev_token.is_identifier()):
         return {}
 
-    if statement.bad_token_index > 3 + ASYNC:
+    if statement.bad_token_index > 3 + ASYNC.get():
         cause = _("You cannot use dotted names as function arguments.\n")
         if statement.next_token.is_identifier():
             cause += _("Perhaps you meant to write a comma.\n")
@@ -302,7 +308,7 @@ def dotted_name_not_allowed(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == '/'",))
 def positional_arguments_in_def(statement):
     _ = current_lang.translate
 
@@ -325,7 +331,7 @@ def positional_arguments_in_def(statement):
         return {"cause": cause, "suggest": hint}
 
     prev_tok = ""
-    for tok in statement.tokens[ASYNC : statement.bad_token_index]:
+    for tok in statement.tokens[ASYNC.get() : statement.bad_token_index]:
         if tok == "**":
             cause = meaning + _(
                 "You have unspecified keyword arguments that appear before\n"
@@ -358,7 +364,7 @@ def positional_arguments_in_def(statement):
     return {}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=(("bad_token == '*'", "prev_token == ','"),))
 def keyword_arguments_in_def(statement):
     _ = current_lang.translate
     if statement.bad_token != "*" or statement.prev_token != ",":
@@ -367,7 +373,7 @@ def keyword_arguments_in_def(statement):
     args = statement.next_token if statement.next_token.is_identifier() else ""
     hint = _("You can only use `*` once in a function definition.\n")
     tokens = statement.tokens
-    for index, tok in enumerate(tokens[ASYNC : statement.bad_token_index]):
+    for index, tok in enumerate(tokens[ASYNC.get() : statement.bad_token_index]):
         next_token = tokens[index + 1]
         if tok == "*":
             if next_token.is_identifier() and args:
@@ -401,7 +407,7 @@ def keyword_arguments_in_def(statement):
         return {"cause": hint, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token.is_number()",))
 def number_as_argument(statement):
     _ = current_lang.translate
 
@@ -416,7 +422,7 @@ def number_as_argument(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token.is_string()",))
 def string_as_argument(statement):
     _ = current_lang.translate
 
@@ -431,7 +437,7 @@ def string_as_argument(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == '('",))
 def tuple_as_argument(statement):
     _ = current_lang.translate
 
@@ -448,7 +454,7 @@ def tuple_as_argument(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == '['",))
 def list_as_argument(statement):
     _ = current_lang.translate
     if statement.bad_token != "[" or statement.prev_token.string not in "(,":
@@ -461,7 +467,7 @@ def list_as_argument(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == '{'",))
 def dict_or_set_as_argument(statement):
     _ = current_lang.translate
     if statement.bad_token != "{" or statement.prev_token.string not in "(,":
@@ -474,7 +480,7 @@ def dict_or_set_as_argument(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token.is_operator()",))
 def operator_as_argument(statement):
     """This looks at various possible fixes when the bad token is an operator.
     The following cases are considered:
@@ -564,7 +570,7 @@ def operator_as_argument(statement):
     return {}  # pragma: no cover
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=(("bad_token.is_identifier()", "prev_token == ','"),))
 def arg_after_kwarg(statement):
     """This is only for something with positional argument after **kwargs;
     the case where we have a positional argument after a named argument,
@@ -579,7 +585,7 @@ def arg_after_kwarg(statement):
     ):
         return {}
 
-    for tok in statement.tokens[ASYNC : statement.bad_token_index]:
+    for tok in statement.tokens[ASYNC.get() : statement.bad_token_index]:
         if tok == "**":
             hint = _("Positional arguments must come before keyword arguments.\n")
             cause = hint + _(
@@ -13,17 +13,130 @@ from . import syntax_utils
 from . import statement_analyzer
 from . import error_in_def
 from .. import debug_helper
+from .. import fingerprint
 from .. import utils
+from ..context import check_deadline
 from ..my_gettext import current_lang
+from ..site_cache import LRUCache
 
 MESSAGE_ANALYZERS = []
+# Messages handled by each function of MESSAGE_ANALYZERS, as a tuple
+# (exact messages, regular expressions), both empty for functions
+# which must be called for all messages.
+MESSAGE_PATTERNS = []
+ANCHOR_SIZE = 4
+# Characters which, in a regular expression, are not matched literally.
+_LITERAL_PREFIX = re.compile(r"(?:[^\\.^$*+?{}\[\]|()]|\\\W)*")
 
 
-def add_python_message(func):
+def add_python_message(func=None, *, exact=(), contains=(), prefixes=(), patterns=()):
     """A simple decorator that adds a function the the list of functions
     that process a message given by Python.
+
+    The messages handled by the function can be declared as exact messages,
+    substrings, prefixes, or regular expressions; the function is then
+    only called for these messages, and does not need to check them again.
     """
+    if func is None:
+        return lambda func: add_python_message(
+            func, exact=exact, contains=contains, prefixes=prefixes, patterns=patterns
+        )
+    regexes = (
+        [re.escape(text) for text in contains]
+        + ["^" + re.escape(text) for text in prefixes]
+        + list(patterns)
+    )
     MESSAGE_ANALYZERS.append(func)
+    MESSAGE_PATTERNS.append((tuple(exact), tuple(regexes)))
+    dispatch_index.clear()
+    return func
+
+
+def get_required_text(regex):
+    """Returns some text which is part of every string matched by a
+    regular expression, namely the text it begins with, if any."""
+    if "|" in regex:
+        return ""
+    regex = regex.lstrip("^")
+    literal = _LITERAL_PREFIX.match(regex).group()
+    if regex[len(literal) : len(literal) + 1] in ("*", "?", "{"):
+        literal = literal[:-1]  # the last character is optional
+    return re.sub(r"\\(\W)", r"\1", literal)
+
+
+class DispatchIndex:
+    """Selects the message analyzers to call for a given message, instead
+    of calling every analyzer in turn. Exact messages are found in a dict.
+    Each other pattern is associated with an anchor, a few characters
+    which any matching message contains; only the patterns whose anchor
+    is found in the message are tried.
+
+    The tables are built in local variables and published with a single
+    assignment, so that other threads never see them partially built.
+    """
+
+    def __init__(self):
+        self.tables = None  # (exact, always, anchored, unanchored)
+        self.candidates = LRUCache(maxsize=256)  # {message: analyzers}
+
+    def clear(self):
+        self.tables = None
+        self.candidates.clear()
+
+    def build(self):
+        exact_messages = {}
+        always = []
+        anchored = {}  # {anchor: [(analyzer index, compiled pattern)]}
+        unanchored = []
+        for index, (exact, regexes) in enumerate(MESSAGE_PATTERNS):
+            if not exact and not regexes:
+                always.append(index)
+            for message in exact:
+                exact_messages.setdefault(message, []).append(index)
+            for regex in regexes:
+                text = get_required_text(regex)
+                anchors = [
+                    text[i : i + ANCHOR_SIZE]
+                    for i in range(len(text) - ANCHOR_SIZE + 1)
+                ]
+                if not anchors:
+                    unanchored.append((index, re.compile(regex)))
+                    continue
+                # Patterns sharing an anchor are all tried when it is found.
+                unused = [anchor for anchor in anchors if anchor not in anchored]
+                anchor = unused[0] if unused else anchors[0]
+                anchored.setdefault(anchor, []).append((index, re.compile(regex)))
+        tables = exact_messages, always, anchored, unanchored
+        self.tables = tables
+        return tables
+
+    def get_candidates(self, message):
+        """Returns the analyzers which can handle message, in the order
+        in which they were added."""
+        candidates = self.candidates.get(message)
+        if candidates is not None:
+            return candidates
+        tables = self.tables
+        if tables is None:
+            tables = self.build()
+        exact, always, anchored, unanchored = tables
+        indices = set(always)
+        indices.update(exact.get(message, ()))
+        found = anchored.keys() & {
+            message[i : i + ANCHOR_SIZE]
+            for i in range(len(message) - ANCHOR_SIZE + 1)
+        }
+        for patterns in [unanchored] + [anchored[a] for a in found]:
+            for index, regex in patterns:
+                if index not in indices and regex.search(message):
+                    indices.add(index)
+        candidates = [MESSAGE_ANALYZERS[index] for index in sorted(indices)]
+        if self.tables is tables:
+            self.candidates.set(message, candidates)
+        return candidates
+
+
+dispatch_index = DispatchIndex()
 
 
 # The following has been taken from https://unicode-table.com/en/sets/quotation-marks/
@@ -55,38 +168,40 @@ bad_quotation_marks = [
 
 
 def analyze_message(message="", statement=None):
-    for case in MESSAGE_ANALYZERS:
+    for case in dispatch_index.get_candidates(message):
+        check_deadline()
         cause = case(message=message, statement=statement)
         if cause:
-            return cause
+            return fingerprint.record_analyzer(cause, case)
     return {}
 
 
-@add_python_message
+ASSIGN_TO_KEYWORD = (
+    "can't assign to keyword",  # Python 3.6, 3.7
+    "assignment to keyword",  # Python 3.6, 3.7
+    "cannot assign to keyword",  # Python 3.8
+    "cannot assign to None",  # Python 3.8
+    "cannot assign to True",  # Python 3.8
+    "cannot assign to False",  # Python 3.8
+    "cannot assign to __debug__",  # Python 3.8
+    "can't assign to Ellipsis",  # Python 3.6, 3.7
+    "cannot assign to Ellipsis",  # Python 3.8
+    "cannot use named assignment with True",  # Python 3.8
+    "cannot use named assignment with False",  # Python 3.8
+    "cannot use named assignment with None",  # Python 3.8
+    "cannot use named assignment with Ellipsis",  # Python 3.8
+    "cannot use assignment expressions with True",  # Python 3.8
+    "cannot use assignment expressions with False",  # Python 3.8
+    "cannot use assignment expressions with None",  # Python 3.8
+    "cannot use assignment expressions with Ellipsis",  # Python 3.8
+    "cannot assign to Ellipsis here. Maybe you meant '==' instead of '='?",
+    "cannot assign to ellipsis here. Maybe you meant '==' instead of '='?",
+)
+
+
+@add_python_message(exact=ASSIGN_TO_KEYWORD)
 def assign_to_keyword(message="", statement=None):
     _ = current_lang.translate
-    if message not in (
-        "can't assign to keyword",  # Python 3.6, 3.7
-        "assignment to keyword",  # Python 3.6, 3.7
-        "cannot assign to keyword",  # Python 3.8
-        "cannot assign to None",  # Python 3.8
-        "cannot assign to True",  # Python 3.8
-        "cannot assign to False",  # Python 3.8
-        "cannot assign to __debug__",  # Python 3.8
-        "can't assign to Ellipsis",  # Python 3.6, 3.7
-        "cannot assign to Ellipsis",  # Python 3.8
-        "cannot use named assignment with True",  # Python 3.8
-        "cannot use named assignment with False",  # Python 3.8
-        "cannot use named assignment with None",  # Python 3.8
-        "cannot use named assignment with Ellipsis",  # Python 3.8
-        "cannot use assignment expressions with True",  # Python 3.8
-        "cannot use assignment expressions with False",  # Python 3.8
-        "cannot use assignment expressions with None",  # Python 3.8
-        "cannot use assignment expressions with Ellipsis",  # Python 3.8
-        "cannot assign to Ellipsis here. Maybe you meant '==' instead of '='?",
-        "cannot assign to ellipsis here. Maybe you meant '==' instead of '='?",
-    ):
-        return {}
 
     for word in ["None", "True", "False", "__debug__", "Ellipsis", "ellipsis"]:
         if word in message:
@@ -126,14 +241,15 @@ def assign_to_keyword(message="", statement=None):
     return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+ASSIGN_TO_CONDITIONAL_EXPRESSION = (
+    "can't assign to conditional expression",  # Python 3.6, 3.7
+    "cannot assign to conditional expression",  # Python 3.8
+)
+
+
+@add_python_message(exact=ASSIGN_TO_CONDITIONAL_EXPRESSION)
 def assign_to_conditional_expression(message="", **_kwargs):
     _ = current_lang.translate
-    if message not in (
-        "can't assign to conditional expression",  # Python 3.6, 3.7
-        "cannot assign to conditional expression",  # Python 3.8
-    ):
-        return {}
 
     hint = _("You can only assign objects to identifiers (variable names).\n")
     cause = _(
@@ -145,19 +261,12 @@ def assign_to_conditional_expression(message="", **_kwargs):
     return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+@add_python_message(
+    exact=("can't assign to function call",),  # Python 3.6, 3.7
+    contains=("cannot assign to function call",),
+)
 def assign_to_function_call(message="", statement=None):
     _ = current_lang.translate
-    if (
-        message != "can't assign to function call"  # Python 3.6, 3.7
-        and "cannot assign to function call" not in message
-    ):
-        # if message not in (
-        #     "can't assign to function call",  # Python 3.6, 3.7
-        #     "cannot assign to function call",  # Python 3.8
-        # ):
-        return {}
-
     hint = _("You can only assign objects to identifiers (variable names).\n")
 
     fn_call = statement.bad_token.string + "(...)"
@@ -189,14 +298,15 @@ def assign_to_function_call(message="", statement=None):
     return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+ASSIGN_TO_GENERATOR_EXPRESSION = (
+    "can't assign to generator expression",  # Python 3.6, 3.7
+    "cannot assign to generator expression",  # Python 3.8
+)
+
+
+@add_python_message(exact=ASSIGN_TO_GENERATOR_EXPRESSION)
 def assign_to_generator_expression(message="", **_kwargs):
     _ = current_lang.translate
-    if message not in (
-        "can't assign to generator expression",  # Python 3.6, 3.7
-        "cannot assign to generator expression",  # Python 3.8
-    ):
-        return {}
 
     hint = _("You can only assign objects to identifiers (variable names).\n")
     cause = _(
@@ -206,27 +316,23 @@ def assign_to_generator_expression(message="", **_kwargs):
     return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+@add_python_message(contains=("cannot assign to f-string expression",))
 def assign_to_f_expression(message="", statement=None):
     _ = current_lang.translate
 
-    if "cannot assign to f-string expression" in message:
-        hint = _("You can only assign objects to identifiers (variable names).\n")
-        cause = _(
-            "You wrote an expression that has the f-string `{fstring}`\n"
-            "on the left-hand side of the equal sign.\n"
-            "An f-string should only appear on the right-hand "
-            "side of an equal sign.\n"
-        ).format(fstring=statement.bad_token)
-        return {"cause": cause, "suggest": hint}
-    return {}
+    hint = _("You can only assign objects to identifiers (variable names).\n")
+    cause = _(
+        "You wrote an expression that has the f-string `{fstring}`\n"
+        "on the left-hand side of the equal sign.\n"
+        "An f-string should only appear on the right-hand "
+        "side of an equal sign.\n"
+    ).format(fstring=statement.bad_token)
+    return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+@add_python_message(exact=("f-string expression part cannot include a backslash",))
 def f_string_backslash(message="", **_kwargs):
     _ = current_lang.translate
-    if message != "f-string expression part cannot include a backslash":
-        return {}
 
     cause = _(
         "You have written an f-string whose content `{...}`\n"
@@ -267,13 +373,15 @@ def what_kind_of_literal(literal):
     return None  # pragma: no cover
 
 
-@add_python_message
+ANNOTATED_NAME_GLOBAL = r"annotated name '(.)' can't be global"
+
+
+@add_python_message(patterns=(ANNOTATED_NAME_GLOBAL,))
 def annotated_name_cannot_be_global(message="", **_kwargs):
     # annotated name 'x' can't be global
     _ = current_lang.translate
-    pattern1 = re.compile(r"annotated name '(.)' can't be global")
-    match = re.search(pattern1, message)
-    if not match:
+    match = re.search(ANNOTATED_NAME_GLOBAL, message)
+    if match is None:
         return {}
     cause = _(
         "The object named `{name}` is defined with type annotation\n"
@@ -283,19 +391,20 @@ def annotated_name_cannot_be_global(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+ASSIGN_TO_LITERAL = (
+    "can't assign to literal",  # Python 3.6, 3.7
+    "cannot assign to literal",  # Python 3.8
+    "cannot assign to set display",  # Python 3.8
+    "cannot assign to dict display",  # Python 3.8
+    "cannot assign to dict literal here. Maybe you meant '==' instead of '='?",  # 3.10
+    "cannot assign to literal here. Maybe you meant '==' instead of '='?",  # 3.10
+    "cannot assign to set display here. Maybe you meant '==' instead of '='?",  # 3.10
+)
+
+
+@add_python_message(exact=ASSIGN_TO_LITERAL)
 def assign_to_literal(message="", statement=None):
     _ = current_lang.translate
-    if message not in (
-        "can't assign to literal",  # Python 3.6, 3.7
-        "cannot assign to literal",  # Python 3.8
-        "cannot assign to set display",  # Python 3.8
-        "cannot assign to dict display",  # Python 3.8
-        "cannot assign to dict literal here. Maybe you meant '==' instead of '='?",  # 3.10
-        "cannot assign to literal here. Maybe you meant '==' instead of '='?",  # 3.10
-        "cannot assign to set display here. Maybe you meant '==' instead of '='?",  # 3.10
-    ):
-        return {}
 
     # This error can happen if we use a literal as an element of
     # a for loop; we take care of this case first.
@@ -380,16 +489,17 @@ def assign_to_literal(message="", statement=None):
     return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+ASSIGN_TO_OPERATOR = (
+    "can't assign to operator",  # Python 3.6, 3.7
+    "cannot assign to operator",  # Python 3.8
+    "cannot assign to expression here. Maybe you meant '==' instead of '='?",  # Python 3.10
+)
+
+
+@add_python_message(exact=ASSIGN_TO_OPERATOR)
 def assign_to_operator(message="", statement=None):
     _ = current_lang.translate
     line = statement.bad_line.rstrip()
-    if message not in (
-        "can't assign to operator",  # Python 3.6, 3.7
-        "cannot assign to operator",  # Python 3.8
-        "cannot assign to expression here. Maybe you meant '==' instead of '='?",  # Python 3.10
-    ):
-        return {}
 
     cause = _(
         "You wrote an expression that includes some mathematical operations\n"
@@ -422,11 +532,9 @@ def could_be_identifier(line):
         return ""
 
 
-@add_python_message
+@add_python_message(exact=("cannot use assignment expressions with literal",))
 def augmented_assignment_with_literal(message="", statement=None):
     _ = current_lang.translate
-    if message != "cannot use assignment expressions with literal":
-        return {}
 
     hint = _("You can only assign objects to identifiers (variable names).\n")
 
@@ -438,51 +546,46 @@ def augmented_assignment_with_literal(message="", statement=None):
     return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+@add_python_message(contains=("is nonlocal and global",))
 def both_nonlocal_and_global(message="", statement=None):
     _ = current_lang.translate
-    if "is nonlocal and global" in message:
-        cause = _(
-            "You declared `{name}` as being both a global and nonlocal variable.\n"
-            "A variable can be global, or nonlocal, but not both at the same time.\n"
-        ).format(name=statement.next_token)
-        return {"cause": cause}
-    return {}
+    cause = _(
+        "You declared `{name}` as being both a global and nonlocal variable.\n"
+        "A variable can be global, or nonlocal, but not both at the same time.\n"
+    ).format(name=statement.next_token)
+    return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("'break' outside loop",))
 def break_outside_loop(message="", **_kwargs):
     _ = current_lang.translate
 
-    if "'break' outside loop" in message:
-        cause = _(
-            "The Python keyword `break` can only be used "
-            "inside a `for` loop or inside a `while` loop.\n"
-        )
-        return {"cause": cause}
-    return {}
+    cause = _(
+        "The Python keyword `break` can only be used "
+        "inside a `for` loop or inside a `while` loop.\n"
+    )
+    return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("'continue' not properly in loop",))
 def continue_outside_loop(message="", **_kwargs):
     _ = current_lang.translate
-    if "'continue' not properly in loop" in message:
-        cause = _(
-            "The Python keyword `continue` can only be used "
-            "inside a `for` loop or inside a `while` loop.\n"
-        )
-        return {"cause": cause}
-    return {}
+    cause = _(
+        "The Python keyword `continue` can only be used "
+        "inside a `for` loop or inside a `while` loop.\n"
+    )
+    return {"cause": cause}
+
+
+DELETE_FUNCTION_CALL = (
+    "can't delete function call",  # Python 3.6, 3.7
+    "cannot delete function call",  # Python 3.8
+)
 
 
-@add_python_message
+@add_python_message(exact=DELETE_FUNCTION_CALL)
 def delete_function_call(message="", statement=None):
     _ = current_lang.translate
-    if message not in (
-        "can't delete function call",  # Python 3.6, 3.7
-        "cannot delete function call",  # Python 3.8
-    ):
-        return {}
 
     line = statement.bad_line.rstrip()
     correct = "del {name}".format(name=statement.bad_token)
@@ -495,18 +598,19 @@ def delete_function_call(message="", statement=None):
     return {"cause": cause}
 
 
-@add_python_message
+DELETE_X = (
+    "can't delete keyword",  # Python 3.6, 3.7
+    "can't delete literal",
+    "cannot delete literal",
+    "cannot delete None",
+    "cannot delete True",
+    "cannot delete False",
+)
+
+
+@add_python_message(exact=DELETE_X)
 def delete_x(message="", statement=None):
     _ = current_lang.translate
-    if message not in (
-        "can't delete keyword",  # Python 3.6, 3.7
-        "can't delete literal",
-        "cannot delete literal",
-        "cannot delete None",
-        "cannot delete True",
-        "cannot delete False",
-    ):
-        return {}
 
     if statement.bad_token.string in ("None", "True", "False"):
         cause = _("You cannot delete the constant `{constant}`.\n").format(
@@ -521,52 +625,55 @@ def delete_x(message="", statement=None):
     return {"cause": cause}
 
 
-@add_python_message
+DUPLICATE_ARGUMENT = r"duplicate argument '(.*)' in function definition"
+
+
+@add_python_message(patterns=(DUPLICATE_ARGUMENT,))
 def duplicate_argument_in_function_definition(message="", **_kwargs):
     _ = current_lang.translate
-    if "duplicate argument" in message and "function definition" in message:
-        name = message.split("'")[1]
-        cause = _(
-            "You have defined a function repeating the keyword argument\n\n"
-            "    {name}\n"
-            "twice; each keyword argument should appear only once"
-            " in a function definition.\n"
-        ).format(name=name)
-        return {"cause": cause}
-    return {}
+    match = re.search(DUPLICATE_ARGUMENT, message)
+    if match is None:
+        return {}
+    cause = _(
+        "You have defined a function repeating the keyword argument\n\n"
+        "    {name}\n"
+        "twice; each keyword argument should appear only once"
+        " in a function definition.\n"
+    ).format(name=match.group(1))
+    return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(
+    contains=(
+        "EOL while scanning string literal",
+        "unterminated string literal",  # Python 3.10
+    )
+)
 def eol_while_scanning_string_literal(message="", statement=None):
     _ = current_lang.translate
-    if (
-        "EOL while scanning string literal" in message
-        or "unterminated string literal" in message  # Python 3.10
-    ):
-        hint = _("Did you forget a closing quote?\n")
-        cause = _(
-            "You started writing a string with a single or double quote\n"
-            "but never ended the string with another quote on that line.\n"
+    hint = _("Did you forget a closing quote?\n")
+    cause = _(
+        "You started writing a string with a single or double quote\n"
+        "but never ended the string with another quote on that line.\n"
+    )
+    # skipcq: PYL-R1714
+    # second if case for Python 3.10
+    if statement.prev_token == "\\" or statement.bad_line[-2] == "\\":
+        cause += _(
+            "Perhaps you meant to write the backslash character, `\\`\n"
+            "as the last character in the string and forgot that you\n"
+            "needed to escape it by writing two `\\` in a row.\n"
         )
-        # skipcq: PYL-R1714
-        # second if case for Python 3.10
-        if statement.prev_token == "\\" or statement.bad_line[-2] == "\\":
-            cause += _(
-                "Perhaps you meant to write the backslash character, `\\`\n"
-                "as the last character in the string and forgot that you\n"
-                "needed to escape it by writing two `\\` in a row.\n"
-            )
-            hint = _("Did you forget to escape a backslash character?\n")
+        hint = _("Did you forget to escape a backslash character?\n")
 
-        return {"cause": cause, "suggest": hint}
-    return {}
+    return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+@add_python_message(
+    contains=("expression cannot contain assignment, perhaps you meant",)
+)
 def expression_cannot_contain_assignment(message="", **_kwargs):
     _ = current_lang.translate
-    if "expression cannot contain assignment, perhaps you meant" not in message:
-        return {}
     cause = _(
         "One of the following two possibilities could be the cause:\n"
         "1. You meant to do a comparison with == and wrote = instead.\n"
@@ -580,11 +687,9 @@ def expression_cannot_contain_assignment(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("Generator expression must be parenthesized",))
 def generator_expression_must_be_parenthesized(message="", **_kwargs):
     _ = current_lang.translate
-    if "Generator expression must be parenthesized" not in message:
-        return {}
     cause = _(
         "You are using a generator expression, something of the form\n\n"
         "    x for x in thing\n\n"
@@ -593,11 +698,9 @@ def generator_expression_must_be_parenthesized(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("keyword argument repeated",))
 def keyword_argument_repeated(message="", statement=None):
     _ = current_lang.translate
-    if "keyword argument repeated" not in message:
-        return {}
     cause = _(
         "You have called a function repeating the same keyword argument (`{arg}`).\n"
         "Each keyword argument should appear only once in a function call.\n"
@@ -605,11 +708,9 @@ def keyword_argument_repeated(message="", statement=None):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("keyword can't be an expression",))
 def keyword_cannot_be_expression(message="", **_kwargs):
     _ = current_lang.translate
-    if "keyword can't be an expression" not in message:
-        return {}
     cause = _(
         "You likely called a function with a named argument:\n\n"
         "    a_function(invalid=something) \n\n"
@@ -621,12 +722,10 @@ def keyword_cannot_be_expression(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("invalid character",))
 def invalid_character_in_identifier(message="", statement=None):
     _ = current_lang.translate
     copy_paste = _("Did you use copy-paste?\n")
-    if "invalid character" not in message:
-        return {}
 
     bad_character = statement.bad_token
     python_says = _(
@@ -651,25 +750,21 @@ def invalid_character_in_identifier(message="", statement=None):
     return {"cause": python_says}
 
 
-@add_python_message
+MISMATCHED_PARENTHESIS = (
+    r"closing parenthesis '(.)' does not match opening parenthesis '(.)'"
+    r"(?: on line (\d+))?"
+)
+
+
+@add_python_message(patterns=(MISMATCHED_PARENTHESIS,))
 def mismatched_parenthesis(message="", statement=None):
     # Python 3.8; something like:
     # closing parenthesis ']' does not match opening parenthesis '(' on line
     _ = current_lang.translate
-    pattern1 = re.compile(
-        r"closing parenthesis '(.)' does not match opening parenthesis '(.)' on line (\d+)"
-    )
-    match = re.search(pattern1, message)
+    match = re.search(MISMATCHED_PARENTHESIS, message)
     if match is None:
-        lineno = None
-        pattern2 = re.compile(
-            r"closing parenthesis '(.)' does not match opening parenthesis '(.)'"
-        )
-        match = re.search(pattern2, message)
-        if match is None:
-            return {}
-    else:
-        lineno = match.group(3)
+        return {}
+    lineno = match.group(3)
 
     opening = match.group(2)
     closing = match.group(1)
@@ -694,11 +789,9 @@ def mismatched_parenthesis(message="", statement=None):
         return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("f-string: unterminated string",))
 def unterminated_f_string(message="", statement=None):
     _ = current_lang.translate
-    if "f-string: unterminated string" not in message:
-        return {}
 
     hint = _("Perhaps you forgot a closing quote.\n")
     # Depending on the Python version, the error points at the f-string itself
@@ -725,13 +818,11 @@ def unterminated_f_string(message="", statement=None):
     return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+@add_python_message(contains=("is parameter and global",))
 def name_is_parameter_and_global(message="", statement=None):
     # something like: name 'x' is parameter and global
     _ = current_lang.translate
     line = statement.statement
-    if "is parameter and global" not in message:
-        return {}
 
     name = message.split("'")[1]
     if name in line and "global" in line:
@@ -750,12 +841,10 @@ def name_is_parameter_and_global(message="", statement=None):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("is assigned to before global declaration",))
 def name_assigned_to_prior_global(message="", **_kwargs):
     # something like: name 'p' is assigned to before global declaration
     _ = current_lang.translate
-    if "is assigned to before global declaration" not in message:
-        return {}
 
     name = message.split("'")[1]
     cause = _(
@@ -765,12 +854,10 @@ def name_assigned_to_prior_global(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("is used prior to global declaration",))
 def name_used_prior_global(message="", **_kwargs):
     # something like: name 'p' is used prior to global declaration
     _ = current_lang.translate
-    if "is used prior to global declaration" not in message:
-        return {}
 
     name = message.split("'")[1]
     cause = _(
@@ -779,12 +866,10 @@ def name_used_prior_global(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("is assigned to before nonlocal declaration",))
 def name_assigned_to_prior_nonlocal(message="", **_kwargs):
     # something like: name 'p' is assigned to before global declaration
     _ = current_lang.translate
-    if "is assigned to before nonlocal declaration" not in message:
-        return {}
 
     name = message.split("'")[1]
     hint = _("Did you forget to add `nonlocal`?\n")
@@ -795,11 +880,9 @@ def name_assigned_to_prior_nonlocal(message="", **_kwargs):
     return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+@add_python_message(contains=("is parameter and nonlocal",))
 def name_is_parameter_and_nonlocal(message="", **_kwargs):
     _ = current_lang.translate
-    if "is parameter and nonlocal" not in message:
-        return {}
 
     name = message.split("'")[1]
     cause = _(
@@ -810,12 +893,10 @@ def name_is_parameter_and_nonlocal(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("is used prior to nonlocal declaration",))
 def name_used_prior_nonlocal(message="", **_kwargs):
     # something like: name 'q' is used prior to nonlocal declaration
     _ = current_lang.translate
-    if "is used prior to nonlocal declaration" not in message:
-        return {}
 
     hint = _("Did you forget to write `nonlocal` first?\n")
     name = message.split("'")[1]
@@ -826,11 +907,9 @@ def name_used_prior_nonlocal(message="", **_kwargs):
     return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+@add_python_message(contains=("nonlocal declaration not allowed at module level",))
 def nonlocal_at_module_level(message="", **_kwargs):
     _ = current_lang.translate
-    if "nonlocal declaration not allowed at module level" not in message:
-        return {}
     cause = _(
         "You used the nonlocal keyword at a module level.\n"
         "The nonlocal keyword refers to a variable inside a function\n"
@@ -839,11 +918,9 @@ def nonlocal_at_module_level(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("no binding for nonlocal",))
 def no_binding_for_nonlocal(message="", **_kwargs):
     _ = current_lang.translate
-    if "no binding for nonlocal" not in message:
-        return {}
 
     name = message.split("'")[1]
     cause = _(
@@ -853,11 +930,11 @@ def no_binding_for_nonlocal(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(
+    contains=("unexpected character after line continuation character",)
+)
 def unexpected_character_after_continuation(message="", statement=None):
     _ = current_lang.translate
-    if "unexpected character after line continuation character" not in message:
-        return {}
 
     cause = _(
         "You are using the continuation character `\\` outside of a string,\n"
@@ -893,12 +970,10 @@ def unexpected_character_after_continuation(message="", statement=None):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("unexpected EOF while parsing",))
 def unexpected_eof_while_parsing(message="", statement=None):
     # unexpected EOF while parsing
     _ = current_lang.translate
-    if "unexpected EOF while parsing" not in message:
-        return {}
 
     cause = _(
         "Python tells us that it reached the end of the file\n"
@@ -913,29 +988,20 @@ def unexpected_eof_while_parsing(message="", statement=None):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(exact=("unmatched ')'", "unmatched ']'", "unmatched '}'"))
 def unmatched_parenthesis(message="", statement=None):
     _ = current_lang.translate
     # Python 3.8
-    if message == "unmatched ')'":
-        bracket = syntax_utils.name_bracket(")")
-    elif message == "unmatched ']'":
-        bracket = syntax_utils.name_bracket("]")
-    elif message == "unmatched '}'":
-        bracket = syntax_utils.name_bracket("}")
-    else:
-        return {}
+    bracket = syntax_utils.name_bracket(message[-2])
     cause = _(
         "The closing {bracket} on line {linenumber} does not match anything.\n"
     ).format(bracket=bracket, linenumber=statement.linenumber)
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("positional argument follows keyword argument",))
 def position_argument_follows_keyword_arg(message="", **_kwargs):
     _ = current_lang.translate
-    if "positional argument follows keyword argument" not in message:
-        return {}
     cause = _(
         "In Python, you can call functions with only positional arguments\n\n"
         "    test(1, 2, 3)\n\n"
@@ -949,11 +1015,9 @@ def position_argument_follows_keyword_arg(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("non-default argument follows default argument",))
 def non_default_arg_follows_default_arg(message="", **_kwargs):
     _ = current_lang.translate
-    if "non-default argument follows default argument" not in message:
-        return {}
     cause = _(
         "In Python, you can define functions with only positional arguments\n\n"
         "    def test(a, b, c): ...\n\n"
@@ -967,13 +1031,11 @@ def non_default_arg_follows_default_arg(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(
+    prefixes=("Missing parentheses in call to 'print'. Did you mean print(",)
+)
 def python2_print(message="", **_kwargs):
     _ = current_lang.translate
-    if not message.startswith(
-        "Missing parentheses in call to 'print'. Did you mean print("
-    ):
-        return {}
     message = message[59:-2]
     if len(message) > 40:
         message = message[0:25] + " ... "
@@ -987,11 +1049,9 @@ def python2_print(message="", **_kwargs):
     return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+@add_python_message(exact=("can't use starred expression here",))
 def cannot_use_starred_expression(message="", **_kwargs):
     _ = current_lang.translate
-    if message != "can't use starred expression here":
-        return {}
 
     cause = _(
         "The star operator `*` is interpreted to mean that\n"
@@ -1002,21 +1062,17 @@ def cannot_use_starred_expression(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(exact=("'return' outside function",))
 def return_outside_function(message="", **_kwargs):
     _ = current_lang.translate
-    if message != "'return' outside function":
-        return {}
 
     cause = _("You can only use a `return` statement inside a function or method.\n")
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(exact=("too many statically nested blocks",))
 def too_many_nested_blocks(message="", **_kwargs):
     _ = current_lang.translate
-    if message != "too many statically nested blocks":
-        return {}
 
     hint = _("Seriously?\n")
     cause = _(
@@ -1027,12 +1083,10 @@ def too_many_nested_blocks(message="", **_kwargs):
     return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+@add_python_message(exact=("named arguments must follow bare *",))
 def named_arguments_must_follow_bare_star(message="", **_kwargs):
     _ = current_lang.translate
     # TODO: revise this as it can be greatly improved
-    if message != "named arguments must follow bare *":
-        return {}
 
     hint = _("Did you forget something after `*`?\n")
     cause = _(
@@ -1043,10 +1097,10 @@ def named_arguments_must_follow_bare_star(message="", **_kwargs):
     return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+@add_python_message(exact=("You found it!",))
 def you_found_it(message="", statement=None):  # pragma: no cover
     _ = current_lang.translate
-    if message != "You found it!" or statement.bad_token != "__peg_parser__":
+    if statement.bad_token != "__peg_parser__":
         return {}
 
     cause = _(
@@ -1057,11 +1111,13 @@ def you_found_it(message="", statement=None):  # pragma: no cover
     return {"cause": cause}
 
 
-@add_python_message
+FUTURE_NOT_DEFINED = r"future feature (.*) is not defined"
+
+
+@add_python_message(patterns=(FUTURE_NOT_DEFINED,))
 def from__future__not_defined(message="", **_kwargs):
     _ = current_lang.translate
-    pattern = re.compile(r"future feature (.*) is not defined")
-    match = re.search(pattern, message)
+    match = re.search(FUTURE_NOT_DEFINED, message)
     if match is None:
         return {}
 
@@ -1094,11 +1150,11 @@ def from__future__not_defined(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(
+    exact=("from __future__ imports must occur at the beginning of the file",)
+)
 def from__future__at_begin(message="", **_kwargs):
     _ = current_lang.translate
-    if message != "from __future__ imports must occur at the beginning of the file":
-        return {}
 
     cause = _(
         "A `from __future__ import` statement changes the way Python\n"
@@ -1108,11 +1164,9 @@ def from__future__at_begin(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(exact=("not a chance",))
 def import_braces(message="", **_kwargs):
     _ = current_lang.translate
-    if message != "not a chance":
-        return {}
 
     cause = _(
         "I suspect you wrote `from __future__ import braces` following\n"
@@ -1123,23 +1177,19 @@ def import_braces(message="", **_kwargs):
     return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(contains=("in octal literal",))
 def invalid_octal(message="", statement=None):
     # Before Python 3.8, we'd only get "invalid syntax"
-    if "in octal literal" not in message:
-        return {}
 
     return statement_analyzer.invalid_octal(statement)
 
 
-@add_python_message
+@add_python_message(
+    exact=("EOF while scanning triple-quoted string literal",),
+    contains=("unterminated triple-quoted string literal",),
+)
 def eof_unclosed_triple_quoted(message="", **_kwargs):
     _ = current_lang.translate
-    if not (
-        message == "EOF while scanning triple-quoted string literal"
-        or "unterminated triple-quoted string literal" in message
-    ):
-        return {}
 
     cause = _(
         "You started writing a triple-quoted string but never wrote\n"
@@ -1180,40 +1230,34 @@ def proper_decimal_or_octal_number(prev_str, bad_str):
     return {}  # pragma: no cover
 
 
-@add_python_message
+@add_python_message(exact=("invalid token",))
 def invalid_token(message="", statement=None):
     # Seen this for Python 3.6, 3.7 for would-be decimal number starting with zero.
     _ = current_lang.translate
-    if message != "invalid token":
-        return {}
 
     prev_str = statement.prev_token.string
     bad_str = statement.bad_token.string
     return proper_decimal_or_octal_number(prev_str, bad_str)
 
 
-@add_python_message
+@add_python_message(
+    prefixes=("leading zeros in decimal integer literals are not permitted",)
+)
 def leading_zeros_in_decimal_integers(message="", statement=None):
     # Same as previous case but for Python 3.8+
     _ = current_lang.translate
-    if not (
-        message.startswith(
-            "leading zeros in decimal integer literals are not permitted"
-        )
-    ):
-        return {}
 
     prev_str = statement.prev_token.string
     bad_str = statement.bad_token.string
     return proper_decimal_or_octal_number(prev_str, bad_str)
 
 
-@add_python_message
+@add_python_message(
+    exact=("did you forget parentheses around the comprehension target?",)
+)
 def forgot_paren_around_comprehension(message="", **_kwargs):
     # Python 3.10+
     _ = current_lang.translate
-    if message != "did you forget parentheses around the comprehension target?":
-        return {}
 
     # message same as from statement_analyzer.comprehension_condition_or_tuple
 
@@ -1229,13 +1273,11 @@ def forgot_paren_around_comprehension(message="", **_kwargs):
     return {"cause": cause_tuple, "suggest": hint}
 
 
-@add_python_message
+@add_python_message(exact=("multiple exception types must be parenthesized",))
 def parens_around_exceptions(message="", **_kwargs):
     # keep in sync with statement_analyzer.parens_around_exceptions
     _ = current_lang.translate
 
-    if message != "multiple exception types must be parenthesized":
-        return {}
 
     hint = _("Did you forget parentheses?\n")
     cause = _(
@@ -1246,13 +1288,10 @@ def parens_around_exceptions(message="", **_kwargs):
     return {"cause": cause + "\n", "suggest": hint}
 
 
-@add_python_message
+@add_python_message(exact=("expected ':'",))  # new in Python 3.10
 def colon_expected(message="", statement=None):
     _ = current_lang.translate
 
-    if message != "expected ':'":  # new in Python 3.10
-        return {}
-
     # Try to be consistent with older versions
     cause = statement_analyzer.missing_colon(statement)
     if cause:
@@ -1281,13 +1320,15 @@ def colon_expected(message="", statement=None):
     return {}
 
 
-@add_python_message
+NEVER_CLOSED = "'(.)' was never closed"  # new in Python 3.10
+
+
+@add_python_message(patterns=(NEVER_CLOSED,))
 def bracket_was_expected(message="", statement=None):
     _ = current_lang.translate
 
-    pattern = re.compile("'(.)' was never closed")  # new in Python 3.10
-    match = re.search(pattern, message)
-    if not match:
+    match = re.search(NEVER_CLOSED, message)
+    if match is None:
         return {}
 
     cause = _("Python tells us that the {bracket} was never closed.\n").format(
@@ -1302,30 +1343,27 @@ def bracket_was_expected(message="", statement=None):
     return {"cause": cause, "suggest": hint}
 
 
-@add_python_message
+@add_python_message(
+    exact=(
+        "f-string: can't use double starred expression here",  # 3.10.0a7
+        "f-string: cannot use double starred expression here",  # future?
+    )
+)
 def invalid_double_star_operator(message="", **_kwargs):
     _ = current_lang.translate
 
     # Used to be "invalid syntax" prior to Python version 3.10
-    if (
-        message == "f-string: can't use double starred expression here"  # 3.10.0a7
-        or message == "f-string: cannot use double starred expression here"  # future?
-    ):
-        cause = _(
-            "The double star operator `**` is likely interpreted to mean that\n"
-            "dict unpacking is to be used which is not allowed or does not make sense here.\n"
-        )
-        return {"cause": cause}
-
-    return {}
+    cause = _(
+        "The double star operator `**` is likely interpreted to mean that\n"
+        "dict unpacking is to be used which is not allowed or does not make sense here.\n"
+    )
+    return {"cause": cause}
 
 
-@add_python_message
+@add_python_message(exact=("invalid hexadecimal literal",))  # new in Python 3.10
 def invalid_hexadecimal_literal(message="", statement=None):
     _ = current_lang.translate
 
-    if message != "invalid hexadecimal literal":  # new in Python 3.10
-        return {}
     if not statement.highlighted_tokens:
         statement.highlighted_tokens = [statement.bad_token, statement.next_token]
 
@@ -1339,12 +1377,10 @@ def invalid_hexadecimal_literal(message="", statement=None):
     return statement_analyzer.invalid_hexadecimal(statement)
 
 
-@add_python_message
+@add_python_message(exact=("invalid decimal literal",))  # new in Python 3.10
 def invalid_decimal_literal(message="", statement=None):
     _ = current_lang.translate
 
-    if message != "invalid decimal literal":  # new in Python 3.10
-        return {}
     if not statement.highlighted_tokens:
         statement.highlighted_tokens = [statement.bad_token, statement.next_token]
 
@@ -1358,12 +1394,10 @@ def invalid_decimal_literal(message="", statement=None):
     return statement_analyzer.invalid_name(statement)
 
 
-@add_python_message
+@add_python_message(exact=("invalid imaginary literal",))  # new in Python 3.10
 def invalid_imaginary_literal(message="", statement=None):
     _ = current_lang.translate
 
-    if message != "invalid imaginary literal":  # new in Python 3.10
-        return {}
     if not statement.highlighted_tokens:
         statement.highlighted_tokens = [statement.bad_token, statement.next_token]
 
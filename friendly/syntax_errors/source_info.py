@@ -1,9 +1,13 @@
 """Contains a class that compiles and stores all the information that
 is relevant to the analysis of SyntaxErrors.
 """
+import bisect
 
+from itertools import islice
+
+from ..site_cache import LRUCache
 from ..source_cache import cache
-from .syntax_utils import matching_brackets
+from .syntax_utils import NEIGHBOURS, TOKEN_KINDS, matching_brackets
 from .. import debug_helper
 from .. import token_utils
 
@@ -17,6 +21,65 @@ from .. import token_utils
 # not have to verify the existence of these neighbours.
 MEANINGLESS_TOKEN = token_utils.tokenize(" ")[0]
 TOO_MANY_BLOCKS = "too many statically nested blocks"
+# Number of lines before a statement for which the preceding statements
+# are kept; format_statement() only shows the last 5 lines before it.
+CONTEXT_LINES = 20
+HIGHLIGHTED = frozenset(["highlighted_tokens"])
+
+
+class SourceIndex:
+    """The tokens of a source, stored as tuples, and the positions
+    of the tokens where statements begin, as found by
+    Statement.obtain_statement() for a line located after them.
+
+    When a source is modified in an editor, or a file is analyzed again,
+    the same index is used for all the errors found in it; it is also
+    shared by all the threads.
+    """
+
+    def __init__(self, source):
+        self.tokens = [
+            (tok.type, tok.string, tok.start, tok.end, tok.line)
+            for tok in token_utils.tokenize(source)
+        ]
+        self.starts = []  # index of the first token of each statement
+        self.start_rows = []
+        previous_row = -1
+        brackets = []
+        for index, (_type, string, start, _end, _line) in enumerate(self.tokens):
+            if start[0] > previous_row:
+                if not brackets:
+                    self.starts.append(index)
+                    self.start_rows.append(start[0])
+                previous_row = start[0]
+            if not string or string not in "()[]}{":
+                continue
+            if string in "([{":
+                brackets.append(string)
+            elif not brackets or not matching_brackets(brackets.pop(), string):
+                # Statement.obtain_statement() stops here.
+                break
+
+    def get_statement_start(self, linenumber):
+        """Returns the position of the last statement which begins at
+        or before a given line number, or -1 if there is none."""
+        return bisect.bisect_right(self.start_rows, linenumber) - 1
+
+
+source_indexes = LRUCache(maxsize=16)  # {(filename, content key): SourceIndex}
+
+
+def get_source_index(filename):
+    """Returns the SourceIndex of the source of a file, as found in the
+    source cache; it is only created again when the source changes."""
+    lines = cache.get_index(filename)
+    key = filename, lines.content_key
+    index = source_indexes.get(key)
+    if index is None:
+        # The extra line is the one added by cache.get_source_lines()
+        index = SourceIndex("".join(lines) + "\n")
+        source_indexes.set(key, index)
+    return index
 
 
 class Statement:
@@ -44,9 +107,11 @@ class Statement:
     on that statement, etc.) which are needed for some functions.
     """
 
-    def __init__(self, value, bad_line):
+    def __init__(self, value, bad_line, source_filename=None):
         # The basic information given by a SyntaxError
         self.filename = value.filename
+        # Name under which the source is found in the cache
+        self.source_filename = source_filename or self.filename
         self.linenumber = value.lineno
         self.message = value.msg
         self.offset = value.offset
@@ -87,7 +152,7 @@ class Statement:
         self.tokens = []  # meaningful tokens, used for error analysis; see docstring
         self.nb_tokens = 0  # number of meaningful tokens
         self.formatted_partial_source = ""
-        self.source_lines = []  # lines of code for the source
+        self.source_lines = []  # lines of code for the source; see get_source_line()
 
         self.statement_brackets = []  # keep track of ([{ anywhere in a statement
         self.begin_brackets = []  # unclosed ([{  before bad token
@@ -96,6 +161,8 @@ class Statement:
         self.first_token = None
         self.last_token = None
 
+        self.features = None  # see get_features()
+
         # When using the friendly console (repl), SyntaxError might prevent
         # closing all brackets to complete a statement. Knowing this can be
         # useful during the error analysis.
@@ -117,9 +184,9 @@ class Statement:
         to the statement where the error is located.
         """
         if self.linenumber is not None:
-            source_tokens = self.get_source_tokens()
+            source_tokens, previous_token = self.get_statement_tokens()
             # self.all_statements and self.statement_tokens are set in the following
-            self.obtain_statement(source_tokens)
+            self.obtain_statement(source_tokens, previous_token)
             self.tokens = self.remove_meaningless_tokens()
             if not self.tokens:
                 if len(self.all_statements) > 1:  # pragma: no cover
@@ -183,22 +250,83 @@ class Statement:
         ):  # pragma: no cover
             debug_helper.log("No meaningful tokens in source_info.Statement")
 
-    def get_source_tokens(self):
-        """Returns a list containing all the tokens from the source."""
-        source = ""
+    def get_statement_tokens(self):
+        """Returns an iterator over the tokens of the source, beginning with
+        the last statement starting before the line where the error is
+        located, and the token preceding them, if any. The values of
+        all_statements and prev_token are set as they would be if
+        obtain_statement() had scanned all the tokens preceding that statement.
+
+        The tokens are those of a SourceIndex, so that the source
+        does not need to be tokenized again for subsequent errors.
+        """
+        index = self.get_source_index()
+        position = index.get_statement_start(self.linenumber)
+        if position < 0:
+            return (token_utils.Token(token) for token in index.tokens), None
+        statement_start = index.starts[position]
+
+        # Only the last few statements are needed for the analysis
+        # and to format the statement with the preceding lines.
+        first = max(0, position - 3)
+        min_row = index.start_rows[position] - CONTEXT_LINES
+        while first > 0 and index.tokens[index.starts[first] - 1][3][0] >= min_row:
+            first -= 1
+        begin = index.starts[first]
+        # The previous meaningful token, which might be before these statements
+        prev_position = statement_start - 1
+        while prev_position >= 0:
+            _type, string = index.tokens[prev_position][:2]
+            if string.strip() and _type != token_utils.py_tokenize.COMMENT:
+                break
+            prev_position -= 1
+        if 0 <= prev_position < begin:
+            begin = prev_position
+
+        tokens = [
+            token_utils.Token(token)
+            for token in islice(index.tokens, begin, statement_start)
+        ]
+        if prev_position >= 0:
+            self.prev_token = tokens[prev_position - begin]
+        bounds = index.starts[first:position] + [statement_start]
+        self.all_statements = [
+            tokens[start - begin : end - begin]
+            for start, end in zip(bounds, bounds[1:])
+        ]
+        remaining = (
+            token_utils.Token(token)
+            for token in islice(index.tokens, statement_start, None)
+        )
+        return remaining, tokens[-1] if tokens else None
+
+    def get_source_index(self):
+        """Returns the SourceIndex of the source containing the error."""
         if "f-string: invalid syntax" in self.message:
-            source = self.bad_line
             try:
                 exec(self.bad_line)
             except SyntaxError as e:
                 self.offset = e.offset
                 self.linenumber = 1
-        if not source.strip():
-            self.source_lines = cache.get_source_lines(self.filename)
-            source = "".join(self.source_lines)
-            if not source.strip():
-                source = self.bad_line or "\n"
-        return token_utils.tokenize(source)
+            if self.bad_line.strip():
+                self.source_lines = [self.bad_line.rstrip("\n") + "\n"]
+                return SourceIndex(self.bad_line)
+        self.source_lines = cache.get_index(self.source_filename)
+        if self.source_lines.is_empty:
+            # For example, code compiled from a string which is not cached
+            self.source_lines = [(self.bad_line or "").rstrip("\n") + "\n"]
+            return SourceIndex(self.bad_line or "\n")
+        return get_source_index(self.source_filename)
+
+    def get_source_line(self, linenumber):
+        """Returns the line of the source with a given number, starting at 1,
+        or an empty line, ending with a newline character, if there is no
+        such line; like cache.get_source_lines(), this includes the line
+        following the last one, which is required when dealing with EOF
+        errors."""
+        if 0 < linenumber <= len(self.source_lines):
+            return self.source_lines[linenumber - 1]
+        return "\n"
 
     def assign_individual_token_values(self):
         """Assign values of previous and next to bad token and other
@@ -228,6 +356,46 @@ class Statement:
         else:
             self.next_token = MEANINGLESS_TOKEN
 
+    def get_features(self):
+        """Returns a frozenset of strings describing the statement, computed
+        once, which are used to skip the statement analyzers which could not
+        possibly find the cause of the error. They are written like the
+        conditions they stand for, for example::
+
+            "bad_token == ':'", "'for' in tokens", "prev_token.is_string()",
+            "is_operator(bad_token)", "bad_token == last_token", "end_bracket"
+
+        "highlighted_tokens" is only included while there are highlighted
+        tokens, as some message analyzers set them.
+        """
+        if self.features is None:
+            features = {f"{token.string!r} in tokens" for token in self.tokens}
+            for name in NEIGHBOURS + ("first_token", "last_token"):
+                token = getattr(self, name)
+                if token is not None:
+                    features.add(f"{name} == {token.string!r}")
+            for name in NEIGHBOURS:
+                token = getattr(self, name)
+                if token is None:
+                    continue
+                for kind in TOKEN_KINDS:
+                    if getattr(token, kind)():
+                        features.add(f"{name}.{kind}()")
+                if token_utils.is_operator(token):
+                    features.add(f"is_operator({name})")
+            if self.bad_token is not None:
+                if self.bad_token == self.prev_token:
+                    features.add("bad_token == prev_token")
+                if self.bad_token == self.last_token:
+                    features.add("bad_token == last_token")
+            for name in ("begin_brackets", "end_bracket", "fstring_error"):
+                if getattr(self, name):
+                    features.add(name)
+            self.features = frozenset(features)
+        if self.highlighted_tokens:
+            return self.features | HIGHLIGHTED
+        return self.features
+
     def format_statement(self):
         """Format the statement identified as causing the problem and possibly
         a couple of preceding statements, showing the line number and token identified.
@@ -283,12 +451,15 @@ class Statement:
 
         self.formatted_partial_source = "\n".join(new_lines)
 
-    def obtain_statement(self, source_tokens):
+    def obtain_statement(self, source_tokens, previous_token=None):
         """This method scans the source searching for the statement that
         caused the problem. Most often, it will be a single line of code.
         However, it might occasionally be a multiline statement that
         includes code surrounded by some brackets spanning multiple lines.
 
+        The scan can begin with any statement, preceded by previous_token,
+        as done by get_statement_tokens().
+
         It will set the following:
 
         - self.statement_tokens: a list of all the tokens in the problem statement
@@ -302,7 +473,6 @@ class Statement:
         """
 
         previous_row = -1
-        previous_token = None
         continuation_line = False
         # Some tokens cannot occur within brackets; if they are indicated as being
         # the offending token, it might be because we have an unclosed bracket.
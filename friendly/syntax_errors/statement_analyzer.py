@@ -24,10 +24,16 @@ def more_errors():
     )
 
 
-def add_statement_analyzer(func):
+def add_statement_analyzer(func=None, *, requires=()):
     """A simple decorator that adds a function to the list
-    of all functions that analyze a single statement."""
-    STATEMENT_ANALYZERS.append(func)
+    of all functions that analyze a single statement.
+
+    The function is skipped by analyze_statement() if the statement has
+    none of the features it requires; see syntax_utils.set_requirements().
+    """
+    if func is None:
+        return lambda func: add_statement_analyzer(func, requires=requires)
+    STATEMENT_ANALYZERS.append(syntax_utils.set_requirements(func, requires))
 
     # The following is needed if we wish to call explicitly
     # one of the functions below from another file.
@@ -58,11 +64,7 @@ def analyze_statement(statement):
         if cause:
             return cause
 
-    for analyzer in STATEMENT_ANALYZERS:
-        cause = analyzer(statement)
-        if cause:
-            return cause
-    return {}
+    return syntax_utils.run_analyzers(STATEMENT_ANALYZERS, statement, __name__)
 
 
 # ==================
@@ -71,7 +73,7 @@ def analyze_statement(statement):
 # ==================
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=(("end_bracket", "bad_token == last_token"),))
 def mismatched_brackets(statement):
     """Detecting code that ends with an unmatched closing bracket"""
     _ = current_lang.translate
@@ -80,7 +82,7 @@ def mismatched_brackets(statement):
 
     if not statement.statement_brackets:
         lineno = statement.end_bracket.start_row
-        source = f"\n    {lineno}: {statement.source_lines[lineno - 1]}"
+        source = f"\n    {lineno}: {statement.get_source_line(lineno)}"
         shift = len(str(lineno)) + statement.end_bracket.start_col + 6
         source += " " * shift + "^\n"
 
@@ -102,7 +104,7 @@ def mismatched_brackets(statement):
     end_bracket = statement.end_bracket
     end_lineno = end_bracket.start_row
 
-    source = f"\n    {open_lineno}: {statement.source_lines[open_lineno - 1]}"
+    source = f"\n    {open_lineno}: {statement.get_source_line(open_lineno)}"
     shift = len(str(open_lineno)) + open_bracket.start_col + 6
     if open_lineno == end_lineno:
         source += " " * shift + "^"
@@ -110,7 +112,7 @@ def mismatched_brackets(statement):
         source += " " * shift + "^\n"
     else:
         source += " " * shift + "^\n"
-        source += f"    {end_lineno}: {statement.source_lines[end_lineno - 1]}"
+        source += f"    {end_lineno}: {statement.get_source_line(end_lineno)}"
         shift = len(str(end_lineno)) + end_bracket.start_col + 6
         source += " " * shift + "^\n"
 
@@ -129,7 +131,7 @@ def mismatched_brackets(statement):
     return {"cause": cause}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("first_token == '>>'", "first_token == '...'"))
 def copy_pasted_code(statement):
     """Detecting code that starts with a Python prompt"""
     _ = current_lang.translate
@@ -163,7 +165,7 @@ def copy_pasted_code(statement):
     return {}  # pragma: no cover
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == '`'",))
 def detect_backquote(statement):
     """Detecting if the error is due to using `x` which was allowed
     in Python 2.
@@ -181,7 +183,7 @@ def detect_backquote(statement):
     return {}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == ':'",))
 def wrong_code_block(statement):
     _ = current_lang.translate
     if not (
@@ -224,7 +226,7 @@ def wrong_code_block(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("prev_token == '.'",))
 def keyword_as_attribute(statement):
     """Will identify something like  obj.True ..."""
     _ = current_lang.translate
@@ -243,7 +245,13 @@ def keyword_as_attribute(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(
+    requires=(
+        "bad_token == 'elseif'",
+        "prev_token == 'elseif'",
+        ("bad_token == 'if'", "prev_token == 'else'"),
+    )
+)
 def confused_elif(statement):
     _ = current_lang.translate
     name = None
@@ -263,7 +271,7 @@ def confused_elif(statement):
     return {}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == 'from'",))
 def import_from(statement):
     _ = current_lang.translate
     if statement.bad_token != "from" or statement.tokens[0] != "import":
@@ -285,7 +293,7 @@ def import_from(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("prev_token.is_string()",))
 def misplaced_quote(statement):
     """This looks for a misplaced quote, something like
        info = 'don't ...
@@ -345,7 +353,7 @@ def detect_walrus(statement):
     return {}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("is_operator(bad_token)",))
 def inverted_operators(statement):
     """Detect if operators might have been inverted"""
     _ = current_lang.translate
@@ -399,7 +407,9 @@ def inverted_operators(statement):
     return {"cause": cause + more_errors(), "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(
+    requires=(("is_operator(bad_token)", "is_operator(prev_token)"),)
+)
 def consecutive_operators(statement):
     _ = current_lang.translate
     is_op = token_utils.is_operator
@@ -472,7 +482,7 @@ def walrus_instead_of_equal(statement):
     return {}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == '='", "next_token == '='"))
 def assign_instead_of_equal(statement):
     """Checks to see if an assignment sign, '=', has been used instead of
     an equal sign, '==', in an if, elif or while statement."""
@@ -512,7 +522,7 @@ def assign_instead_of_equal(statement):
     return {"cause": cause + additional_cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("first_token == 'print'",))
 def print_as_statement(statement):
     # example: print len('hello')
     _ = current_lang.translate
@@ -547,7 +557,13 @@ def print_as_statement(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(
+    requires=(
+        "first_token == 'pip'",
+        "first_token == 'python'",
+        "first_token == 'python3'",
+    )
+)
 def calling_python_or_pip(statement):
     _ = current_lang.translate
     if statement.first_token.string not in ("pip", "python", "python3"):
@@ -578,7 +594,7 @@ def calling_python_or_pip(statement):
     return {"cause": cause}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("prev_token == '.'",))
 def dot_followed_by_bracket(statement):
     _ = current_lang.translate
 
@@ -598,7 +614,7 @@ def dot_followed_by_bracket(statement):
     return {"cause": cause}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("first_token == 'raise'",))
 def raise_single_exception(statement):
     _ = current_lang.translate
     if statement.first_token != "raise":
@@ -612,7 +628,7 @@ def raise_single_exception(statement):
     return {}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == '**'",))
 def invalid_double_star_operator(statement):
     _ = current_lang.translate
 
@@ -626,7 +642,7 @@ def invalid_double_star_operator(statement):
     return {}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == last_token",))
 def missing_colon(statement):
     """look for missing colon at the end of statement"""
     _ = current_lang.translate
@@ -680,7 +696,7 @@ def missing_colon(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == ';'",))
 def semi_colon_instead_of_comma(statement):
     """Writing a semi colon as a typo"""
     _ = current_lang.translate
@@ -767,7 +783,7 @@ def invalid_octal(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("prev_token.is_number()", "highlighted_tokens"))
 def invalid_name(statement):
     """Identifies invalid identifiers when a name begins with a number"""
     _ = current_lang.translate
@@ -819,7 +835,7 @@ def invalid_name(statement):
     return {"cause": cause + hint + "\n" + note, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("fstring_error",))
 def debug_fstring(statement):
     """Detect debug feature of f-string introduced in Python 3.8"""
     _ = current_lang.translate
@@ -844,7 +860,7 @@ def debug_fstring(statement):
     return {}  # pragma: no cover
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("fstring_error",))
 def general_fstring_problem(statement):  # pragma: no cover
     # General f-string problems are outside of our main priorities.
     _ = current_lang.translate
@@ -858,7 +874,12 @@ def general_fstring_problem(statement):  # pragma: no cover
     return {"cause": cause}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(
+    requires=(
+        ("bad_token == '='", "prev_token.is_keyword()"),
+        ("bad_token.is_keyword()", "next_token == '='"),
+    )
+)
 def assign_to_a_keyword(statement):
     """Checks to see if line is of the form 'keyword = ...'"""
     _ = current_lang.translate
@@ -877,7 +898,7 @@ def assign_to_a_keyword(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == '('",))
 def lambda_with_paren(statement):
     _ = current_lang.translate
 
@@ -910,7 +931,9 @@ def lambda_with_paren(statement):
     return {"cause": cause}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(
+    requires=("bad_token.is_identifier()", "next_token.is_identifier()")
+)
 def wrong_type_declaration(statement):
     _ = current_lang.translate
 
@@ -956,7 +979,9 @@ def wrong_type_declaration(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(
+    requires=(("begin_brackets", "bad_token == ':'", "prev_token.is_string()"),)
+)
 def missing_comma_before_string_in_dict(statement):
     """Special case where keys and values in a dict are strings which are
     not separated by commas."""
@@ -992,7 +1017,7 @@ def missing_comma_before_string_in_dict(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("'for' in tokens",))
 def missing_in_with_for(statement):
     """Whenever we have a 'for' keyword, there should be a corresponding
     'in' keyword. Cases where 'in' have been misspelled are taken care below.
@@ -1030,7 +1055,7 @@ def missing_in_with_for(statement):
     return {}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=(("prev_token == 'range'", "last_token == ':'"),))
 def missing_parens_for_range(statement):
     _ = current_lang.translate
 
@@ -1088,7 +1113,7 @@ def misspelled_python_keyword(tokens, bad_token):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("begin_brackets",))
 def comprehension_condition_or_tuple(statement):
     _ = current_lang.translate
     if not statement.begin_brackets:
@@ -1143,7 +1168,7 @@ def comprehension_condition_or_tuple(statement):
     return {"cause": cause}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=(("bad_token == ','", "first_token == 'except'"),))
 def parens_around_exceptions(statement):
     # keep in sync with message_analyzer.parens_around_exceptions
     _ = current_lang.translate
@@ -1164,7 +1189,7 @@ def parens_around_exceptions(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token.is_name()",))
 def current_is_misspelled_python_keyword(statement):
     _ = current_lang.translate
 
@@ -1173,7 +1198,7 @@ def current_is_misspelled_python_keyword(statement):
     return misspelled_python_keyword(statement.tokens, statement.bad_token)
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("prev_token.is_name()",))
 def previous_is_misspelled_python_keyword(statement):
     _ = current_lang.translate
 
@@ -1182,7 +1207,9 @@ def previous_is_misspelled_python_keyword(statement):
     return misspelled_python_keyword(statement.tokens, statement.prev_token)
 
 
-@add_statement_analyzer
+@add_statement_analyzer(
+    requires=("bad_token.is_identifier()", "next_token.is_identifier()")
+)
 def space_in_variable_name(statement):
     # Looking for spaces in variable name assignments, like
     # my name = André
@@ -1217,7 +1244,12 @@ def space_in_variable_name(statement):
     return {}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(
+    requires=(
+        ("bad_token.is_string()", "prev_token == 'bf'"),
+        ("bad_token.is_string()", "prev_token == 'fb'"),
+    )
+)
 def impossible_binary_fstring(statement):
     _ = current_lang.translate
     if (
@@ -1273,7 +1305,16 @@ def _comma_first_cause(bracket):
     )
 
 
-@add_statement_analyzer
+# Tokens between which a comma could be missing; with Python 3.10,
+# these may be the bad and next tokens instead of the previous and bad ones.
+MISSING_COMMA_OR_OPERATOR = tuple(
+    f"{name}.{kind}()"
+    for name in ("bad_token", "prev_token", "next_token")
+    for kind in ("is_identifier", "is_number", "is_string")
+)
+
+
+@add_statement_analyzer(requires=MISSING_COMMA_OR_OPERATOR)
 def missing_comma_or_operator(statement):
     """Check to see if a comma or other operator
     is possibly missing between identifiers, or numbers, or both.
@@ -1361,7 +1402,7 @@ def missing_comma_or_operator(statement):
     return {"cause": cause, "suggest": hint}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=(("begin_brackets", "bad_token == '='"),))
 def equal_instead_of_colon_in_dict(statement):
     _ = current_lang.translate
 
@@ -1381,7 +1422,7 @@ def equal_instead_of_colon_in_dict(statement):
     return {"cause": cause}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == 'and'",))
 def and_instead_of_comma(statement):
     # Example: from math import sin and cos
     _ = current_lang.translate
@@ -1413,7 +1454,7 @@ def and_instead_of_comma(statement):
     return {}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=(("bad_token == 'as'", "first_token == 'from'"),))
 def from_import_as(statement):
     """from module import ... as ..., with 'as' flagged as the bad token"""
     _ = current_lang.translate
@@ -1437,7 +1478,7 @@ def from_import_as(statement):
     return {"cause": cause}
 
 
-@add_statement_analyzer
+@add_statement_analyzer(requires=("bad_token == prev_token",))
 def duplicate_token(statement):
     _ = current_lang.translate
     if statement.bad_token != statement.prev_token:
@@ -1479,7 +1520,7 @@ def extra_token(statement):
 
 
 # Keep last
-@add_statement_analyzer
+@add_statement_analyzer(requires=("begin_brackets",))
 def unclosed_bracket(statement):
     _ = current_lang.translate
     if not statement.begin_brackets:
@@ -1490,7 +1531,7 @@ def unclosed_bracket(statement):
     start_col = bracket.start_col
 
     bracket_name = syntax_utils.name_bracket(bracket)
-    source = f"\n    {linenumber}: {statement.source_lines[linenumber - 1]}"
+    source = f"\n    {linenumber}: {statement.get_source_line(linenumber)}"
     shift = len(str(linenumber)) + start_col + 6
     source += " " * shift + "^\n"
 
@@ -1,6 +1,39 @@
 """This file contains various functions used for analysis of SyntaxErrors"""
+import re
+import threading
 
+from ..context import check_deadline
 from ..my_gettext import current_lang
+from .. import fingerprint
+
+# Tokens, and Token methods, used to describe a statement by its features;
+# see source_info.Statement.get_features()
+NEIGHBOURS = ("bad_token", "prev_token", "next_token")
+TOKEN_KINDS = (
+    "is_identifier",
+    "is_keyword",
+    "is_name",
+    "is_number",
+    "is_operator",
+    "is_string",
+)
+_STRING = r"""(?:'.+'|".+")"""
+_NEIGHBOUR = "(?:{})".format("|".join(NEIGHBOURS))
+_TOKEN = "(?:{})".format("|".join(NEIGHBOURS + ("first_token", "last_token")))
+# The features which statement analyzers can require; see set_requirements().
+FEATURE = re.compile(
+    "|".join(
+        [
+            rf"{_STRING} in tokens",
+            rf"{_TOKEN} == {_STRING}",
+            r"{}\.(?:{})\(\)".format(_NEIGHBOUR, "|".join(TOKEN_KINDS)),
+            rf"is_operator\({_NEIGHBOUR}\)",
+            r"bad_token == (?:prev|last)_token",
+            r"begin_brackets|end_bracket|fstring_error|highlighted_tokens",
+        ]
+    ),
+    re.DOTALL,
+)
 
 
 def matching_brackets(bra, ket):
@@ -22,3 +55,79 @@ def name_bracket(bracket):
         "}": _("curly bracket `}`"),
     }
     return names[str(bracket)]  # bracket could be a Token or a str
+
+
+class AnalyzerCalls:
+    """Number of statement analyzers called, and of those skipped since the
+    statement did not have the features they require, for each module."""
+
+    def __init__(self):
+        self.called = {}
+        self.skipped = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, called, skipped):
+        with self._lock:
+            self.called[name] = self.called.get(name, 0) + called
+            self.skipped[name] = self.skipped.get(name, 0) + skipped
+
+    def clear(self):
+        with self._lock:
+            self.called.clear()
+            self.skipped.clear()
+
+    def as_dict(self):
+        """Returns a dict of the form {name: {"called": n, "skipped": m}}."""
+        with self._lock:
+            return {
+                name: {"called": called, "skipped": self.skipped[name]}
+                for name, called in self.called.items()
+            }
+
+
+analyzer_calls = AnalyzerCalls()
+
+
+def set_requirements(func, requires):
+    """Records the features of a statement, as given by
+    Statement.get_features(), which a statement analyzer requires.
+    Each item of requires is either a single feature or a tuple
+    of features which must all be present; the analyzer is only called
+    if at least one of them is found. An empty requires means
+    that the analyzer is always called.
+
+    Features are checked against the forms given by FEATURE, so that a
+    misspelled one, which would never be found, raises a ValueError.
+    """
+    func.required_features = tuple(
+        frozenset([item] if isinstance(item, str) else item) for item in requires
+    )
+    for item in func.required_features:
+        for feature in item or [""]:
+            if not FEATURE.fullmatch(feature):
+                raise ValueError(
+                    f"Unknown feature {feature!r} required by {func.__name__}()."
+                )
+    return func
+
+
+def run_analyzers(analyzers, statement, name):
+    """Calls the analyzers, in the order in which they are listed, until one
+    of them finds the cause of the error, which is returned. The analyzers
+    whose required features are absent from the statement are skipped."""
+    features = statement.get_features()
+    called = skipped = 0
+    cause = {}
+    for analyzer in analyzers:
+        required = analyzer.required_features
+        if required and not any(item <= features for item in required):
+            skipped += 1
+            continue
+        check_deadline()
+        called += 1
+        cause = analyzer(statement)
+        if cause:
+            cause = fingerprint.record_analyzer(cause, analyzer)
+            break
+    analyzer_calls.add(name, called, skipped)
+    return cause or {}
@@ -0,0 +1,126 @@
+"""timing.py
+
+Optional instrumentation used to find out where time is spent when
+explaining exceptions. When enabled, the wall time and the number of
+calls of each stage of the analysis are recorded for each explanation,
+as well as for the entire session. Functions ("sinks") can also be
+added to receive the duration of each stage as it is recorded.
+
+Times are inclusive: the time of a stage includes that of the stages
+called from it. When disabled, the overhead is a single test per stage.
+"""
+import functools
+import threading
+import time
+
+from contextlib import contextmanager
+
+from . import debug_helper
+from .context import ContextVar, temporary_value
+
+enabled = False
+
+_sinks = []
+_lock = threading.Lock()
+# Timings of the explanation currently being computed.
+_current = ContextVar("friendly_timings", default=None)
+
+
+class Timings:
+    """Total time, in seconds, and number of calls for each stage."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.counts = {}
+
+    def add(self, stage_name, seconds):
+        self.seconds[stage_name] = self.seconds.get(stage_name, 0) + seconds
+        self.counts[stage_name] = self.counts.get(stage_name, 0) + 1
+
+    def clear(self):
+        self.seconds.clear()
+        self.counts.clear()
+
+    def as_dict(self):
+        """Returns a dict of the form {stage: {"count": n, "seconds": s}}."""
+        return {
+            name: {"count": self.counts[name], "seconds": seconds}
+            for name, seconds in self.seconds.items()
+        }
+
+
+session_timings = Timings()
+
+
+def enable(value=True):
+    """Enables or disables the instrumentation."""
+    global enabled
+    enabled = value
+
+
+def add_sink(sink):
+    """Adds a function called as sink(stage_name, seconds) each time
+    the duration of a stage is recorded."""
+    _sinks.append(sink)
+
+
+def remove_sink(sink):
+    _sinks.remove(sink)
+
+
+def record(stage_name, seconds):
+    """Records the duration of a stage."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage_name, seconds)
+    with _lock:
+        session_timings.add(stage_name, seconds)
+    for sink in _sinks:
+        try:
+            sink(stage_name, seconds)
+        except Exception as e:  # pragma: no cover
+            debug_helper.log("Exception raised by timing sink.")
+            debug_helper.log_error(e)
+
+
+@contextmanager
+def collect(timings):
+    """Within a ``with`` block, durations are added to timings, which
+    are those of a given explanation."""
+    if not enabled:
+        yield
+        return
+    with temporary_value(_current, timings):
+        yield
+
+
+@contextmanager
+def stage(stage_name):
+    """Records the time taken by the code within a ``with`` block."""
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage_name, time.perf_counter() - start)
+
+
+def timed(stage_name):
+    """Decorator recording the time taken by each call of a function."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(stage_name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
@@ -5,17 +5,89 @@ A collection of useful functions and methods to deal with tokenizing
 source code.
 """
 import ast
+import functools
 import keyword
+import re
 import tokenize as py_tokenize
 import sys
 
 from io import StringIO
 
 from . import debug_helper
+from .context import get_cache
+from .site_cache import memoize
 
 _token_format = "type={type}  string={string}  start={start}  end={end}  line={line}"
 
 
+# Flags classifying the string of a token, computed by classify().
+KEYWORD = 1
+IDENTIFIER = 2
+INTEGER = 4
+FLOAT = 8
+COMPLEX = 16
+ASSIGNMENT = 32
+BITWISE = 64
+COMPARISON = 128
+MATH_OP = 256
+PART_OP = 512
+OPERATOR = ASSIGNMENT | BITWISE | COMPARISON | MATH_OP | PART_OP
+
+ASSIGNMENT_OPS = frozenset(
+    ("=", "+=", "-=", "*=", "@=", "/=", "//=", "%=", "**=", ">>=", "<<=")
+    + ("&=", "^=", "|=")
+    + ((":=",) if sys.version_info >= (3, 8) else ())
+)
+BITWISE_OPS = frozenset(("^", "&", "|", "<<", ">>", "~"))
+COMPARISON_OPS = frozenset(("<", ">", "<=", ">=", "==", "!="))
+MATH_OPS = frozenset(("+", "-", "*", "**", "@", "/", "//", "%"))
+PART_OPS = frozenset(("!", ":"))
+SPACE_TYPES = frozenset(
+    (
+        py_tokenize.INDENT,
+        py_tokenize.DEDENT,
+        py_tokenize.NEWLINE,
+        py_tokenize.NL,
+        py_tokenize.ENDMARKER,
+    )
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def classify(type_, string):
+    """Returns the flags describing a token of a given type and string.
+
+    Since the same strings occur many times in a source, the result is cached.
+    """
+    flags = 0
+    if keyword.iskeyword(string) or string in ("__debug__", "..."):
+        flags |= KEYWORD
+    elif string.isidentifier():
+        flags |= IDENTIFIER
+    if type_ == py_tokenize.NUMBER:
+        try:
+            value = ast.literal_eval(string)
+        except Exception:  # noqa
+            value = None
+        if isinstance(value, complex):
+            flags |= COMPLEX
+        elif isinstance(value, float):
+            flags |= FLOAT
+        elif isinstance(value, int):
+            flags |= INTEGER
+    if string in ASSIGNMENT_OPS:
+        flags |= ASSIGNMENT
+    elif string in BITWISE_OPS:
+        flags |= BITWISE
+    elif string in COMPARISON_OPS:
+        flags |= COMPARISON
+    elif string in MATH_OPS:
+        flags |= MATH_OP
+    elif string in PART_OPS:
+        flags |= PART_OP
+    return flags
+
+
 class Token:
     """Token as generated from Python's tokenize.generate_tokens written here in
     a more convenient form, and with some custom methods.
@@ -32,14 +104,42 @@ class Token:
     we can change the value of any token's attribute, untokenize the list and
     automatically obtain a transformed source. Almost always, the attribute
     to be transformed will be the string attribute.
+
+    Whole files are tokenized when analyzing a SyntaxError; to reduce
+    the memory used, tokens have no ``__dict__``. The flags classifying
+    their string are computed when first needed, and again only if
+    the string is changed.
     """
 
+    __slots__ = (
+        "type",
+        "string",
+        "start",
+        "start_row",
+        "start_col",
+        "end",
+        "end_row",
+        "end_col",
+        "line",
+        "_flags",
+        "_flags_string",
+    )
+
     def __init__(self, token):
         self.type = token[0]
         self.string = token[1]
         self.start = self.start_row, self.start_col = token[2]
         self.end = self.end_row, self.end_col = token[3]
         self.line = token[4]
+        self._flags_string = None
+
+    @property
+    def flags(self):
+        """Flags, such as KEYWORD or FLOAT, classifying the string attribute."""
+        if self._flags_string is not self.string:
+            self._flags = classify(self.type, self.string)
+            self._flags_string = self.string
+        return self._flags
 
     def copy(self):
         """Makes a copy of a given token"""
@@ -90,7 +190,7 @@ class Token:
         Note: this is different from Python's string method ``isidentifier``
         which also returns ``True`` if the string is a keyword.
         """
-        return self.string.isidentifier() and not self.is_keyword()
+        return bool(self.flags & IDENTIFIER)
 
     def is_name(self):
         """Returns ``True`` if the token is a type NAME"""
@@ -98,7 +198,7 @@ class Token:
 
     def is_keyword(self):
         """Returns True if the token represents a Python keyword."""
-        return keyword.iskeyword(self.string) or self.string in ["__debug__", "..."]
+        return bool(self.flags & KEYWORD)
 
     def is_number(self):
         """Returns True if the token represents a number of any type"""
@@ -110,15 +210,15 @@ class Token:
 
     def is_float(self):
         """Returns True if the token represents a float"""
-        return self.is_number() and isinstance(ast.literal_eval(self.string), float)
+        return bool(self.flags & FLOAT)
 
     def is_integer(self):
         """Returns True if the token represents an integer"""
-        return self.is_number() and isinstance(ast.literal_eval(self.string), int)
+        return bool(self.flags & INTEGER)
 
     def is_complex(self):
         """Returns True if the token represents a complex number"""
-        return self.is_number() and isinstance(ast.literal_eval(self.string), complex)
+        return bool(self.flags & COMPLEX)
 
     def is_space(self):
         """Returns True if the token indicates a change in indentation,
@@ -128,13 +228,7 @@ class Token:
         Note that spaces, including tab characters ``\\t``, between tokens
         on a given line are not considered to be tokens themselves.
         """
-        return self.type in (
-            py_tokenize.INDENT,
-            py_tokenize.DEDENT,
-            py_tokenize.NEWLINE,
-            py_tokenize.NL,
-            py_tokenize.ENDMARKER,
-        )
+        return self.type in SPACE_TYPES
 
     def is_string(self):
         """Returns True if the token is a string"""
@@ -157,62 +251,42 @@ class Token:
         return other.immediately_before(self)
 
 
+def _get_flags(op):
+    """Returns the flags of op, a string or a Token."""
+    if isinstance(op, Token):
+        return op.flags
+    if isinstance(op, str):
+        return classify(py_tokenize.OP, op)
+    return classify(py_tokenize.OP, getattr(op, "string", ""))
+
+
 def is_assignment(op):
     """Returns True if op (string or Token) is an assigment or augmented assignment."""
-    ops = [
-        "=",
-        "+=",
-        "-=",
-        "*=",
-        "@=",
-        "/=",
-        "//=",
-        "%=",
-        "**=",
-        ">>=",
-        "<<=",
-        "&=",
-        "^=",
-        "|=",
-    ]
-    if sys.version_info >= (3, 8):
-        ops.append(":=")
-    return op in ops or (hasattr(op, "string") and op.string in ops)
+    return bool(_get_flags(op) & ASSIGNMENT)
 
 
 def is_bitwise(op):
     """Returns True if op (string or Token) is a bitwise operator."""
-    ops = ["^", "&", "|", "<<", ">>", "~"]
-    return op in ops or (hasattr(op, "string") and op.string in ops)
+    return bool(_get_flags(op) & BITWISE)
 
 
 def is_comparison(op):
     """Returns True if op (string or Token) is a comparison operator."""
-    ops = ["<", ">", "<=", ">=", "==", "!="]
-    return op in ops or (hasattr(op, "string") and op.string in ops)
+    return bool(_get_flags(op) & COMPARISON)
 
 
 def is_math_op(op):
     """Returns True if op (string or Token) is an operator that can be used
     as a binary operator in a mathematical operation.
     """
-    ops = ["+", "-", "*", "**", "@", "/", "//", "%"]
-    return op in ops or (hasattr(op, "string") and op.string in ops)
+    return bool(_get_flags(op) & MATH_OP)
 
 
 def is_operator(op):
     """Returns True if op (string or token) is or could be part of one
     of the following: assigment operator, mathematical operator,
     bitwise operator, comparison operator."""
-    part_ops = ["!", ":"]
-    return (
-        is_assignment(op)
-        or is_bitwise(op)
-        or is_comparison(op)
-        or is_math_op(op)
-        or op in part_ops
-        or (hasattr(op, "string") and op.string in part_ops)
-    )
+    return bool(_get_flags(op) & OPERATOR)
 
 
 def fix_empty_line(source, tokens):
@@ -238,6 +312,13 @@ def tokenize(source):
     If an exception is raised by Python's tokenize module, the list of tokens
     accumulated up to that point is returned.
     """
+    # When explaining many exceptions, the same source is often tokenized
+    # many times. Tokens can be modified by the caller, so we only
+    # cache the values from which they are created.
+    cache = get_cache("tokenize")
+    if cache is not None and source in cache:
+        return [Token(tok) for tok in cache[source]]
+
     tokens = []
 
     try:
@@ -267,6 +348,10 @@ def tokenize(source):
     if source.endswith((" ", "\t")):
         fix_empty_line(source, tokens)
 
+    if cache is not None:
+        cache[source] = [
+            (tok.type, tok.string, tok.start, tok.end, tok.line) for tok in tokens
+        ]
     return tokens
 
 
@@ -320,8 +405,69 @@ def get_lines(source):
     return lines
 
 
-def strip_comment(line):
-    """Removes comments from a line"""
+# Characters which need to be examined when looking for a comment
+# in a line without tokenizing it.
+_SPECIAL_CHARS = re.compile(r"""[#'"()\[\]{}\n\\$?`!]|[^\x00-\x7f]""")
+_UNUSUAL_CHARS = re.compile(r"[\r\f\v\x00]")
+_STRINGS = {
+    '"': re.compile(r'"(?:\\.|[^"\\\n])*"'),
+    "'": re.compile(r"'(?:\\.|[^'\\\n])*'"),
+    '"""': re.compile(r'"""(?:\\.|[^\\])*?"""', re.DOTALL),
+    "'''": re.compile(r"'''(?:\\.|[^\\])*?'''", re.DOTALL),
+}
+
+
+# The result of the tokenizer can only be predicted before Python 3.12.
+_TOKENIZE_ALL_LINES = sys.version_info >= (3, 12)
+
+
+def _find_comment(line):
+    """Returns the index where a comment begins in a single line of code,
+    or its length if it has no comment. Returns None if the line is not
+    one whose tokens can easily be predicted: for example, if it
+    contains an unclosed string or bracket or a continuation character.
+    """
+    if not line.strip() or "\n" in line[:-1] or _UNUSUAL_CHARS.search(line):
+        return None
+    depth = 0
+    position = 0
+    while True:
+        match = _SPECIAL_CHARS.search(line, position)
+        if match is None:
+            break
+        char = match.group()
+        start = match.start()
+        if char == "#":
+            break
+        if char in "\"'":
+            quote = char * 3 if line.startswith(char * 3, start) else char
+            string = _STRINGS[quote].match(line, start)
+            if string is None:
+                return None
+            position = string.end()
+            continue
+        if char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+            if depth < 0:
+                return None
+        elif char == "!" and line.startswith("!=", start):
+            position = start + 2
+            continue
+        elif char != "\n":
+            return None
+        position = start + 1
+    if match is None:
+        return None if depth else len(line)
+    # A backslash in a comment can change the result of untokenize()
+    if depth or "\\" in line[start:]:
+        return None
+    return start
+
+
+def _strip_comment_tokens(line):
+    """Removes comments from a line, using the tokenizer."""
     tokens = []
     try:
         for tok in py_tokenize.generate_tokens(StringIO(line).readline):
@@ -334,22 +480,96 @@ def strip_comment(line):
     return untokenize(tokens)
 
 
+@memoize("strip_comment")
+def strip_comment(line):
+    """Removes comments from a line.
+
+    The result is the same as that obtained by removing comment tokens
+    and untokenizing the line: a comment is only removed, together with
+    the spaces before it, if the line does not end with a newline.
+    Since this function is called for many candidate lines when analyzing
+    a SyntaxError, simple lines are handled without tokenizing them.
+
+    This is only done before Python 3.12: since then, the tokenizer
+    reports errors for invalid literals and splits f-strings, and the
+    NEWLINE token records the whole line, comment included.
+    """
+    if _TOKENIZE_ALL_LINES:
+        return _strip_comment_tokens(line)
+    comment = _find_comment(line)
+    if comment is None:
+        return _strip_comment_tokens(line)
+    if line.endswith("\n"):
+        return line
+    code = line[:comment].rstrip(" \t")
+    return code if code.strip() else line
+
+
+def _get_strings(source):
+    """Returns the strings of the significant tokens of a source (str);
+    a list of tokens is used as given."""
+    if isinstance(source, str):
+        source = get_significant_tokens(source)
+    return [str(tok) for tok in source]
+
+
+class TokenPattern:
+    """Sequence of tokens which can be searched for in many sources,
+    in a time proportional to their number of tokens, using the
+    Knuth-Morris-Pratt algorithm.
+
+    The pattern is a source (str), whose significant tokens are used,
+    or a list of tokens or strings.
+    """
+
+    def __init__(self, pattern):
+        self.strings = _get_strings(pattern)
+        # self.fallback[i]: length of the longest proper prefix of
+        # self.strings[: i + 1] which is also a suffix of it.
+        self.fallback = [0] * len(self.strings)
+        length = 0
+        for i in range(1, len(self.strings)):
+            while length and self.strings[i] != self.strings[length]:
+                length = self.fallback[length - 1]
+            if self.strings[i] == self.strings[length]:
+                length += 1
+            self.fallback[i] = length
+
+    def find(self, main):
+        """Returns the index of the first token of the first occurrence
+        of the pattern in main, or -1 if it is not found or is empty.
+
+        main is a source (str), in which case the index is that of
+        its significant tokens, or a list of tokens, such as
+        ``Statement.tokens``, which is used as given.
+        """
+        strings = self.strings
+        if not strings:
+            return -1
+        length = 0
+        for index, string in enumerate(_get_strings(main)):
+            while length and string != strings[length]:
+                length = self.fallback[length - 1]
+            if string == strings[length]:
+                length += 1
+                if length == len(strings):
+                    return index - length + 1
+        return -1
+
+
 def find_substring_index(main, substring):
     """Somewhat similar to the find() method for strings,
     this function determines if the tokens for substring appear
     as a subsequence of the tokens for main. If so, the index
     of the first token in returned, otherwise -1 is returned.
+
+    Each argument can be a source (str), whose significant tokens are
+    used, or a list of tokens; substring can also be a TokenPattern,
+    to search for the same tokens in many sources.
     """
-    main_tokens = [tok.string for tok in get_significant_tokens(main)]
-    sub_tokens = [tok.string for tok in get_significant_tokens(substring)]
-    for index, token in enumerate(main_tokens):
-        if token == sub_tokens[0]:
-            for i, tok in enumerate(main_tokens[index : index + len(sub_tokens)]):
-                if tok != sub_tokens[i]:
-                    break
-            else:
-                return index
-    return -1
+    if not isinstance(substring, TokenPattern):
+        substring = TokenPattern(substring)
+    return substring.find(main)
 
 
 def dedent(tokens, nb):
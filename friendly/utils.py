@@ -8,8 +8,14 @@ import uuid
 
 import pure_eval
 from . import debug_helper
+from .context import check_deadline, get_cache
+from .fingerprint import record_analyzer
 from .my_gettext import no_information, internal_error
 
+# Number of words compared with a word with a typo between two checks
+# of the time budget.
+WORDS_PER_CHECK = 500
+
 
 class RuntimeMessageParser:
     """Used to collect message parsers and cycle through them in
@@ -38,10 +44,11 @@ class RuntimeMessageParser:
     def _get_cause(self, value_or_message, frame, tb_data):
         """Cycle through the parsers, looking for one that can find a cause."""
         for self.current_parser in self.parsers:
+            check_deadline()
             # This could be simpler if we could use the walrus operator
             cause = self.current_parser(value_or_message, frame, tb_data)
             if cause:
-                return cause
+                return record_analyzer(cause, self.current_parser)
         return {"cause": no_information()}
 
 
@@ -101,11 +108,32 @@ def get_similar_words(word_with_typo, words):
     We also do not return any matches for single character variables,
     nor do we consider single character variable potential matches.
     """
+    cache = get_cache("similar_words")
+    if cache is None:
+        return _find_similar_words(word_with_typo, words)
+    key = word_with_typo, tuple(words)
+    if key not in cache:
+        cache[key] = _find_similar_words(word_with_typo, words)
+    return list(cache[key])
+
+
+def _find_similar_words(word_with_typo, words):
+    """Does the work for get_similar_words()."""
     if len(word_with_typo) == 1:
         return []
     words = [word for word in words if len(word) > 1]
 
-    get = difflib.get_close_matches
+    def get(word, words, n, cutoff):
+        # The best matches of each part of the list include the best
+        # matches of the entire list, which are selected in the same way.
+        matches = []
+        for start in range(0, len(words), WORDS_PER_CHECK):
+            check_deadline()
+            part = words[start : start + WORDS_PER_CHECK]
+            matches.extend(difflib.get_close_matches(word, part, n=n, cutoff=cutoff))
+        if len(words) <= WORDS_PER_CHECK:
+            return matches
+        return difflib.get_close_matches(word, matches, n=n, cutoff=cutoff)
 
     cutoff = min(0.8, 0.63 + 0.01 * len(word_with_typo))
     if len(word_with_typo) > 2:
@@ -0,0 +1,56 @@
+"""Compares the time taken to explain many exceptions, one at a time
+using explain_traceback(), with the time taken by explain_many().
+
+Usage:
+
+    python tests/bench_explain_many.py
+"""
+import math
+import os
+import sys
+import time
+
+this_dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(this_dir, ".."))
+
+import friendly  # noqa
+from friendly.config import session  # noqa
+
+NUMBER = 200  # of each kind of exception
+
+
+def get_exceptions():
+    functions = (
+        lambda: math.Pi,
+        lambda: alpha_bet,  # noqa
+        lambda: 1 / 0,
+        lambda: [1][3],
+        lambda: {"a": 1}["b"],
+        lambda: "a" + 1,
+    )
+    exceptions = []
+    for _ in range(NUMBER):
+        for function in functions:
+            try:
+                function()
+            except Exception as e:
+                exceptions.append(e)
+    return exceptions
+
+
+exceptions = get_exceptions()
+
+start = time.perf_counter()
+for exc in exceptions:
+    session.exception_hook(type(exc), exc, exc.__traceback__, redirect="capture")
+    friendly.get_output()
+    session.remove_last()
+one_at_a_time = time.perf_counter() - start
+
+start = time.perf_counter()
+friendly.explain_many(exceptions)
+many = time.perf_counter() - start
+
+nb = len(exceptions)
+print(f"One at a time:  {one_at_a_time / nb * 1e3:.2f} ms per exception")
+print(f"explain_many(): {many / nb * 1e3:.2f} ms per exception")
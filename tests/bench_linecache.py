@@ -0,0 +1,49 @@
+"""Compares the time taken by linecache.getlines() for a file unrelated
+to friendly, before and after friendly is imported.
+
+Usage:
+
+    python tests/bench_linecache.py
+
+Since friendly does not replace linecache.getlines(), both timings
+should be the same, within the usual measurement noise.
+"""
+import linecache
+import os
+import sys
+import timeit
+
+this_dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(this_dir, ".."))
+
+NUMBER = 200_000
+REPEAT = 5
+FILENAME = os.__file__
+
+
+def best_time():
+    linecache.getlines(FILENAME)  # ensure the file is in linecache.cache
+    times = timeit.repeat(
+        lambda: linecache.getlines(FILENAME), number=NUMBER, repeat=REPEAT
+    )
+    return min(times) / NUMBER * 1e9
+
+
+before = best_time()
+
+import friendly  # noqa
+from friendly.source_cache import cache  # noqa
+
+after = best_time()
+
+nb_lines = len(linecache.getlines(FILENAME))
+for _ in range(1000):
+    cache.get_source_lines(FILENAME)
+
+print(f"linecache.getlines() before importing friendly: {before:.1f} ns")
+print(f"linecache.getlines() after importing friendly:  {after:.1f} ns")
+print(f"Same function object: {linecache.getlines.__module__ == 'linecache'}")
+print(
+    "Lines cached by linecache after 1000 calls to cache.get_source_lines(): "
+    f"{len(linecache.getlines(FILENAME))} (was {nb_lines})"
+)
@@ -0,0 +1,69 @@
+"""Compares the time taken to locate the code raising an exception using
+the position information of Python 3.11+ with that taken using executing.
+
+Usage:
+
+    python tests/bench_positions.py
+
+For each method, an exception is raised in a large module which has
+not been analyzed previously (first call), and then again in the same
+module (later calls). Executing needs to parse the entire module when
+it is first used for a file, which is not the case with native positions.
+"""
+import importlib
+import os
+import sys
+import tempfile
+import time
+
+this_dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(this_dir, ".."))
+
+from friendly import core  # noqa
+from friendly import positions  # noqa
+
+NB_FUNCTIONS = 2000
+REPEAT = 20
+
+template = '''
+def function_{n}(a, b):
+    c = [a, b, {n}]
+    return c[a] + b.real * len(c)
+'''
+
+
+def create_module(directory, name):
+    with open(os.path.join(directory, name + ".py"), "w") as f:
+        for n in range(NB_FUNCTIONS):
+            f.write(template.format(n=n))
+    return importlib.import_module(name)
+
+
+def locate(module):
+    try:
+        module.function_1000(5, 1)
+    except IndexError as e:
+        start = time.perf_counter()
+        core.TracebackData(type(e), e, e.__traceback__)
+        return time.perf_counter() - start
+
+
+def main():
+    if not hasattr(locate.__code__, "co_positions"):
+        print("Native positions require Python 3.11+.")
+    directory = tempfile.mkdtemp()
+    sys.path.insert(0, directory)
+    for use_native in (True, False):
+        positions.use_native = use_native
+        module = create_module(directory, f"big_module_{use_native}")
+        first = locate(module)
+        later = min(locate(module) for _ in range(REPEAT))
+        print(
+            "{:10}  first call: {:8.3f} ms   later calls: {:8.3f} ms".format(
+                "native" if use_native else "executing", first * 1000, later * 1000
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""In this file, we ensure that exceptions raised in asyncio tasks
+are explained by friendly's exception handler, and that
+explain_async() gives the same result as explain_traceback().
+"""
+import asyncio
+import math
+import threading
+
+import friendly
+from friendly import asyncio_support
+from friendly.config import session
+
+
+async def get_pi():
+    await asyncio.sleep(0)
+    return math.Pi
+
+
+async def check_handler():
+    loop = asyncio.get_event_loop()
+    output = []
+    handler = friendly.install_asyncio_handler(redirect=output.append, include="hint")
+    try:
+        await get_pi()
+    except AttributeError as e:
+        loop.call_exception_handler({"message": "Task failed", "exception": e})
+    await asyncio.gather(*handler.pending)
+    await asyncio.sleep(0)
+    result = "".join(output)
+    assert "Task failed" in result
+    assert "Did you mean `pi`?" in result
+
+    # Without an exception, the default handler is used; it logs the message.
+    loop.call_exception_handler({"message": "No exception"})
+    assert len(output) == 2
+    loop.set_exception_handler(None)
+    session.remove_last()
+
+
+async def check_explain_async():
+    try:
+        await get_pi()
+    except AttributeError as e:
+        result = await friendly.explain_async(e, include="hint", lang="fr")
+    assert "Vouliez-vous dire `pi`" in result
+    session.remove_last()
+
+
+async def check_snapshot_thread():
+    # The snapshot is taken in the executor, not on the loop thread.
+    threads = []
+    snapshot_class = asyncio_support.TracebackSnapshot
+
+    def take_snapshot(*args):
+        threads.append(threading.current_thread())
+        return snapshot_class(*args)
+
+    asyncio_support.TracebackSnapshot = take_snapshot
+    try:
+        await get_pi()
+    except AttributeError as e:
+        result = await friendly.explain_async(e, include="hint")
+    finally:
+        asyncio_support.TracebackSnapshot = snapshot_class
+    assert "Did you mean `pi`?" in result
+    assert threads and threading.current_thread() not in threads
+    session.remove_last()
+
+
+def test_asyncio():
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(check_handler())
+        loop.run_until_complete(check_explain_async())
+        loop.run_until_complete(check_snapshot_thread())
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    test_asyncio()
+    print("Success!")
@@ -0,0 +1,59 @@
+"""In this file, we ensure that the benchmark runner can replay
+the test corpora, timing only the explanations, and detect regressions."""
+import time
+
+import friendly
+from friendly import bench
+from friendly.config import session
+
+
+def test_percentiles():
+    values = bench.percentiles([5, 1, 4, 2, 3])
+    assert values == {"p50": 3, "p90": 5, "p99": 5, "max": 5}
+
+
+def test_run_and_compare():
+    nb_before = len(session.saved_info)
+    results = bench.run(repeat=2, select="keyword_as_attribute", memory=False)
+    assert list(results["cases"]) == ["syntax/keyword_as_attribute"]
+    assert not results["failed"]
+    assert "find_syntax_error_cause" in results["stages"]
+    assert len(results["causes"]) == 1
+    calls = results["analyzers"]["friendly.syntax_errors.statement_analyzer"]
+    assert calls["called"] > 0 and calls["skipped"] > 0
+    assert len(session.saved_info) == nb_before
+    assert not friendly.timing.enabled
+
+    assert bench.compare(results, results) == []
+    faster = {
+        "cases": {
+            name: dict(values, p50=values["p50"] / 10)
+            for name, values in results["cases"].items()
+        },
+        "stages": {},
+    }
+    regressions = bench.compare(results, faster, min_delta=0)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("syntax/keyword_as_attribute: median")
+
+
+def test_only_explanation_timed():
+    def function():
+        time.sleep(0.05)
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            friendly.explain_traceback(redirect="capture")
+        friendly.get_output()
+
+    run = bench.make_timed(function)
+    assert run() < 0.05
+    session.remove_last()
+    assert "explain_traceback" not in vars(session)
+
+
+if __name__ == "__main__":
+    test_percentiles()
+    test_run_and_compare()
+    test_only_explanation_timed()
+    print("Success!")
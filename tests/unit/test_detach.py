@@ -0,0 +1,83 @@
+"""In this file, we ensure that frames are no longer referenced
+once a traceback has been explained, if requested, and that they are
+otherwise kept so that the information can be computed again later.
+"""
+import gc
+import weakref
+
+import friendly
+from friendly import console_helpers as helpers
+from friendly.config import session
+
+
+class BigObject:
+    def __len__(self):
+        return 10 ** 6
+
+
+def raise_error():
+    big = BigObject()  # noqa
+    tracker = weakref.ref(big)
+    try:
+        len(big) + "a"
+    except TypeError:
+        friendly.explain_traceback(redirect="capture")
+    return tracker
+
+
+def test_detach():
+    session.detach_frames = True
+    gc.disable()
+    try:
+        tracker = raise_error()
+        # Freed by reference counting only, without a garbage collection.
+        assert tracker() is None
+    finally:
+        gc.enable()
+        session.detach_frames = False
+
+    result = friendly.get_output()
+    assert "BigObject" in result
+    info = session.saved_info[-1]
+    assert info["_frame"] is None
+    assert session.friendly[-1].tb_data.records[-1].frame is None
+
+    # The information can be shown again in a different language.
+    friendly.set_lang("fr")
+    friendly.set_stream(redirect="capture")
+    helpers.explain()
+    result = friendly.get_output()
+    assert "Une exception `TypeError`" in result
+    assert "BigObject" in result
+    # The cause kept when the frames were released is in English only.
+    assert "You tried to add" not in result
+    friendly.set_lang("en")
+    friendly.set_stream(None)
+    session.remove_last()
+
+
+def test_frames_kept_by_default():
+    original_include = friendly.get_include()
+    friendly.set_include("friendly_tb")
+    try:
+        raise_error()
+        friendly.get_output()
+        friendly.set_stream(redirect="capture")
+        helpers.where()
+        assert "big:" in friendly.get_output()
+
+        # The cause is computed again in a different language.
+        friendly.set_lang("fr")
+        helpers.why()
+        assert "Vous avez essayé d’additionner" in friendly.get_output()
+    finally:
+        friendly.set_lang("en")
+        friendly.set_stream(None)
+        friendly.set_include(original_include)
+        session.remove_last()
+
+
+if __name__ == "__main__":
+    test_detach()
+    test_frames_kept_by_default()
+    print("Success!")
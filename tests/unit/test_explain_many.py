@@ -0,0 +1,56 @@
+"""In this file, we ensure that explain_many() gives the same results
+as explaining exceptions one at a time, in the order in which they
+are given.
+"""
+import math
+
+import friendly
+from friendly.config import session
+
+
+def get_exceptions():
+    exceptions = []
+    for _ in range(3):
+        for function in (lambda: math.Pi, lambda: 1 / 0, lambda: alphabet):  # noqa
+            try:
+                function()
+            except Exception as e:
+                exceptions.append(e)
+    return exceptions
+
+
+def test_explain_many():
+    exceptions = get_exceptions()
+    nb_before = len(session.saved_info)
+
+    results = friendly.explain_many(exceptions, include="explain")
+    assert len(session.saved_info) == nb_before
+    assert len(results) == len(exceptions)
+
+    for exc, result in zip(exceptions, results):
+        session.exception_hook(type(exc), exc, exc.__traceback__, redirect="capture")
+        friendly.get_output()
+        info = session.saved_info[-1]
+        assert result["message"] == info["message"]
+        for item in result:
+            assert result[item] == info[item]
+        assert "cause" in result
+        session.remove_last()
+
+    assert "Did you mean `pi`?" in results[3]["suggest"]
+    assert "ZeroDivisionError" in results[4]["message"]
+    assert "NameError" in results[5]["message"]
+
+
+def test_explain_many_lang():
+    exceptions = get_exceptions()[:3]
+    results = friendly.explain_many(exceptions, include="why", lang="fr")
+    assert "`math.pi` au lieu de `math.Pi`" in results[0]["cause"]
+    assert "suggest" not in results[0]
+    assert friendly.get_lang() == "en"
+
+
+if __name__ == "__main__":
+    test_explain_many()
+    test_explain_many_lang()
+    print("Success!")
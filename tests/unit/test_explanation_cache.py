@@ -0,0 +1,60 @@
+"""In this file, we ensure that the explanation cache reuses the
+explanation of identical exceptions, including when the values of the
+variables shown are different, but not when the language is different,
+and that no item is computed to find cached explanations."""
+import friendly
+from friendly.config import session
+
+
+def get_item(a):
+    return a[3]
+
+
+def explain(sequence, lang="en"):
+    try:
+        get_item(sequence)
+    except IndexError:
+        friendly.explain_traceback(redirect="capture", lang=lang)
+    result = friendly.get_output()
+    session.remove_last()
+    return result
+
+
+def test_explanation_cache():
+    assert friendly.get_explanation_cache_stats()["maxsize"] == 0
+    uncached = explain([1, 2])
+    friendly.set_explanation_cache_size(4)
+    try:
+        assert explain([1, 2]) == uncached
+        assert explain([1, 2]) == uncached
+        stats = friendly.get_explanation_cache_stats()
+        assert stats == {"hits": 1, "misses": 1, "size": 1, "maxsize": 4}
+
+        # Different variables: only the location is computed again
+        result = explain([1, 2, 3])
+        assert "[1, 2, 3]" in result
+        assert friendly.get_explanation_cache_stats()["hits"] == 2
+
+        french = explain([1, 2], lang="fr")
+        assert "length" not in french
+        stats = friendly.get_explanation_cache_stats()
+        assert stats["hits"] == 2 and stats["misses"] == 2
+
+        # Finding cached items does not require computing the location.
+        try:
+            get_item([1, 2])
+        except IndexError:
+            friendly.explain_traceback(redirect="capture", include="why")
+        assert "exception_raised_variables" not in dict.keys(session.saved_info[-1])
+        assert friendly.get_explanation_cache_stats()["misses"] == 3
+        friendly.get_output()
+        session.remove_last()
+    finally:
+        friendly.set_explanation_cache_size(0)
+    assert explain([1, 2]) == uncached
+    assert friendly.get_explanation_cache_stats()["hits"] == 0
+
+
+if __name__ == "__main__":
+    test_explanation_cache()
+    print("Success!")
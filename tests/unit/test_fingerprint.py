@@ -0,0 +1,91 @@
+"""In this file, we ensure that identical errors have the same fingerprint,
+and that only the first occurrence of an error is explained when
+aggregation is enabled."""
+import friendly
+from friendly import config
+from friendly.config import session
+
+
+def get_item(a, index):
+    return a[index]
+
+
+def get_attribute(a):
+    return a.appendd
+
+
+def explain(function, *args, redirect="capture"):
+    try:
+        function(*args)
+    except Exception:
+        friendly.explain_traceback(redirect=redirect)
+
+
+def get_fingerprint(function, *args):
+    explain(function, *args)
+    friendly.get_output()
+    fingerprint = session.saved_info[-1]["fingerprint"]
+    session.remove_last()
+    return fingerprint
+
+
+def test_fingerprint():
+    fingerprint = get_fingerprint(get_item, [1, 2], 3)
+    assert len(fingerprint) == 16
+    # Numbers in the message are replaced by placeholders
+    assert get_fingerprint(get_item, [1, 2], 5) == fingerprint
+    assert get_fingerprint(get_item, (1, 2), 5) != fingerprint
+    assert get_fingerprint(get_attribute, [1]) != fingerprint
+
+
+def test_aggregation():
+    count = len(session.friendly)
+    friendly.set_aggregation(interval=3600)
+    try:
+        for index in range(5, 105):
+            explain(get_item, [1, 2], index)
+        assert len(session.friendly) == count + 1
+        fingerprint = session.saved_info[-1]["fingerprint"]
+        assert "IndexError" in friendly.get_output()
+        friendly.flush_aggregation(redirect="capture")
+        summary = friendly.get_output()
+        assert fingerprint in summary
+        assert "seen 99 more times" in summary
+        friendly.flush_aggregation(redirect="capture")
+        assert friendly.get_output() == ""
+    finally:
+        friendly.set_aggregation(False)
+        session.remove_last()
+    explain(get_item, [1, 2], 5)
+    assert "IndexError" in friendly.get_output()
+    session.remove_last()
+
+
+def test_aggregation_flushed():
+    registered = []
+    register = config.atexit.register
+    config.atexit.register = registered.append
+    flush_at_exit = session._flush_at_exit
+    session._flush_at_exit = False
+    friendly.set_stream("capture")
+    try:
+        friendly.set_aggregation(interval=3600)
+        friendly.set_aggregation(interval=3600)
+        for index in range(5, 8):
+            explain(get_item, [1, 2], index)
+        friendly.get_output()
+        friendly.set_aggregation(False)
+        assert "seen 2 more times" in friendly.get_output()
+    finally:
+        config.atexit.register = register
+        session._flush_at_exit = flush_at_exit
+        friendly.set_stream()
+        session.remove_last()
+    assert registered == [session.flush_aggregation]
+
+
+if __name__ == "__main__":
+    test_fingerprint()
+    test_aggregation()
+    test_aggregation_flushed()
+    print("Success!")
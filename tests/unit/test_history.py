@@ -0,0 +1,93 @@
+"""In this file, we ensure that only the most recent tracebacks are
+fully kept, and that older ones can still be shown.
+"""
+import friendly
+from friendly import core
+from friendly.config import session, SpilledInfo
+
+from friendly import console_helpers as helpers
+
+
+def raise_errors(nb_errors=4):
+    for index in range(nb_errors):
+        try:
+            [][index]
+        except IndexError:
+            friendly.explain_traceback(redirect="capture")
+    friendly.get_output()
+
+
+def check_history(compact_type, location):
+    assert session.friendly[-1] is not None
+    assert session.friendly[-2] is not None
+    assert session.friendly[-3] is None
+    assert isinstance(session.saved_info[-3], compact_type)
+    assert "_frame" not in session.saved_info[-3]
+
+    friendly.set_stream(redirect="capture")
+    helpers.history()
+    assert friendly.get_output().count("IndexError") >= 4
+
+    helpers.back()
+    helpers.back()
+    helpers.explain()
+    result = friendly.get_output()
+    # Only the items computed before an entry is replaced are kept.
+    if location:
+        assert "Exception raised on line" in result
+    else:
+        assert "IndexError: list index out of range" in result
+        assert "Exception raised on line" not in result
+    helpers.back()
+    helpers.back()
+
+
+def test_history():
+    original_size = friendly.get_history_size()
+    original_include = friendly.get_include()
+    friendly.set_include("message")  # Only the message is computed at first.
+
+    friendly.set_history_size(2)
+    raise_errors()
+    check_history(dict, location=False)
+
+    friendly.set_history_size(2, spill_to_disk=True)
+    raise_errors()
+    check_history(SpilledInfo, location=False)
+
+    friendly.set_include("where")
+    raise_errors()
+    check_history(SpilledInfo, location=True)
+
+    friendly.set_history_size(original_size)
+    friendly.set_include(original_include)
+    friendly.set_stream(None)
+
+
+def test_no_analysis_when_trimming():
+    original_size = friendly.get_history_size()
+    original_include = friendly.get_include()
+    assign_cause = core.FriendlyTraceback.assign_cause
+    calls = []
+    core.FriendlyTraceback.assign_cause = lambda self: calls.append(self)
+    session.detach_frames = True
+    try:
+        friendly.set_include("message")
+        friendly.set_history_size(5)
+        raise_errors(30)
+    finally:
+        session.detach_frames = False
+        core.FriendlyTraceback.assign_cause = assign_cause
+        friendly.set_history_size(original_size)
+        friendly.set_include(original_include)
+    assert not calls
+    # Frames are released when an entry is recorded, whatever was computed.
+    assert session.friendly[-1].tb_data.detached
+    for _ in range(30):
+        helpers.back()
+
+
+if __name__ == "__main__":
+    test_history()
+    test_no_analysis_when_trimming()
+    print("Success!")
@@ -0,0 +1,41 @@
+"""In this file, we ensure that the items of the info dict are only
+computed when they are requested.
+"""
+import math
+
+import friendly
+from friendly.config import session
+
+
+def test_lazy_info():
+    original_include = friendly.get_include()
+    friendly.set_include("message")
+    try:
+        math.Pi
+    except AttributeError:
+        friendly.explain_traceback(redirect="capture")
+    result = friendly.get_output()
+    assert "AttributeError" in result
+
+    info = session.saved_info[-1]
+    # Only items already computed are included in keys()
+    assert "cause" not in info.keys()
+    assert "generic" not in info.keys()
+    assert "exception_raised_variables" not in info.keys()
+
+    assert "Did you mean `pi`?" in info["suggest"]
+    assert "cause" in info.keys()
+    assert "generic" not in info.keys()
+    assert "exception_raised_source" not in info.keys()
+
+    # Items whose value would be empty are not included
+    assert "parsing_error" not in info
+    assert "exception_raised_source" in info.keys()
+
+    friendly.set_include(original_include)
+    session.remove_last()
+
+
+if __name__ == "__main__":
+    test_lazy_info()
+    print("Success!")
@@ -0,0 +1,163 @@
+"""In this file, we ensure that the message analyzers selected for a
+SyntaxError message using the dispatch index are those whose declared
+patterns match the message, and those which would have accepted it
+when each analyzer checked the message itself."""
+import glob
+import os
+import re
+
+from friendly.syntax_errors import message_analyzer
+from friendly.syntax_errors.message_analyzer import MESSAGE_ANALYZERS, MESSAGE_PATTERNS
+
+# The checks done by analyzers, before they declared the messages they
+# handle, when these were not simply comparisons with exact messages.
+OLD_GUARDS = {
+    "assign_to_function_call": lambda m: m == "can't assign to function call"
+    or "cannot assign to function call" in m,
+    "assign_to_f_expression": lambda m: "cannot assign to f-string expression" in m,
+    "annotated_name_cannot_be_global": lambda m: re.search(
+        r"annotated name '(.)' can't be global", m
+    ),
+    "both_nonlocal_and_global": lambda m: "is nonlocal and global" in m,
+    "break_outside_loop": lambda m: "'break' outside loop" in m,
+    "continue_outside_loop": lambda m: "'continue' not properly in loop" in m,
+    "duplicate_argument_in_function_definition": lambda m: "duplicate argument" in m
+    and "function definition" in m,
+    "eol_while_scanning_string_literal": lambda m: "EOL while scanning string literal"
+    in m
+    or "unterminated string literal" in m,
+    "expression_cannot_contain_assignment": lambda m: (
+        "expression cannot contain assignment, perhaps you meant" in m
+    ),
+    "generator_expression_must_be_parenthesized": lambda m: (
+        "Generator expression must be parenthesized" in m
+    ),
+    "keyword_argument_repeated": lambda m: "keyword argument repeated" in m,
+    "keyword_cannot_be_expression": lambda m: "keyword can't be an expression" in m,
+    "invalid_character_in_identifier": lambda m: "invalid character" in m,
+    "mismatched_parenthesis": lambda m: re.search(
+        r"closing parenthesis '(.)' does not match opening parenthesis '(.)'", m
+    ),
+    "unterminated_f_string": lambda m: "f-string: unterminated string" in m,
+    "name_is_parameter_and_global": lambda m: "is parameter and global" in m,
+    "name_assigned_to_prior_global": lambda m: (
+        "is assigned to before global declaration" in m
+    ),
+    "name_used_prior_global": lambda m: "is used prior to global declaration" in m,
+    "name_assigned_to_prior_nonlocal": lambda m: (
+        "is assigned to before nonlocal declaration" in m
+    ),
+    "name_is_parameter_and_nonlocal": lambda m: "is parameter and nonlocal" in m,
+    "name_used_prior_nonlocal": lambda m: "is used prior to nonlocal declaration" in m,
+    "nonlocal_at_module_level": lambda m: (
+        "nonlocal declaration not allowed at module level" in m
+    ),
+    "no_binding_for_nonlocal": lambda m: "no binding for nonlocal" in m,
+    "unexpected_character_after_continuation": lambda m: (
+        "unexpected character after line continuation character" in m
+    ),
+    "unexpected_eof_while_parsing": lambda m: "unexpected EOF while parsing" in m,
+    "position_argument_follows_keyword_arg": lambda m: (
+        "positional argument follows keyword argument" in m
+    ),
+    "non_default_arg_follows_default_arg": lambda m: (
+        "non-default argument follows default argument" in m
+    ),
+    "python2_print": lambda m: m.startswith(
+        "Missing parentheses in call to 'print'. Did you mean print("
+    ),
+    "from__future__not_defined": lambda m: re.search(
+        r"future feature (.*) is not defined", m
+    ),
+    "invalid_octal": lambda m: "in octal literal" in m,
+    "eof_unclosed_triple_quoted": lambda m: m
+    == "EOF while scanning triple-quoted string literal"
+    or "unterminated triple-quoted string literal" in m,
+    "leading_zeros_in_decimal_integers": lambda m: m.startswith(
+        "leading zeros in decimal integer literals are not permitted"
+    ),
+    "bracket_was_expected": lambda m: re.search(r"'(.)' was never closed", m),
+}
+
+
+def get_messages():
+    messages = {"", "invalid syntax", "'[' was never closed"}
+    corpus = os.path.join(os.path.dirname(__file__), "..", "syntax", "*.py")
+    for filename in glob.glob(corpus):
+        with open(filename, encoding="utf8") as f:
+            source = f.read()
+        try:
+            compile(source, filename, "exec")
+        except SyntaxError as e:
+            messages.add(e.msg)
+        except Exception:  # noqa
+            pass
+    for exact, _regexes in MESSAGE_PATTERNS:
+        messages.update(exact)
+    messages.update(
+        [
+            "annotated name 'x' can't be global",
+            "duplicate argument 'a' in function definition",
+            "duplicate argument 'a' in lambda",
+            "closing parenthesis ']' does not match opening parenthesis '('",
+            "future feature braces is not defined",
+        ]
+    )
+    return messages
+
+
+def test_dispatch():
+    index = message_analyzer.DispatchIndex()
+    for message in get_messages():
+        expected = [
+            func
+            for func, (exact, regexes) in zip(MESSAGE_ANALYZERS, MESSAGE_PATTERNS)
+            if message in exact
+            or any(re.search(regex, message) for regex in regexes)
+            or not (exact or regexes)
+        ]
+        assert index.get_candidates(message) == expected, message
+
+
+def test_old_guards():
+    index = message_analyzer.DispatchIndex()
+    analyzers = {func.__name__: func for func in MESSAGE_ANALYZERS}
+    assert OLD_GUARDS.keys() <= analyzers.keys()
+    for message in get_messages():
+        candidates = index.get_candidates(message)
+        for name, guard in OLD_GUARDS.items():
+            assert bool(guard(message)) == (analyzers[name] in candidates), (
+                name,
+                message,
+            )
+
+
+def test_unexpected_message():
+    # Analyzers extracting values from the message must not fail when
+    # called directly for other messages.
+    for func in (
+        message_analyzer.annotated_name_cannot_be_global,
+        message_analyzer.duplicate_argument_in_function_definition,
+        message_analyzer.mismatched_parenthesis,
+        message_analyzer.from__future__not_defined,
+        message_analyzer.bracket_was_expected,
+    ):
+        assert func(message="invalid syntax") == {}, func.__name__
+
+
+def test_required_text():
+    get_required_text = message_analyzer.get_required_text
+    assert get_required_text(r"^Did you mean print\(") == "Did you mean print("
+    assert get_required_text(r"future feature (.*) is not defined") == (
+        "future feature "
+    )
+    assert get_required_text(r"lines? (\d+)") == "line"
+    assert get_required_text(r"line|column") == ""
+
+
+if __name__ == "__main__":
+    test_dispatch()
+    test_old_guards()
+    test_unexpected_message()
+    test_required_text()
+    print("Success!")
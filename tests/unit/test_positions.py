@@ -0,0 +1,69 @@
+"""In this file, we ensure that the location of the code raising an
+exception is the same whether it is found using the position information
+of Python 3.11+ or using executing."""
+import ast
+import sys
+
+import pytest
+
+from friendly import positions
+
+
+def raise_exceptions():
+    a = [1, 2]
+    b = {"key": 1}
+    yield lambda: a[3]
+    yield lambda: b["other"]
+    yield lambda: a.appendd(3)
+    yield lambda: 1 + len(a) / (a[0] - 1)
+    yield lambda: int("x")
+    yield lambda: -None
+    yield lambda: 1 < "a"
+
+
+def unpack():
+    x, y = 1.0
+
+
+def multiline_attribute():
+    a = [1, 2]
+    return (a
+            .missing)  # fmt: skip
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="Requires Python 3.11+")
+def test_native_positions():
+    functions = list(raise_exceptions())
+    for function in functions:
+        try:
+            function()
+        except Exception as e:
+            tb = e.__traceback__.tb_next
+        native = positions.get_native_node(tb)
+        assert native is not None
+        node, text = positions.get_executing_node(tb)
+        assert native[1] == text
+        assert ast.dump(native[0]) == ast.dump(node, include_attributes=False)
+
+    # Only the targets are included in the position of the instruction;
+    # executing must be used instead.
+    try:
+        unpack()
+    except TypeError as e:
+        tb = e.__traceback__.tb_next
+    assert positions.get_native_node_text(tb)[0] == "x, y"
+    assert positions.get_native_node(tb) is None
+
+    # Only the name of the attribute is included
+    try:
+        multiline_attribute()
+    except AttributeError as e:
+        tb = e.__traceback__.tb_next
+    assert positions.get_native_node_text(tb)[0] == "missing"
+    assert positions.get_native_node(tb) is None
+    assert positions.find_node(tb)[1] == "a\n            .missing"
+
+
+if __name__ == "__main__":
+    test_native_positions()
+    print("Success!")
@@ -0,0 +1,48 @@
+"""In this file, we ensure that the records of a traceback only include
+the source context of the frames that are shown, and that this
+context is the same as that given by inspect.getinnerframes()."""
+import inspect
+import sys
+
+from friendly import core
+
+
+def recurse(n):
+    if n == 0:
+        return 1 / 0
+    return recurse(n - 1)
+
+
+def test_records():
+    try:
+        recurse(5)
+    except ZeroDivisionError:
+        etype, value, tb = sys.exc_info()
+    tb_data = core.TracebackData(etype, value, tb)
+    records = tb_data.records
+    assert len(records) == 7
+    expected = inspect.getinnerframes(tb, 4)
+    for record, frame_info in zip(records, expected):
+        assert record.frame is frame_info.frame
+        assert record.filename == frame_info.filename
+        assert record.lineno == frame_info.lineno
+        assert record.function == frame_info.function
+    for record in records[1:-1]:
+        assert record.code_context is None
+    for index in (0, -1):
+        assert records[index].code_context == expected[index].code_context
+        assert records[index].index == expected[index].index
+        assert core.add_context(records[index]) is records[index]
+
+    middle = core.add_context(records[3])
+    assert middle.code_context == expected[3].code_context
+    assert middle.index == expected[3].index
+
+    friendly_tb = core.FriendlyTraceback(etype, value, tb)
+    simulated = friendly_tb.info["simulated_python_traceback"]
+    assert simulated.count("return recurse(n - 1)") == 5
+
+
+if __name__ == "__main__":
+    test_records()
+    print("Success!")
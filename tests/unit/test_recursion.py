@@ -0,0 +1,65 @@
+"""In this file, we ensure that cycles of frames repeated in the
+traceback of a RecursionError are only shown once."""
+import friendly
+from friendly import core
+from friendly.config import session
+
+
+def test_compress_cycles():
+    assert core.compress_cycles([]) == []
+    assert core.compress_cycles(list("abc")) == [(0, 1, 1), (1, 1, 1), (2, 1, 1)]
+    assert core.compress_cycles(list("xaaaay")) == [(0, 1, 1), (1, 1, 4), (5, 1, 1)]
+    assert core.compress_cycles(list("xababab")) == [(0, 1, 1), (1, 2, 3)]
+    # A cycle must be repeated at least three times
+    assert core.compress_cycles(list("abab")) == [(i, 1, 1) for i in range(4)]
+    assert core.compress_cycles(list("xabcabcabca")) == [
+        (0, 1, 1),
+        (1, 3, 3),
+        (10, 1, 1),
+    ]
+
+
+def ping(n):
+    return pong(n)
+
+
+def pong(n):
+    return ping(n)
+
+
+def test_recursion_cycles():
+    try:
+        ping(0)
+    except RecursionError:
+        friendly.explain_traceback(redirect="capture")
+    friendly.get_output()
+    info = session.friendly[-1].info
+    simulated = info["simulated_python_traceback"]
+    # The last cycle is usually incomplete, and is shown separately.
+    assert simulated.count("return pong(n)") <= 2
+    assert simulated.count("return ping(n)") <= 2
+    assert "The following 2 frames are repeated" in simulated
+    original = info["original_python_traceback"]
+    assert original.count("return pong(n)") <= 2
+    assert "[The following 2 frames are repeated" in original
+    assert original.rstrip().endswith("maximum recursion depth exceeded")
+    session.remove_last()
+
+
+def test_recursion_cycles_translated():
+    try:
+        ping(0)
+    except RecursionError:
+        friendly.explain_traceback(redirect="capture", lang="fr")
+    friendly.get_output()
+    info = session.friendly[-1].info
+    assert "Les 2 trames suivantes sont" in info["simulated_python_traceback"]
+    assert "[Les 2 trames suivantes sont" in info["original_python_traceback"]
+    session.remove_last()
+
+
+if __name__ == "__main__":
+    test_compress_cycles()
+    test_recursion_cycles()
+    test_recursion_cycles_translated()
+    print("Success!")
@@ -0,0 +1,74 @@
+"""In this file, we ensure that values cached for the location of errors
+are reused when the same line raises an exception many times, and are
+not reused when the source is replaced, without keeping the code
+or its syntax tree alive."""
+import ast
+import gc
+import types
+
+import friendly
+from friendly.config import session
+from friendly.site_cache import LRUCache, site_cache
+from friendly.source_cache import cache
+
+
+def test_lru_cache():
+    lru = LRUCache(maxsize=2)
+    lru.set(("kind", "a.py", 1), 1)
+    lru.set(("kind", "b.py", 2), 2)
+    assert lru.get(("kind", "a.py", 1)) == 1  # a.py is now the most recent
+    lru.set(("kind", "c.py", 3), 3)
+    assert lru.get(("kind", "b.py", 2)) is None
+    assert len(lru) == 2
+    lru.invalidate("a.py")
+    assert lru.get(("kind", "a.py", 1)) is None
+    assert lru.get(("kind", "c.py", 3)) == 3
+
+
+def explain(filename, source):
+    cache.add(filename, source)
+    try:
+        exec(compile(source, filename, "exec"), {})
+    except Exception:
+        friendly.explain_traceback(redirect="capture")
+    result = friendly.get_output()
+    session.remove_last()
+    return result
+
+
+def test_pseudo_file_replaced():
+    filename = "<friendly-console:site_cache>"
+    first = explain(filename, "a = [1, 2]\nb = a[0] + a[3]\n")
+    nb_cached = len(site_cache)
+    assert explain(filename, "a = [1, 2]\nb = a[0] + a[3]\n") == first
+    assert len(site_cache) == nb_cached
+    assert "a[3]" in first
+
+    second = explain(filename, "a = [1, 2]\nb = a[0] + a[7]\n")
+    assert "a[7]" in second
+    assert "a[3]" not in second
+    cache.remove(filename)
+
+
+def test_nothing_kept_alive():
+    filename = "<friendly-console:site_cache_alive>"
+    explain(filename, "a = [1, 2]\nb = a[0] + a[3]\n")
+    gc.collect()
+    nodes = [
+        (key, value)
+        for key, value in site_cache._values.items()
+        if key[:2] == ("node", filename)
+    ]
+    assert nodes
+    for key, value in nodes:
+        assert key[2]() is None  # weak reference to the code object
+        assert not any(isinstance(item, types.CodeType) for item in key)
+        assert not any(isinstance(item, ast.AST) for item in value)
+    cache.remove(filename)
+
+
+if __name__ == "__main__":
+    test_lru_cache()
+    test_pseudo_file_replaced()
+    test_nothing_kept_alive()
+    print("Success!")
@@ -0,0 +1,150 @@
+"""In this file, we ensure that a TracebackSnapshot can be pickled and
+explained later, in the same process or in a different one, giving
+the same information as the original exception.
+"""
+import math
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+import friendly
+from friendly.config import session
+from friendly.core import FriendlyTraceback
+from friendly.source_cache import cache
+
+ITEMS = (
+    "message",
+    "cause",
+    "suggest",
+    "exception_raised_header",
+    "exception_raised_source",
+    "exception_raised_variables",
+    "last_call_source",
+    "last_call_variables",
+    "parsing_error_source",
+    "simulated_python_traceback",
+)
+
+
+class CustomError(ValueError):
+    pass
+
+
+def get_exceptions():
+    def local_error():
+        class LocalError(Exception):
+            pass
+
+        raise LocalError("some message")
+
+    exceptions = []
+    alphabet = "abc"  # noqa
+    a_list = [1, 2, 3]
+    functions = (
+        lambda: math.Pi,
+        lambda: alpha_bet,  # noqa
+        lambda: a_list[3],
+        lambda: {"a": 1}["b"],
+        lambda: "a" + 1,
+        lambda: compile("if True\n    pass\n", "<snapshot>", "exec"),
+        local_error,
+    )
+    for function in functions:
+        try:
+            function()
+        except Exception as e:
+            exceptions.append(e)
+    try:
+        raise CustomError("custom")
+    except CustomError as e:
+        exceptions.append(e)
+    return exceptions
+
+
+def test_snapshot():
+    for exc in get_exceptions():
+        original = FriendlyTraceback(type(exc), exc, exc.__traceback__).info
+        snapshot = friendly.take_snapshot(exc)
+        data = pickle.dumps(snapshot)
+        restored = FriendlyTraceback.from_snapshot(pickle.loads(data)).info
+        for item in ITEMS:
+            assert original.get(item) == restored.get(item), (item, exc)
+        assert restored["_frame"] is None or not hasattr(restored["_frame"], "f_code")
+
+
+def test_snapshot_other_process():
+    exc = get_exceptions()[0]
+    expected = FriendlyTraceback(type(exc), exc, exc.__traceback__).info["cause"]
+    data = pickle.dumps(friendly.take_snapshot(exc))
+    this_dir = os.path.dirname(__file__)
+    code = (
+        "import pickle, sys\n"
+        "import friendly\n"
+        "snapshot = pickle.loads(sys.stdin.buffer.read())\n"
+        "friendly.explain_snapshot(snapshot, redirect='capture', include='why')\n"
+        "print(friendly.get_output())\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        input=data,
+        stdout=subprocess.PIPE,
+        cwd=os.path.join(this_dir, "..", ".."),
+        check=True,
+    )
+    assert expected.strip() in result.stdout.decode("utf8")
+
+
+def test_explain_snapshot():
+    snapshots = [friendly.take_snapshot(exc) for exc in get_exceptions()[:2]]
+    friendly.explain_snapshot(snapshots[0], redirect="capture", include="hint")
+    assert "Did you mean `pi`?" in friendly.get_output()
+    session.remove_last()
+
+    results = friendly.explain_many(snapshots, include="hint")
+    assert "Did you mean `pi`?" in results[0]["suggest"]
+    assert "NameError" in results[1]["message"]
+
+
+def test_stand_in_attributes():
+    class Point:
+        def move(self):
+            pass
+
+    p = Point()
+    try:
+        p.mvoe()
+    except AttributeError as e:
+        snapshot = friendly.take_snapshot(e)
+    restored = FriendlyTraceback.from_snapshot(pickle.loads(pickle.dumps(snapshot)))
+    point = restored.tb_data.exception_frame.f_locals["p"]
+    assert "move" in dir(point) and not hasattr(point, "_stand_in")
+    assert "Did you mean `move`?" in restored.info["suggest"]
+
+
+def test_changed_source():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "changed.py")
+        with open(filename, "w", encoding="utf8") as f:
+            f.write("a = 1\nif True\n    pass\n")
+        try:
+            compile("a = 1\nif True\n    pass\n", filename, "exec")
+        except SyntaxError as e:
+            cause = FriendlyTraceback(type(e), e, e.__traceback__).info["cause"]
+            snapshot = friendly.take_snapshot(e)
+        with open(filename, "w", encoding="utf8") as f:
+            f.write("a = 2\n")
+        cache.remove(filename)  # as in a different process
+        restored = FriendlyTraceback.from_snapshot(snapshot).info
+        assert restored["cause"] == cause
+        assert cache.get_source_lines(filename)[0] == "a = 2\n"
+
+
+if __name__ == "__main__":
+    test_snapshot()
+    test_snapshot_other_process()
+    test_explain_snapshot()
+    test_stand_in_attributes()
+    test_changed_source()
+    print("Success!")
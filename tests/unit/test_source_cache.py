@@ -0,0 +1,139 @@
+"""In this file, we ensure that our source cache does not interfere
+with Python's own linecache, and that its size is limited.
+"""
+import linecache
+import os
+
+import friendly
+from friendly.config import session
+from friendly import source_cache
+from friendly.source_cache import Cache, FileLines, cache
+
+
+def test_linecache_is_not_modified():
+    # No wrapper is installed around linecache.getlines
+    assert linecache.getlines.__module__ == "linecache"
+
+    # The lists stored by linecache are never modified
+    filename = os.path.abspath(__file__)
+    lines = linecache.getlines(filename)
+    nb_lines = len(lines)
+    for _ in range(3):
+        assert len(cache.get_source_lines(filename)) == nb_lines + 1
+    assert len(linecache.getlines(filename)) == nb_lines
+    assert linecache.getlines(filename) is lines
+
+
+def test_fake_filename():
+    filename = "<friendly-console:test>"
+    cache.add(filename, "a = 1\nb = 2")
+    assert linecache.getlines(filename) == ["a = 1\n", "b = 2\n"]
+    linecache.checkcache()
+    assert linecache.getline(filename, 2) == "b = 2\n"
+
+    linecache.clearcache()
+    assert cache.get_source_lines(filename) == ["a = 1\n", "b = 2\n", "\n"]
+    assert linecache.getline(filename, 1) == "a = 1\n"
+
+    cache.remove(filename)
+    assert not linecache.getlines(filename)
+
+
+def test_eviction():
+    small_cache = Cache(max_entries=3)
+    names = [f"<friendly-test:{i}>" for i in range(5)]
+    for name in names:
+        small_cache.add(name, "a = 1")
+    assert list(small_cache.cache) == names[2:]
+    assert not linecache.getlines(names[0])
+    assert small_cache.get_stats()["evictions"] == 2
+
+    # Sources that are used or pinned are kept
+    small_cache.get_source_lines(names[2])
+    small_cache.pin([names[3]])
+    small_cache.add("<friendly-test:5>", "b = 2")
+    assert names[2] in small_cache.cache and names[3] in small_cache.cache
+    assert names[4] not in small_cache.cache
+    small_cache.unpin([names[3]])
+
+    small_cache.set_size(max_entries=10, max_bytes=0)
+    assert len(small_cache.cache) == 0
+    assert small_cache.get_stats()["bytes"] == 0
+
+
+def test_modified_file(tmp_path):
+    path = tmp_path / "example.py"
+    path.write_text("a = 1\n")
+    filename = str(path)
+    cache.add(filename, "b = 2\n")
+    linecache.checkcache(filename)  # does not discard a valid entry
+    assert cache.get_source_lines(filename) == ["b = 2\n", "\n"]
+
+    path.write_text("c = 3\n")
+    os.utime(filename, (0, 0))
+    assert cache.get_source_lines(filename) == ["c = 3\n", "\n"]
+    assert filename not in cache.cache
+
+
+def test_history_is_pinned():
+    filename = "<friendly-test:pinned>"
+    cache.add(filename, "1 / 0\n")
+    try:
+        exec(compile("1 / 0\n", filename, "exec"))
+    except ZeroDivisionError:
+        friendly.explain_traceback(redirect="capture")
+    friendly.get_output()
+    assert filename in cache.pinned
+    friendly.set_source_cache_size(max_entries=0)
+    try:
+        assert filename in cache.cache
+        assert friendly.get_source_cache_stats()["pinned"] >= 1
+        session.remove_last()
+        assert filename not in cache.cache
+    finally:
+        friendly.set_source_cache_size()
+
+
+def test_large_file(tmp_path):
+    path = tmp_path / "large.py"
+    lines = [f"x_{i} = '{'é' * (i % 7)}'  # {i}\n" for i in range(3000)]
+    for newline, last in (("\n", "y = 1\n"), ("\r\n", "y = 1")):
+        source = "".join(lines) + last
+        path.write_bytes(("\ufeff" + source).replace("\n", newline).encode("utf8"))
+        filename = str(path)
+        expected = linecache.updatecache(filename)
+        linecache.checkcache()  # removes the entry for the modified file
+        linecache.cache.pop(filename, None)
+
+        stat = os.stat(filename)
+        file_lines = FileLines.from_file(filename, stat.st_size, stat.st_mtime)
+        assert len(file_lines) == len(expected)
+        assert list(file_lines) == expected
+        assert file_lines[2000:2010] == expected[2000:2010]
+        assert file_lines[-1] == expected[-1]
+
+        # Only the lines needed are read.
+        old_threshold = source_cache.MMAP_THRESHOLD
+        source_cache.MMAP_THRESHOLD = 0
+        try:
+            assert cache.get_lines(filename, 2995, 3010) == expected[2995:] + ["\n"]
+            assert isinstance(cache.get_index(filename).lines, FileLines)
+            assert cache.get_line(filename, 1) == expected[0]
+            assert not cache.is_empty(filename)
+            assert filename not in linecache.cache
+        finally:
+            source_cache.MMAP_THRESHOLD = old_threshold
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_linecache_is_not_modified()
+    test_fake_filename()
+    test_eviction()
+    with tempfile.TemporaryDirectory() as directory:
+        test_modified_file(pathlib.Path(directory))
+        test_large_file(pathlib.Path(directory))
+    test_history_is_pinned()
+    print("Success!")
@@ -0,0 +1,102 @@
+"""In this file, we ensure that the statement containing a SyntaxError is
+the same when the scan begins from the nearest statement, as found using
+a SourceIndex, as when all the tokens of the source are scanned."""
+import friendly
+from friendly.config import session
+from friendly.source_cache import cache
+from friendly.syntax_errors import source_info
+
+SOURCE = """\
+import os  # comment
+
+def f(a,
+      b):
+    return (a +
+            b)
+
+x = 1 + \\
+    2
+# comment
+
+y = [1, 2,
+     3]
+z = f(1,
+      2))
+"""
+
+
+def describe(statement):
+    def tokens(token_list):
+        return [(tok.string, tok.start) for tok in token_list]
+
+    statement.format_statement()
+    return (
+        statement.statement,
+        tokens(statement.tokens),
+        tokens([statement.bad_token, statement.prev_token, statement.next_token]),
+        tokens(statement.begin_brackets),
+        statement.end_bracket and statement.end_bracket.start,
+        statement.statement_brackets,
+        statement.formatted_partial_source,
+    )
+
+
+def get_statement(filename, linenumber, offset):
+    error = SyntaxError("invalid syntax")
+    error.filename = filename
+    error.lineno = error.end_lineno = linenumber
+    error.offset, error.end_offset = offset, offset + 1
+    line = cache.get_line(filename, linenumber)
+    return source_info.Statement(error, line)
+
+
+def test_statement_from_index():
+    filename = "<friendly-test:source-index>"
+    cache.add(filename, SOURCE)
+    nb_lines = len(SOURCE.splitlines())
+    from_index = [get_statement(filename, n, 5) for n in range(1, nb_lines + 1)]
+
+    index = source_info.get_source_index(filename)
+    assert source_info.get_source_index(filename) is index
+    # Continuation lines, inside brackets or after a backslash, do not begin statements
+    assert index.start_rows == [1, 2, 3, 5, 7, 8, 9, 10, 11, 12, 14]
+
+    # The index is created again when the source changes
+    cache.add(filename, "w = 1\n" + SOURCE)
+    assert source_info.get_source_index(filename).start_rows[-1] == 15
+    cache.add(filename, SOURCE)
+
+    # Scanning all the tokens
+    get_statement_start = source_info.SourceIndex.get_statement_start
+    source_info.SourceIndex.get_statement_start = lambda *args: -1
+    try:
+        for linenumber, statement in enumerate(from_index, 1):
+            expected = get_statement(filename, linenumber, 5)
+            assert describe(statement) == describe(expected), linenumber
+    finally:
+        source_info.SourceIndex.get_statement_start = get_statement_start
+        cache.remove(filename)
+
+
+def test_source_not_available():
+    # The source of a file which does not exist is not in the cache;
+    # only the line containing the error is known.
+    filename = "<friendly-test:not-on-disk>.py"
+    for source, cause in (
+        ("a = (1, 2]\n", "does not match the opening parenthesis `(` on line 1"),
+        ("x = 1\na = (1,\n     2]\n", "square bracket `]`"),
+    ):
+        try:
+            compile(source, filename, "exec")
+        except SyntaxError:
+            friendly.explain_traceback(redirect="capture")
+        result = friendly.get_output()
+        session.remove_last()
+        assert "Internal error" not in result
+        assert cause in result
+
+
+if __name__ == "__main__":
+    test_statement_from_index()
+    test_source_not_available()
+    print("Success!")
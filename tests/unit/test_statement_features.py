@@ -0,0 +1,100 @@
+"""In this file, we ensure that the statement analyzers which are skipped,
+since the statement does not have the features they require, would not
+have found the cause of the error, and that the features they require
+are spelled as those found in actual statements."""
+import glob
+import os
+
+from friendly.source_cache import cache
+from friendly.syntax_errors import error_in_def, source_info, statement_analyzer
+from friendly.syntax_errors import syntax_utils
+
+ANALYZERS = error_in_def.STATEMENT_ANALYZERS + statement_analyzer.STATEMENT_ANALYZERS
+# Errors handled by some analyzers which are not found in the corpus;
+# the last one is located at `elseif` by older versions of Python.
+EXTRA_SOURCES = [
+    "python3 -m pip install friendly\n",
+    "a = fb'{x}'\n",
+    "x = 1 elseif\n",
+]
+
+
+def get_statement(filename, source):
+    try:
+        compile(source, filename, "exec")
+    except SyntaxError as e:
+        if e.lineno is None:
+            return None
+        cache.add(filename, source)
+        if e.end_offset is None:
+            e.end_lineno, e.end_offset = e.lineno, e.offset + 1
+        return source_info.Statement(e, cache.get_line(filename, e.lineno))
+    except Exception:  # noqa
+        pass
+    return None
+
+
+def get_statements():
+    corpus = os.path.join(os.path.dirname(__file__), "..", "syntax", "*.py")
+    for filename in sorted(glob.glob(corpus)):
+        filename = os.path.abspath(filename)
+        with open(filename, encoding="utf8") as f:
+            statement = get_statement(filename, f.read())
+        if statement is not None:
+            yield statement
+    for index, source in enumerate(EXTRA_SOURCES):
+        statement = get_statement(f"<friendly-test:features-{index}>", source)
+        assert statement is not None, source
+        yield statement
+
+
+def test_declared_features():
+    def analyzer(statement):
+        return {}
+
+    for requires in (["bad_tokn == ':'"], ["bad_token == :"], [()]):
+        try:
+            syntax_utils.set_requirements(analyzer, requires)
+        except ValueError:
+            continue
+        assert False, requires
+    for analyzer in ANALYZERS:
+        for item in analyzer.required_features:
+            for feature in item:
+                assert syntax_utils.FEATURE.fullmatch(feature), feature
+
+
+def test_features_found():
+    # A misspelled feature, such as "bad_token == 'elif '", would never
+    # be found, and the analyzer requiring it would always be skipped.
+    found = set()
+    for statement in get_statements():
+        if statement.tokens:
+            found.update(statement.get_features())
+    for analyzer in ANALYZERS:
+        for item in analyzer.required_features:
+            for feature in item:
+                assert feature in found, (analyzer.__name__, feature)
+
+
+def test_skipped_analyzers():
+    nb_skipped = 0
+    for statement in get_statements():
+        if not statement.tokens:
+            continue
+        features = statement.get_features()
+        assert statement.features <= features == statement.get_features()
+        for analyzer in ANALYZERS:
+            required = analyzer.required_features
+            if not required or any(item <= features for item in required):
+                continue
+            nb_skipped += 1
+            assert not analyzer(statement), (statement.filename, analyzer.__name__)
+    assert nb_skipped > 1000
+
+
+if __name__ == "__main__":
+    test_declared_features()
+    test_features_found()
+    test_skipped_analyzers()
+    print("Success!")
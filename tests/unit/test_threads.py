@@ -0,0 +1,107 @@
+"""In this file, we ensure that exceptions can be explained in many
+threads at the same time, each using its own values for lang, include
+and redirect, without interfering with each other or with the session
+settings.
+"""
+import math
+import threading
+
+import friendly
+from friendly.config import session
+
+
+def raise_attribute_error():
+    math.Pi
+
+
+def raise_name_error():
+    alphabet = "abc"
+    alpha_bet
+
+
+def raise_zero_division_error():
+    1 / 0
+
+
+CASES = {
+    "attribute": (
+        raise_attribute_error,
+        "Did you mean `pi`?",
+        "Vouliez-vous dire `pi`",
+    ),
+    "name": (
+        raise_name_error,
+        "Did you mean `alphabet`?",
+        "Vouliez-vous dire `alphabet`",
+    ),
+    "zero": (
+        raise_zero_division_error,
+        "You are dividing by zero.",
+        "Vous divisez par zéro.",
+    ),
+}
+
+
+def explain(name, lang, include):
+    function = CASES[name][0]
+    try:
+        function()
+    except Exception:
+        friendly.explain_traceback(redirect="capture", include=include, lang=lang)
+    return friendly.get_output()
+
+
+def test_threads():
+    original_lang = friendly.get_lang()
+    original_include = friendly.get_include()
+    nb_before = len(session.saved_info)
+    results = {}
+    barrier = threading.Barrier(12)
+
+    def worker(index, name, lang, include):
+        barrier.wait()
+        outputs = []
+        for _ in range(5):
+            outputs.append(explain(name, lang, include))
+        results[index] = (name, lang, include, outputs)
+
+    threads = []
+    index = 0
+    for name in CASES:
+        for lang in ("en", "fr"):
+            for include in ("explain", "message"):
+                thread = threading.Thread(
+                    target=worker, args=(index, name, lang, include)
+                )
+                threads.append(thread)
+                index += 1
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == len(threads)
+    for name, lang, include, outputs in results.values():
+        english, french = CASES[name][1:]
+        for output in outputs:
+            if include == "message":
+                assert "Python" not in output
+                assert english not in output and french not in output
+            elif lang == "en":
+                assert english in output
+                assert french not in output
+            else:
+                assert french in output
+                assert english not in output
+
+    # The session settings have not been changed
+    assert friendly.get_lang() == original_lang
+    assert friendly.get_include() == original_include
+
+    while len(session.saved_info) > nb_before:
+        session.remove_last()
+
+
+if __name__ == "__main__":
+    test_threads()
+    print("Success!")
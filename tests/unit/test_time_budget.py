@@ -0,0 +1,104 @@
+"""In this file, we ensure that the analysis of an exception is
+abandoned when it exceeds the time budget, while still giving
+the message, the generic explanation and the location.
+"""
+import difflib
+import time
+
+import friendly
+from friendly import utils
+from friendly.config import session
+
+
+def raise_key_error():
+    big_dict = {f"key_number_{i}": i for i in range(200_000)}
+    return big_dict["key_numbr_5"]
+
+
+def test_time_budget():
+    original = friendly.get_time_budget()
+    friendly.set_time_budget(0.05)
+    try:
+        raise_key_error()
+    except KeyError:
+        start = time.perf_counter()
+        friendly.explain_traceback(redirect="capture")
+        duration = time.perf_counter() - start
+    result = friendly.get_output()
+    info = session.saved_info[-1]
+    assert duration < 1
+    assert "too much time" in info["cause"]
+    assert "suggest" not in info
+    assert "KeyError" in info["message"]
+    assert "generic" in info
+    assert "exception_raised_source" in info
+    assert "too much time" in result
+    session.remove_last()
+
+    friendly.set_time_budget(None)
+    try:
+        {"a": 1}["b"]
+    except KeyError:
+        friendly.explain_traceback(redirect="capture")
+    friendly.get_output()
+    assert "too much time" not in session.saved_info[-1]["cause"]
+    session.remove_last()
+    friendly.set_time_budget(original)
+
+
+def divide(a):
+    return a / 0
+
+
+def test_location_without_variables():
+    # Only the values of variables are omitted from the location.
+    original = friendly.get_time_budget()
+    friendly.set_time_budget(0)
+    try:
+        divide(1)
+    except ZeroDivisionError:
+        friendly.explain_traceback(redirect="capture", include="where")
+    result = friendly.get_output()
+    friendly.set_time_budget(original)
+    info = session.saved_info[-1]
+    assert "exception_raised_source" in info and "last_call_source" in info
+    assert "Execution stopped on line" in result
+    assert "exception_raised_variables" not in info
+    session.remove_last()
+
+
+def test_similar_words_in_parts():
+    words = [f"name_{i}" for i in range(3 * utils.WORDS_PER_CHECK)]
+    expected = difflib.get_close_matches("nmae_1234", words, n=5, cutoff=0.72)
+    assert len(expected) == 5
+    assert utils.get_similar_words("nmae_1234", words) == expected
+
+
+def test_trim_history_within_budget():
+    # Older entries of the history are replaced within the time budget;
+    # even if it is exceeded, the history does not keep growing.
+    original_budget = friendly.get_time_budget()
+    original_size = friendly.get_history_size()
+    friendly.set_time_budget(0)
+    friendly.set_history_size(1)
+    for key in range(3):
+        try:
+            {}[key]
+        except KeyError:
+            friendly.explain_traceback(redirect="capture")
+    friendly.get_output()
+    friendly.set_time_budget(original_budget)
+    friendly.set_history_size(original_size)
+    assert session.friendly[-1] is not None
+    assert session.friendly[-2] is None
+    assert session.friendly[-3] is None
+    for _ in range(3):
+        session.remove_last()
+
+
+if __name__ == "__main__":
+    test_time_budget()
+    test_location_without_variables()
+    test_similar_words_in_parts()
+    test_trim_history_within_budget()
+    print("Success!")
@@ -0,0 +1,67 @@
+"""In this file, we ensure that the time spent in each stage of the
+analysis is recorded only when requested.
+"""
+import math
+
+import friendly
+from friendly.config import session
+
+
+def explain():
+    try:
+        math.Pi
+    except AttributeError:
+        friendly.explain_traceback(redirect="capture")
+    friendly.get_output()
+
+
+def test_timing():
+    received = []
+
+    def sink(stage, seconds):
+        received.append((stage, seconds))
+
+    friendly.reset_timings()
+    friendly.enable_timing()
+    friendly.add_timing_sink(sink)
+    try:
+        explain()
+        timings = friendly.get_timings()
+        for stage in (
+            "traceback_data",
+            "get_records",
+            "find_node",
+            "assign_cause",
+            "get_likely_cause",
+            "assign_location",
+            "get_var_info",
+            "formatter",
+            "output",
+        ):
+            assert stage in timings, stage
+            assert timings[stage]["count"] >= 1
+            assert timings[stage]["seconds"] >= 0
+        assert timings["formatter"]["count"] == 1
+        assert {stage for stage, _ in received} == set(timings)
+
+        explain()
+        aggregate = friendly.get_timings(aggregate=True)
+        assert aggregate["formatter"]["count"] == 2
+        assert friendly.get_timings()["formatter"]["count"] == 1
+    finally:
+        friendly.enable_timing(False)
+        friendly.timing.remove_sink(sink)
+
+    nb_received = len(received)
+    explain()
+    assert friendly.get_timings() == {}
+    assert len(received) == nb_received
+    friendly.reset_timings()
+    assert friendly.get_timings(aggregate=True) == {}
+    for _ in range(3):
+        session.remove_last()
+
+
+if __name__ == "__main__":
+    test_timing()
+    print("Success!")
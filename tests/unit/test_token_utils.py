@@ -1,3 +1,7 @@
+import glob
+import os
+import sys
+
 from friendly import token_utils
 
 # Note: most of the tests involving untokenize have
@@ -126,4 +130,56 @@ def test_immediately_before_and_after():
     assert tokens[0].immediately_before(tokens[1])
     assert tokens[1].immediately_after(tokens[0])
     assert not tokens[1].immediately_before(tokens[2])
-    assert not tokens[2].immediately_after(tokens[1])
\ No newline at end of file
+    assert not tokens[2].immediately_after(tokens[1])
+
+def test_classification():
+    tokens = token_utils.get_significant_tokens("if x1 += 2.0 + 3j - 0x1f <= ...")
+    keyword, name, augmented, float_, plus, complex_, minus, hex_, le, dots = tokens
+    assert keyword.is_keyword() and dots.is_keyword()
+    assert name.is_identifier() and not keyword.is_identifier()
+    assert float_.is_float() and not float_.is_integer()
+    assert complex_.is_complex() and hex_.is_integer()
+    assert token_utils.is_assignment(augmented) and token_utils.is_math_op(minus)
+    assert token_utils.is_comparison(le) and token_utils.is_operator(plus)
+    assert token_utils.is_operator("!") and not token_utils.is_operator(name)
+    assert not hasattr(name, "__dict__")
+    # Flags follow changes of the string attribute
+    complex_.string = "3"
+    assert complex_.is_integer() and not complex_.is_complex()
+    name.string = "while"
+    assert name.is_keyword() and not name.is_identifier()
+
+
+def test_strip_comment():
+    """The lines handled without tokenizing them must give the same result
+    as the tokenizer."""
+    corpus = os.path.join(os.path.dirname(__file__), "..", "syntax", "*.py")
+    nb_fast = 0
+    for filename in glob.glob(corpus):
+        with open(filename, encoding="utf8") as f:
+            lines = f.read().splitlines(keepends=True)
+        for line in lines:
+            for variant in (line, line.rstrip("\n"), line.rstrip() + "  # comment"):
+                try:
+                    expected = token_utils._strip_comment_tokens(variant)
+                except Exception as e:
+                    expected = type(e)
+                if token_utils._find_comment(variant) is not None:
+                    nb_fast += 1
+                    assert token_utils.strip_comment(variant) == expected, variant
+    assert nb_fast > 1000
+    if sys.version_info < (3, 12):
+        assert token_utils.strip_comment("a = '#'  # c") == "a = '#'"
+    else:
+        assert token_utils.strip_comment("a = '#'  # c") == "a = '#'  # c"
+
+
+def test_token_pattern():
+    pattern = token_utils.TokenPattern("a + a + b")
+    assert pattern.find("a + a + a + a + b") == 4
+    assert pattern.find("a + a + a") == -1
+    # Lists of tokens are used as given
+    tokens = token_utils.get_significant_tokens("x = (a + a + b)")
+    assert token_utils.find_substring_index(tokens, pattern) == 3
+    assert token_utils.find_substring_index(tokens, tokens[4:6]) == 4
+    assert token_utils.find_substring_index(source3, "") == -1